@@ -1,11 +1,22 @@
+import re
+import datetime
 from typing import Any
+import numpy as np
 import pandas as pd
 import pyarrow as pa
+import pyarrow.compute as pc
+from scipy import sparse
 from ds_core.components.core_commons import CoreCommons
 
 
 class Commons(CoreCommons):
 
+    # resolved filter positions by schema and filter, reused within the process
+    _FILTER_CACHE = {}
+    # cleaned header names by the names and options, reused within the process
+    _CLEAN_CACHE = {}
+    _CACHE_LIMIT = 512
+
     @staticmethod
     def list_formatter(value: Any) -> list:
         if isinstance(value, pd.Series):
@@ -14,27 +25,302 @@ class Commons(CoreCommons):
             return value.iloc[0].to_list()
         return CoreCommons.list_formatter(value)
 
+    @staticmethod
+    def column_precision(a: pa.Array) -> int:
+        """returns the max precision in a numeric pyarrow array, vectorised over the unique values"""
+        if pa.types.is_integer(a.type):
+            return 0
+        if not pa.types.is_floating(a.type):
+            raise ValueError(f"The array should be numeric, type '{a.type}' sent.")
+        max_digits = 14
+        values = np.abs(pc.unique(a.drop_null()).to_numpy(zero_copy_only=False).astype(np.float64))
+        values = values[np.isfinite(values)]
+        int_part = np.floor(values)
+        magnitude = np.where(int_part == 0, 1, np.floor(np.log10(np.maximum(int_part, 1))) + 1).astype(np.int64)
+        keep = magnitude < max_digits
+        if not keep.any():
+            return 0
+        multiplier = np.power(10, max_digits - magnitude[keep]).astype(np.int64)
+        frac_digits = multiplier + np.floor(multiplier * (values[keep] - int_part[keep]) + 0.5).astype(np.int64)
+        zeros = frac_digits % 10 == 0
+        while zeros.any():
+            frac_digits[zeros] //= 10
+            zeros = frac_digits % 10 == 0
+        return int(np.floor(np.log10(frac_digits)).max())
+
     @staticmethod
     def date2value(dates: Any, day_first: bool=True, year_first: bool=False) -> list:
         """ converts a date to a number represented by to number of microseconds to the epoch"""
-        values = pd.Series(pd.to_datetime(dates, errors='coerce', dayfirst=day_first, yearfirst=year_first))
-        v_native = values.dt.tz_convert(None) if values.dt.tz else values
-        null_idx = values[values.isna()].index
-        values.iloc[null_idx] = pd.to_datetime(0)
-        result =  ((v_native - pd.Timestamp("1970-01-01")) / pd.Timedelta(microseconds=1)).astype(int).to_list()
-        values.iloc[null_idx] = None
-        return result
+        if isinstance(dates, (pa.Array, pa.ChunkedArray)):
+            values = dates
+        else:
+            dates = pd.to_datetime(dates, errors='coerce', dayfirst=day_first, yearfirst=year_first)
+            values = pa.array(pd.Series(dates if pd.api.types.is_list_like(dates) else [dates]), from_pandas=True)
+        return Commons.column_date2value(values, day_first=day_first, year_first=year_first).fill_null(0).to_pylist()
 
     @staticmethod
     def value2date(values: Any, dt_tz: Any=None, date_format: str=None) -> list:
         """ converts an integer into a datetime. The integer should represent time in microseconds since the epoch"""
-        if dt_tz:
-            dates = pd.Series(pd.to_datetime(values, unit='us', utc=True)).map(lambda x: x.tz_convert(dt_tz))
-        else:
-            dates = pd.Series(pd.to_datetime(values, unit='us'))
+        if not isinstance(values, (pa.Array, pa.ChunkedArray)):
+            values = pa.array(pd.Series(values if pd.api.types.is_list_like(values) else [values]), from_pandas=True)
+        dates = Commons.column_value2date(values, dt_tz=dt_tz, date_format=date_format)
+        if isinstance(date_format, str):
+            return dates.to_pylist()
+        return dates.to_pandas().to_list()
+
+    @staticmethod
+    def column_date2value(values: [pa.Array, pa.ChunkedArray], day_first: bool=True, year_first: bool=False) -> pa.Array:
+        """ converts a temporal array to an int64 array of microseconds to the epoch, or to midnight for time of
+        day, by casting the timestamp buffer. Timezone aware timestamps are counted from the UTC epoch. Only string
+        arrays are parsed, and nulls remain null"""
+        values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+        values = values.dictionary_decode() if pa.types.is_dictionary(values.type) else values
+        if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+            try:
+                values = values.cast(pa.timestamp('us'))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                values = pd.to_datetime(values.to_pandas(), errors='coerce', dayfirst=day_first, yearfirst=year_first)
+                values = pa.array(values, from_pandas=True)
+        if pa.types.is_timestamp(values.type):
+            values = values.cast(pa.timestamp('us', values.type.tz))
+        elif pa.types.is_date(values.type):
+            values = values.cast(pa.timestamp('us'))
+        elif pa.types.is_time(values.type):
+            values = values.cast(pa.time64('us'))
+        elif pa.types.is_floating(values.type):
+            return pc.round(values).cast(pa.int64())
+        elif not pa.types.is_integer(values.type):
+            raise ValueError(f"The array type '{values.type}' can not be converted to date values")
+        return values.cast(pa.int64())
+
+    @staticmethod
+    def column_value2date(values: [pa.Array, pa.ChunkedArray], dt_tz: Any=None, date_format: str=None) -> pa.Array:
+        """ converts an array of microseconds to the epoch into a timestamp array by casting the int64 buffer. The
+        timezone is set once on the type so the values are read as UTC and shown in the timezone. With a date_format
+        the dates are returned as strings, see column_strftime"""
+        values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+        if pa.types.is_floating(values.type):
+            values = pc.round(values)
+        dates = values.cast(pa.int64()).cast(pa.timestamp('us'))
+        if dt_tz is not None:
+            tz = pa.lib.tzinfo_to_string(dt_tz) if isinstance(dt_tz, datetime.tzinfo) else str(dt_tz)
+            dates = dates.cast(pa.timestamp('us', tz))
         if isinstance(date_format, str):
-            dates = dates.dt.strftime(date_format)
-        return dates.to_list()
+            return Commons.column_strftime(dates, date_format=date_format)
+        return dates
+
+    @staticmethod
+    def column_strftime(dates: [pa.Array, pa.ChunkedArray], date_format: str) -> pa.Array:
+        """ formats a timestamp array as strings as Python's strftime does. Arrow's %S prints the fraction of the
+        second, so the dates are floored to the second and any %f is joined in as the zero padded microseconds"""
+        dates = dates.combine_chunks() if isinstance(dates, pa.ChunkedArray) else dates
+        micros = dates.cast(pa.timestamp('us', dates.type.tz)).cast(pa.int64())
+        ticks = micros.fill_null(0).to_numpy(zero_copy_only=False)
+        mask = micros.is_null().to_numpy(zero_copy_only=False)
+        seconds = pa.array(np.floor_divide(ticks, 1_000_000), mask=mask).cast(pa.timestamp('s', dates.type.tz))
+        parts = [pc.strftime(seconds, format=part) for part in re.split('(?<!%)%f', date_format)]
+        if len(parts) == 1:
+            return parts[0]
+        fraction = pc.utf8_lpad(pa.array(np.mod(ticks, 1_000_000), mask=mask).cast(pa.string()), 6, '0')
+        items = [parts[0]]
+        for part in parts[1:]:
+            items += [fraction, part]
+        return pc.binary_join_element_wise(*items, '')
+
+    @staticmethod
+    def column_to_csr(column: [pa.Array, pa.ChunkedArray], width: int=None) -> sparse.csr_matrix:
+        """ converts a list column of indices, such as a sparse one hot encoding, to a scipy CSR matrix of ones
+        built on the column offsets and values buffers. The width defaults to the largest index plus one"""
+        column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+        offsets = column.offsets.to_numpy()
+        indices = column.values.to_numpy(zero_copy_only=False)[offsets[0]:offsets[-1]]
+        width = width if isinstance(width, int) else int(indices.max()) + 1 if indices.size else 0
+        return sparse.csr_matrix((np.ones(indices.size, dtype=np.int8), indices, offsets - offsets[0]),
+                                 shape=(len(column), width))
+
+    @staticmethod
+    def column_bins(column: [pa.Array, pa.ChunkedArray], edges: list, categories: list, right: bool=True,
+                    include_lowest: bool=False) -> pa.DictionaryArray:
+        """ assigns each value the category of the bin it falls in between sorted edges with a binary search over
+        the raw values, returned as a dictionary of the categories. Bins are closed on the right, or on the left
+        if not right, and include_lowest also closes the outermost edge. Values outside the edges are null"""
+        column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+        if pa.types.is_date32(column.type) or pa.types.is_time32(column.type):
+            column = column.cast(pa.int32())
+        if pa.types.is_temporal(column.type):
+            column = column.cast(pa.int64())
+        values = column.cast(pa.float64()).to_numpy(zero_copy_only=False)
+        edges = np.asarray(edges, dtype=np.float64)
+        if edges.size - 1 != len(categories):
+            raise ValueError(f"The categories must be one fewer than the bin edges, {len(categories)} were passed")
+        codes = np.searchsorted(edges, values, side='left' if right else 'right') - 1
+        with np.errstate(invalid='ignore'):
+            if right:
+                inside = (values > edges[0]) & (values <= edges[-1])
+                if include_lowest:
+                    codes[values == edges[0]] = 0
+                    inside |= values == edges[0]
+            else:
+                inside = (values >= edges[0]) & (values < edges[-1])
+                if include_lowest:
+                    codes[values == edges[-1]] = edges.size - 2
+                    inside |= values == edges[-1]
+        indices = pa.array(codes.astype(np.int32), mask=~inside)
+        return pa.DictionaryArray.from_arrays(indices, pa.array(list(categories)))
+
+    @staticmethod
+    def filter_headers(data: pa.Table, headers: [str, list]=None, d_types: list=None, regex: [str, list]=None,
+                       drop: bool=None) -> list:
+        """ returns a list of headers based on the filter criteria. The order of filter is d_type, headers then regex.
+        Data type are taken from `pyarrow.types` and should be a string or list of strings that question a data type.
+        For example ['is_integer', 'is_floating']. Headers are returned in the order of the table.
+
+        :param data: the Canonical data to get the column headers from
+        :param d_types: (optional) a list of `pyarrow.types` method names of the columns headers
+        :param headers: (optional) a list of header strings to select from the columns headers
+        :param regex: (optional) a regular expression to search from the columns headers
+        :param drop: (optional) reverses the selection and drops the selected column headers
+        :return: a filtered list of headers
+
+        :raise: TypeError if any of the types are not as expected
+        """
+        names = data.column_names if isinstance(data, pa.Table) else None
+        return [names[i] for i in Commons.filter_positions(data, headers=headers, d_types=d_types, regex=regex,
+                                                           drop=drop)]
+
+    @staticmethod
+    def filter_columns(data: pa.Table, headers=None, d_types: list=None, regex: [str, list]=None,
+                       drop: bool=None) -> pa.Table:
+        """ Returns a subset of columns based on the filter criteria. The order of filter is d_type, headers then regex.
+
+        :param data: the Canonical data to get the column headers from
+        :param d_types: (optional) a list of pyarrow DataTypes of the columns headers
+        :param headers: (optional) a list of header strings to select from the columns headers
+        :param regex: (optional) a regular expression to search from the columns headers
+        :param drop: (optional) reverses the selection and drops the selected column headers
+        :return: pa.Table
+        """
+        return data.select(Commons.filter_positions(data, headers=headers, d_types=d_types, regex=regex, drop=drop))
+
+    @staticmethod
+    def filter_positions(data: pa.Table, headers: [str, list]=None, d_types: list=None, regex: [str, list]=None,
+                         drop: bool=None) -> list:
+        """ returns the column positions selected by the filter criteria, see filter_headers. The types are read
+        from the schema and the regex compiled once, and the positions are memoised by the column names and types
+        and the filter so repeated filters on the same schema do not touch the data"""
+        if not isinstance(data, pa.Table):
+            raise TypeError("The first function attribute must be a pa.Table")
+        drop = drop if isinstance(drop, bool) else False
+        d_types = Commons.list_formatter(d_types) or []
+        headers = Commons.list_formatter(headers) or []
+        regex = '|'.join(Commons.list_formatter(regex) or [])
+        key = (tuple(data.column_names), tuple(str(t) for t in data.schema.types), tuple(d_types), tuple(headers), regex,
+               drop)
+        if key in Commons._FILTER_CACHE:
+            return Commons._FILTER_CACHE[key]
+        fields = list(data.schema)
+        selected = [True] * len(fields)
+        if d_types:
+            checks = [getattr(pa.types, t) if isinstance(t, str) else t.equals for t in d_types]
+            selected = [any(check(f.type) for check in checks) for f in fields]
+        if headers:
+            headers = set(headers)
+            selected = [s and f.name in headers for s, f in zip(selected, fields)]
+        if regex:
+            pattern = re.compile(regex)
+            selected = [s and pattern.search(f.name) is not None for s, f in zip(selected, fields)]
+        positions = [i for i, s in enumerate(selected) if s != drop]
+        if len(Commons._FILTER_CACHE) >= Commons._CACHE_LIMIT:
+            Commons._FILTER_CACHE.clear()
+        Commons._FILTER_CACHE[key] = positions
+        return positions
+
+    @staticmethod
+    def clean_headers(names: list, case: str=None, replace_spaces: str=None) -> list:
+        """ returns the names with punctuation removed, whitespace replaced and, if given, the case changed to
+        'lower', 'upper' or 'title'. The cleaned names are memoised by the names and options"""
+        replace_spaces = replace_spaces if isinstance(replace_spaces, str) else '_'
+        case = case.lower() if isinstance(case, str) else None
+        key = (tuple(names), case, replace_spaces)
+        if key in Commons._CLEAN_CACHE:
+            return Commons._CLEAN_CACHE[key]
+        cleaned = [re.sub(r"\s+", replace_spaces, re.sub(r"[^\w\s]", '', n)) for n in names]
+        if case in ['lower', 'upper', 'title']:
+            cleaned = getattr(pc, f"ascii_{case}")(pa.array(cleaned, pa.string())).to_pylist()
+        if len(Commons._CLEAN_CACHE) >= Commons._CACHE_LIMIT:
+            Commons._CLEAN_CACHE.clear()
+        Commons._CLEAN_CACHE[key] = cleaned
+        return cleaned
+
+    @staticmethod
+    def table_builder(t: pa.Table=None):
+        """ returns a TableBuilder to stage column changes against the table and commit them in one rebuild """
+        return TableBuilder(t)
+
+    @staticmethod
+    def table_append(t1: pa.Table, t2: pa.Table) -> pa.Table:
+        """ appends all the columns in t2 to t1, replacing any columns in t1 of the same name. The result is built
+        once from the existing column chunks so no column data is copied """
+        if not isinstance(t2, pa.Table):
+            raise ValueError("As a minimum, the second value passed must be a PyArrow Table")
+        if not isinstance(t1, pa.Table):
+            return t2
+        if t1.num_rows != t2.num_rows:
+            raise ValueError(f"The tables passed are not of equal row size. "
+                             f"The first has '{t1.num_rows}' rows and the second has '{t2.num_rows}' rows")
+        builder = TableBuilder(t1)
+        for field, column in zip(t2.schema, t2.columns):
+            builder.append(field, column)
+        return builder.build()
+
+    @staticmethod
+    def table_cast(t: pa.Table, inc_cat: bool=None, cat_max: int=None, inc_bool: bool=None, inc_time:bool=None,
+                   dt_format: str=None, units: str=None, tz: str=None) -> pa.Table:
+        """ attempt to cast a pyarrow table columns to an appropriate type. Columns are cast chunk by chunk and
+        the table rebuilt once, with columns that keep their type passed through untouched
+
+        :param t: a pa.Table to cast
+        :param inc_cat: if to cast categories
+        :param cat_max: the max number of unique categories to consider
+        :param inc_bool: if to cast booleans
+        :param inc_time: if to cast time and timestamp
+        :param dt_format: if unclear, the format of the string datetime
+        :param units: the units to cast a timestamp to
+        :param tz: the timezone to cast a timestamp to
+        """
+        cat_max = cat_max if isinstance(cat_max, int) else 40
+        inc_cat = inc_cat if isinstance(inc_cat, int) else True
+        inc_bool = inc_bool if isinstance(inc_bool, int) else True
+        inc_time = inc_time if isinstance(inc_time, int) else True
+        units = units if isinstance(units, str) and units in ['s', 'ms', 'us', 'ns'] else 'ns'
+        builder = TableBuilder(t)
+        for n, column in zip(t.column_names, t.columns):
+            c = column
+            if not inc_cat and pa.types.is_dictionary(c.type):
+                c = c.cast(c.type.value_type)
+            elif not inc_bool and pa.types.is_boolean(c.type):
+                c = c.cast(pa.int8())
+            elif not inc_time and (pa.types.is_time(c.type) or pa.types.is_timestamp(c.type)):
+                c = c.cast(pa.string())
+            if inc_time and pa.types.is_string(c.type):
+                if any(Commons.valid_date(x) for x in c.drop_null().to_pylist()):
+                    if isinstance(dt_format, str):
+                        c = pc.strptime(c, format=dt_format, unit=units)
+                    else:
+                        c = Commons.column_cast(c, pa.timestamp(unit=units, tz=tz))
+            if pa.types.is_string(c.type):
+                c = Commons.column_cast(c, pa.float64())
+            if pa.types.is_floating(c.type):
+                c = Commons.column_cast(c, pa.int64())
+            if inc_bool and pa.types.is_integer(c.type) and c.drop_null().unique().sort().equals(pa.array([0, 1])):
+                c = Commons.column_cast(c, pa.bool_())
+            if inc_bool and pa.types.is_string(c.type) and pc.count_distinct(c.drop_null()).equals(pa.scalar(2)):
+                c = Commons.column_cast(c, pa.bool_())
+            if inc_cat and pa.types.is_string(c.type) and 1 <= pc.count_distinct(c.drop_null()).as_py() <= cat_max:
+                c = c.dictionary_encode()
+            if c is not column:
+                builder.set(n, c)
+        return builder.build()
 
     @staticmethod
     def report(canonical: pd.DataFrame, index_header: [str, list]=None, bold: [str, list]=None,
@@ -83,3 +369,104 @@ class Commons(CoreCommons):
         if isinstance(head, int):
             df = df[:head]
         return Commons.report(df, index_header=index_header, bold=bold, large_font=large_font)
+
+
+class TableBuilder(object):
+    """ stages column replacements, additions and drops against a pa.Table and commits them in a single rebuild.
+    Staged columns may be pa.Array or pa.ChunkedArray and are kept as chunks, so each build is one pass over the
+    schema however many columns are staged, rather than a new table for every column.
+
+        builder = Commons.table_builder(canonical)
+        builder.set('age', age)          # replaces in place, or adds to the end if new
+        builder.append('score', score)   # removes any existing 'score' and adds to the end
+        canonical = builder.build()
+    """
+
+    def __init__(self, t: pa.Table=None):
+        if t is not None and not isinstance(t, pa.Table):
+            raise ValueError("The table passed to the builder must be a PyArrow Table")
+        self._num_rows = t.num_rows if isinstance(t, pa.Table) else None
+        self._fields = list(t.schema) if isinstance(t, pa.Table) else []
+        self._columns = list(t.columns) if isinstance(t, pa.Table) else []
+        self._metadata = t.schema.metadata if isinstance(t, pa.Table) else None
+        self._index = {}
+        for i, f in enumerate(self._fields):
+            self._index.setdefault(f.name, i)
+
+    @property
+    def column_names(self) -> list:
+        return [f.name for f in self._fields if f is not None]
+
+    def set(self, name: [str, pa.Field], column: [pa.Array, pa.ChunkedArray]):
+        """ replaces the named column in place or, if not in the table, adds it to the end
+
+        :param name: the header name or a pa.Field whose type must match the column
+        :param column: the pa.Array or pa.ChunkedArray of values
+        :return: self, so calls can be chained
+        """
+        field, column = self._conform(name, column)
+        if field.name in self._index:
+            idx = self._index[field.name]
+            self._fields[idx] = field
+            self._columns[idx] = column
+        else:
+            self._index[field.name] = len(self._fields)
+            self._fields.append(field)
+            self._columns.append(column)
+        return self
+
+    def append(self, name: [str, pa.Field], column: [pa.Array, pa.ChunkedArray]):
+        """ adds the column to the end, removing any existing column of the same name
+
+        :param name: the header name or a pa.Field whose type must match the column
+        :param column: the pa.Array or pa.ChunkedArray of values
+        :return: self, so calls can be chained
+        """
+        field, column = self._conform(name, column)
+        self.drop(field.name)
+        return self.set(field, column)
+
+    def drop(self, names: [str, list]):
+        """ removes the named columns if they exist
+
+        :param names: a header or list of headers
+        :return: self, so calls can be chained
+        """
+        for name in Commons.list_formatter(names):
+            idx = self._index.pop(name, None)
+            if idx is None:
+                continue
+            self._fields[idx] = None
+            self._columns[idx] = None
+            # a later column of the same name becomes the one addressed by the name
+            for i in range(idx + 1, len(self._fields)):
+                if self._fields[i] is not None and self._fields[i].name == name:
+                    self._index[name] = i
+                    break
+        return self
+
+    def build(self) -> pa.Table:
+        """ commits the staged changes, returning a new pa.Table built once from the column chunks """
+        fields = [f for f in self._fields if f is not None]
+        columns = [c for c in self._columns if c is not None]
+        schema = pa.schema(fields, metadata=self._metadata)
+        if not columns:
+            return pa.table({}) if self._num_rows is None else pa.Table.from_batches([], schema=schema)
+        return pa.Table.from_arrays(columns, schema=schema)
+
+    def _conform(self, name: [str, pa.Field], column: [pa.Array, pa.ChunkedArray]) -> tuple:
+        """ checks the column is the table row length and returns the field and column """
+        if isinstance(column, pa.Table):
+            column = column.column(0)
+        if not isinstance(column, (pa.Array, pa.ChunkedArray)):
+            column = pa.array(column)
+        if self._num_rows is None:
+            self._num_rows = len(column)
+        elif len(column) != self._num_rows:
+            raise ValueError(f"The column '{name}' has '{len(column)}' rows and the table has "
+                             f"'{self._num_rows}' rows")
+        field = name if isinstance(name, pa.Field) else pa.field(str(name), column.type)
+        if not field.type.equals(column.type):
+            raise ValueError(f"The field '{field.name}' type '{field.type}' does not match the column type "
+                             f"'{column.type}'")
+        return field, column
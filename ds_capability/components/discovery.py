@@ -338,8 +338,8 @@ class DataDiscovery(object):
             elif pa.types.is_integer(c.type) or pa.types.is_floating(c.type):
                 precision = Commons.column_precision(c)
                 intervals = DataDiscovery.to_discrete_intervals(column=c, granularity=5, categories=['A','B','C','D','E'])
-                vc = intervals.dictionary_encode().drop_null().value_counts()
-                t = pa.table([vc.field(1), vc.field(0).dictionary], names=['v','n']).sort_by([("n", "ascending")])
+                vc = intervals.drop_null().value_counts()
+                t = pa.table([vc.field(1), vc.field(0).dictionary_decode()], names=['v','n']).sort_by([("n", "ascending")])
                 record.append([n, 'intervals', ['lower','low','mid','high','higher']])
                 _ = pc.round(pc.divide_checked(t.column('v').cast(pa.float64()), pc.sum(t.column('v'))),3).to_pylist()
                 record.append([n, 'frequency', _])
@@ -395,10 +395,10 @@ class DataDiscovery(object):
                 record.append([n, 'distinct', distinct_count])
                 record.append([n, 'distinct_proportions', (distinct_count/len(c))])
             elif pa.types.is_timestamp(c.type) or pa.types.is_time(c.type) or pa.types.is_date(c.type):
-                _ = pa.array(Commons.date2value(c.to_pylist()))
+                _ = Commons.column_date2value(c)
                 intervals = DataDiscovery.to_discrete_intervals(column=_, granularity=5, categories=['A','B','C','D','E'])
-                vc = intervals.dictionary_encode().drop_null().value_counts()
-                t = pa.table([vc.field(1), vc.field(0).dictionary], names=['v','n']).sort_by([("n", "ascending")])
+                vc = intervals.drop_null().value_counts()
+                t = pa.table([vc.field(1), vc.field(0).dictionary_decode()], names=['v','n']).sort_by([("n", "ascending")])
                 record.append([n, 'intervals', ['older','old','mid','new','newer']])
                 _ = pc.round(pc.divide_checked(t.column('v').cast(pa.float64()), pc.sum(t.column('v'))),3).to_pylist()
                 record.append([n, 'frequency', _])
@@ -440,15 +440,15 @@ class DataDiscovery(object):
     @staticmethod
     def to_discrete_intervals(column: pa.Array, granularity: [int, float, list]=None, lower: [int, float]=None,
                               upper: [int, float]=None, categories: list=None, precision: int=None) -> pa.Array:
-        """ creates discrete intervals from continuous values """
+        """ creates discrete intervals from continuous values as a dictionary of the interval labels """
         # intend code block on the canonical
+        column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
         granularity = granularity if isinstance(granularity, (int, float, list)) or granularity == 0 else 5
         granularity = len(categories) if isinstance(categories, list) else granularity
         precision = precision if isinstance(precision, int) else 5
         lower = lower if isinstance(lower, (int, float)) else pc.min(column).as_py()
         # firstly get the granularity
         upper = upper if isinstance(upper, (int, float)) else pc.max(column).as_py()
-        s_values = column.to_pandas()
         if lower >= upper:
             upper = lower
             granularity = [(lower, upper, 'both')]
@@ -457,55 +457,58 @@ class DataDiscovery(object):
             if isinstance(granularity, float):
                 # make sure frequency goes beyond the upper
                 _end = upper + granularity - (upper % granularity)
-                periods = pd.interval_range(start=lower, end=_end, freq=granularity).drop_duplicates()
-                periods = periods.to_tuples().to_list()
-                granularity = []
-                while len(periods) > 0:
-                    period = periods.pop(0)
-                    if len(periods) == 0:
-                        granularity += [(period[0], period[1], 'both')]
-                    else:
-                        granularity += [(period[0], period[1], 'left')]
+                periods = int(np.ceil((_end - lower) / granularity - 1e-9))
+                edges = np.unique(lower + granularity * np.arange(periods + 1))
+                granularity = [(edges[i - 1], edges[i], 'left') for i in range(1, edges.size - 1)]
+                granularity += [(edges[-2], edges[-1], 'both')]
             # if granularity int then convert periods to intervals
             else:
-                periods = pd.interval_range(start=lower, end=upper, periods=granularity).drop_duplicates()
-                granularity = periods.to_tuples().to_list()
+                edges = np.unique(np.linspace(lower, upper, granularity + 1))
+                granularity = [(edges[0], edges[1], 'both')]
+                granularity += [(edges[i - 1], edges[i], 'right') for i in range(2, edges.size)]
         if isinstance(granularity, list):
             if all(isinstance(value, tuple) for value in granularity):
                 if len(granularity[0]) == 2:
                     granularity[0] = (granularity[0][0], granularity[0][1], 'both')
                 granularity = [(t[0], t[1], 'right') if len(t) == 2 else t for t in granularity]
             elif all(isinstance(value, float) and 0 < value < 1 for value in granularity):
-                quantiles = list(set(granularity + [0, 1.0]))
-                boundaries = s_values.quantile(quantiles).values
-                boundaries.sort()
+                quantiles = sorted(set(granularity + [0, 1.0]))
+                boundaries = np.sort(pc.quantile(column, q=quantiles).to_numpy())
                 granularity = [(boundaries[0], boundaries[1], 'both')]
                 granularity += [(boundaries[i - 1], boundaries[i], 'right') for i in range(2, boundaries.size)]
             else:
-                granularity = (lower, upper, 'both')
-        granularity = [(np.round(p[0], precision), np.round(p[1], precision), p[2]) for p in granularity]
+                granularity = [(lower, upper, 'both')]
+        # the outer edges are rounded outwards so the precision never drops the column limits
+        scale = 10 ** precision
+        granularity[0] = (np.floor(granularity[0][0] * scale) / scale,) + tuple(granularity[0][1:])
+        granularity[-1] = (granularity[-1][0], np.ceil(granularity[-1][1] * scale) / scale) + tuple(granularity[-1][2:])
+        granularity = [(np.round(p[0], precision), np.round(p[1], precision), str.lower(p[2])) for p in granularity]
         # now create the categories
-        conditions = []
-        for interval in granularity:
-            lower, upper, closed = interval
-            if str.lower(closed) == 'neither':
-                conditions.append((s_values > lower) & (s_values < upper))
-            elif str.lower(closed) == 'right':
-                conditions.append((s_values > lower) & (s_values <= upper))
-            elif str.lower(closed) == 'both':
-                conditions.append((s_values >= lower) & (s_values <= upper))
-            else:
-                conditions.append((s_values >= lower) & (s_values < upper))
-        if isinstance(categories, list) and len(categories) == len(conditions):
+        if isinstance(categories, list) and len(categories) == len(granularity):
             choices = categories
+        elif pa.types.is_integer(column.type):
+            choices = [f"{int(i[0])}->{int(i[1])}" for i in granularity]
         else:
-            if s_values.dtype.name.startswith('int'):
-                choices = [f"{int(i[0])}->{int(i[1])}" for i in granularity]
-            else:
-                choices = [f"{i[0]}->{i[1]}" for i in granularity]
-        # noinspection PyTypeChecker
-        rtn_list = np.select(conditions, choices, default=None).tolist()
-        return pa.StringArray.from_pandas(rtn_list)
+            choices = [f"{i[0]}->{i[1]}" for i in granularity]
+        edges = [granularity[0][0]] + [p[1] for p in granularity]
+        closed = [p[2] for p in granularity]
+        contiguous = all(granularity[i][1] == granularity[i + 1][0] for i in range(len(granularity) - 1))
+        # contiguous intervals closed on one side are binned in a single search over the edges
+        if contiguous and all(c == 'right' for c in closed[1:]) and closed[0] in ['right', 'both']:
+            return Commons.column_bins(column, edges, choices, right=True, include_lowest=closed[0] == 'both')
+        if contiguous and all(c == 'left' for c in closed[:-1]) and closed[-1] in ['left', 'both']:
+            return Commons.column_bins(column, edges, choices, right=False, include_lowest=closed[-1] == 'both')
+        # otherwise each interval is masked in reverse so the first that holds a value wins
+        values = column.cast(pa.int64()) if pa.types.is_timestamp(column.type) else column
+        values = values.cast(pa.float64()).to_numpy(zero_copy_only=False)
+        codes = np.full(values.size, -1, dtype=np.int32)
+        with np.errstate(invalid='ignore'):
+            for code in reversed(range(len(granularity))):
+                lower, upper, closed = granularity[code]
+                above = values >= lower if closed in ['left', 'both'] else values > lower
+                below = values <= upper if closed in ['right', 'both'] else values < upper
+                codes[above & below] = code
+        return pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes < 0), pa.array(choices))
 
     @staticmethod
     def conditional_entropy(x: [list, np.array, pa.Array], y: [list, np.array, pa.Array]):
@@ -0,0 +1,522 @@
+import ast
+import io
+import re
+import tokenize
+from functools import lru_cache
+from typing import Callable, Any
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+__author__ = 'Darryl Oatridge'
+
+
+class Expression(object):
+    """ A small, safe expression language for column values. An expression is parsed once, checked against a
+    whitelist and compiled into a chain of vectorised pyarrow.compute calls, falling back to numpy ufuncs where
+    there is no compute equivalent. Compiled expressions are cached on the expression string.
+
+    The column value is referenced as ``x``, as ``@``, or as the argument of a leading lambda. For example:
+
+            "lambda x: (x - 3) / 2"
+            "@ * 2 + 1"
+            "x.str.extract('([0-9]+)').astype('float')"
+            "x.apply(lambda v: v[0] if isinstance(v, str) and len(v) > 0 else None)"
+
+    The language supports:
+
+            literals => numbers, strings, True, False, None and lists or tuples of literals
+            operators => + - * / // % ** and unary -, comparisons == != < <= > >= in, not in
+            logic => and, or, not, &, |, ~ and the conditional 'a if condition else b'
+            functions => abs, round, min, max, clip, sqrt, exp, log, log10, log2, log1p, sin, cos, tan, floor,
+                    ceil, trunc, sign, len, str, int, float, bool, isinstance, is_null, is_valid, fill_null
+            methods => astype, fillna, round, abs, clip, isna, isnull, notna, notnull, between, map, replace,
+                    apply, cumsum
+            str methods => lower, upper, title, capitalize, strip, lstrip, rstrip, len, startswith, endswith,
+                    contains, replace, extract, slice, split, pad, zfill, decode and str[start:stop]
+
+    Anything outside of the language raises a ValueError.
+    """
+
+    _TYPES = {'float': pa.float64(), 'float64': pa.float64(), 'float32': pa.float32(), 'int': pa.int64(),
+              'int64': pa.int64(), 'int32': pa.int32(), 'str': pa.string(), 'string': pa.string(),
+              'bool': pa.bool_(), 'boolean': pa.bool_()}
+
+    _NUMERIC = {'sqrt': 'sqrt', 'exp': 'exp', 'log': 'ln', 'log10': 'log10', 'log2': 'log2', 'log1p': 'log1p',
+                'sin': 'sin', 'cos': 'cos', 'tan': 'tan', 'floor': 'floor', 'ceil': 'ceil', 'trunc': 'trunc',
+                'sign': 'sign', 'abs': 'abs'}
+
+    _COMPARE = {ast.Eq: 'equal', ast.NotEq: 'not_equal', ast.Lt: 'less', ast.LtE: 'less_equal',
+                ast.Gt: 'greater', ast.GtE: 'greater_equal'}
+
+    @staticmethod
+    def compile(code_str: str) -> Callable[[Any], pa.Array]:
+        """ compiles an expression string into a callable taking a pyarrow array and returning a pyarrow array.
+        The compiled callable is cached on the expression string.
+
+        :param code_str: the expression string
+        :return: a callable
+        """
+        if not isinstance(code_str, str) or len(code_str.strip()) == 0:
+            raise ValueError("The expression must be a non-empty string")
+        return Expression._compile(code_str.strip())
+
+    @staticmethod
+    def evaluate(code_str: str, values: Any) -> pa.Array:
+        """ evaluates an expression string against a column of values.
+
+        :param code_str: the expression string
+        :param values: a pyarrow Array, ChunkedArray or a numpy array
+        :return: a pyarrow Array of equal length
+        """
+        return Expression.compile(code_str)(values)
+
+    @staticmethod
+    def method_chain(code_str: str) -> str:
+        """ returns a pandas style method chain, such as "str.lower()", as an expression on the value 'x' """
+        code_str = code_str.strip()
+        if code_str.startswith('['):
+            return f"x{code_str}"
+        return f"x.{code_str}"
+
+    """
+        PRIVATE METHODS SECTION
+    """
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _compile(code_str: str) -> Callable[[Any], pa.Array]:
+        """private method to parse and compile an expression string"""
+        try:
+            # only the bare '@' token is the value, an '@' within a string literal is left as it is
+            tokens = [(tokenize.NAME, 'x') + t[2:] if t.type == tokenize.OP and t.string == '@' else t
+                      for t in tokenize.generate_tokens(io.StringIO(code_str).readline)]
+            tree = ast.parse(tokenize.untokenize(tokens), mode='eval')
+        except (SyntaxError, tokenize.TokenError) as e:
+            raise ValueError(f"The expression '{code_str}' is not valid syntax: {e.args[0]}")
+        body = tree.body
+        name = 'x'
+        if isinstance(body, ast.Lambda):
+            name, body = Expression._lambda(body)
+        func = Expression._build(body, name)
+
+        def _run(values: Any) -> pa.Array:
+            if isinstance(values, pa.ChunkedArray):
+                values = values.combine_chunks()
+            elif isinstance(values, np.ndarray):
+                values = pa.array(values, from_pandas=True)
+            elif not isinstance(values, pa.Array):
+                values = pa.array(values)
+            try:
+                result = func(values)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:
+                raise ValueError(f"The expression '{code_str}' can't be applied to values of type '{values.type}': {e}")
+            if isinstance(result, pa.ChunkedArray):
+                result = result.combine_chunks()
+            if isinstance(result, pa.Scalar):
+                result = pa.repeat(result, len(values))
+            elif not isinstance(result, pa.Array):
+                result = pa.repeat(pa.scalar(result), len(values))
+            return result
+
+        return _run
+
+    @staticmethod
+    def _lambda(node: ast.Lambda) -> tuple:
+        """private method returning the single argument name and the body of a lambda"""
+        args = node.args
+        if len(args.args) != 1 or args.vararg or args.kwarg or args.kwonlyargs or args.defaults:
+            raise ValueError("A lambda expression must take exactly one argument")
+        return args.args[0].arg, node.body
+
+    @staticmethod
+    def _literal(node: ast.AST) -> Any:
+        """private method returning a python literal from a node or raises a ValueError"""
+        try:
+            return ast.literal_eval(node)
+        except ValueError:
+            raise ValueError(f"Expected a literal value, found '{ast.unparse(node)}'")
+
+    @staticmethod
+    def _build(node: ast.AST, name: str) -> Callable:
+        """private method recursively compiling an ast node into a callable of the column values"""
+        build = Expression._build
+        if isinstance(node, ast.Name):
+            if node.id != name:
+                raise ValueError(f"The name '{node.id}' is not recognised, the value is referenced as '{name}'")
+            return lambda v: v
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return lambda v: value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            value = Expression._literal(node)
+            return lambda v: value
+        if isinstance(node, ast.UnaryOp):
+            operand = build(node.operand, name)
+            if isinstance(node.op, ast.USub):
+                return lambda v: pc.negate(operand(v))
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            return lambda v: pc.invert(Expression._as_bool(operand(v)))
+        if isinstance(node, ast.BinOp):
+            return Expression._bin_op(node, name)
+        if isinstance(node, ast.BoolOp):
+            values = [build(n, name) for n in node.values]
+            func = pc.and_kleene if isinstance(node.op, ast.And) else pc.or_kleene
+
+            def _bool_op(v):
+                result = Expression._as_bool(values[0](v))
+                for item in values[1:]:
+                    result = func(result, Expression._as_bool(item(v)))
+                return result
+            return _bool_op
+        if isinstance(node, ast.Compare):
+            return Expression._compare(node, name)
+        if isinstance(node, ast.IfExp):
+            test, body, orelse = build(node.test, name), build(node.body, name), build(node.orelse, name)
+            return lambda v: Expression._if_else(Expression._as_bool(test(v)), body(v), orelse(v))
+        if isinstance(node, ast.Subscript):
+            return Expression._subscript(node, name)
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                return Expression._function(node, name)
+            if isinstance(node.func, ast.Attribute):
+                return Expression._method(node, name)
+        raise ValueError(f"The expression element '{ast.unparse(node)}' is not supported")
+
+    @staticmethod
+    def _bin_op(node: ast.BinOp, name: str) -> Callable:
+        """private method compiling a binary operator"""
+        left, right = Expression._build(node.left, name), Expression._build(node.right, name)
+        op = node.op
+
+        def _bin(v):
+            a, b = left(v), right(v)
+            if isinstance(op, ast.Add):
+                if Expression._is_string(a) or Expression._is_string(b):
+                    return pc.binary_join_element_wise(a, b, '')
+                return pc.add(a, b)
+            if isinstance(op, ast.Sub):
+                return pc.subtract(a, b)
+            if isinstance(op, ast.Mult):
+                return pc.multiply(a, b)
+            if isinstance(op, ast.Div):
+                return pc.divide(Expression._as_float(a), Expression._as_float(b))
+            if isinstance(op, ast.FloorDiv):
+                return pc.floor(pc.divide(Expression._as_float(a), Expression._as_float(b)))
+            if isinstance(op, ast.Pow):
+                return pc.power(Expression._as_float(a), b)
+            if isinstance(op, ast.Mod):
+                return Expression._ufunc(np.mod, a, b)
+            if isinstance(op, ast.BitAnd):
+                return pc.and_kleene(Expression._as_bool(a), Expression._as_bool(b))
+            if isinstance(op, ast.BitOr):
+                return pc.or_kleene(Expression._as_bool(a), Expression._as_bool(b))
+            raise ValueError(f"The operator in '{ast.unparse(node)}' is not supported")
+        return _bin
+
+    @staticmethod
+    def _compare(node: ast.Compare, name: str) -> Callable:
+        """private method compiling a comparison or a chained comparison"""
+        operands = [Expression._build(node.left, name)] + [Expression._build(n, name) for n in node.comparators]
+        ops = node.ops
+        for op in ops:
+            if type(op) not in Expression._COMPARE and not isinstance(op, (ast.In, ast.NotIn)):
+                raise ValueError(f"The comparison in '{ast.unparse(node)}' is not supported")
+
+        def _cmp(v):
+            result = None
+            for idx, op in enumerate(ops):
+                a, b = operands[idx](v), operands[idx + 1](v)
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    b = list(b) if isinstance(b, (list, tuple)) else [b]
+                    item = pc.is_in(a, value_set=pa.array(b))
+                    item = pc.invert(item) if isinstance(op, ast.NotIn) else item
+                else:
+                    item = getattr(pc, Expression._COMPARE[type(op)])(a, b)
+                result = item if result is None else pc.and_kleene(result, item)
+            return result
+        return _cmp
+
+    @staticmethod
+    def _subscript(node: ast.Subscript, name: str) -> Callable:
+        """private method compiling an index or slice of a string or list value"""
+        value = node.value
+        # the pandas str accessor, x.str[0]
+        if isinstance(value, ast.Attribute) and value.attr == 'str':
+            value = value.value
+        target = Expression._build(value, name)
+        index = node.slice
+        if isinstance(index, ast.Slice):
+            start = Expression._literal(index.lower) if index.lower else 0
+            stop = Expression._literal(index.upper) if index.upper else None
+            step = Expression._literal(index.step) if index.step else 1
+
+            def _slice(v):
+                a = target(v)
+                if pa.types.is_list(a.type) or pa.types.is_large_list(a.type):
+                    return pc.list_slice(a, start, stop, step)
+                _stop = stop if isinstance(stop, int) else np.iinfo(np.int64).max
+                return pc.utf8_slice_codeunits(a, start, _stop, step)
+            return _slice
+        position = Expression._literal(index)
+        if not isinstance(position, int):
+            raise ValueError(f"The index in '{ast.unparse(node)}' must be an integer")
+
+        def _index(v):
+            a = target(v)
+            if pa.types.is_list(a.type) or pa.types.is_large_list(a.type):
+                return pc.list_element(a, position)
+            stop = position + 1 if position != -1 else np.iinfo(np.int64).max
+            result = pc.utf8_slice_codeunits(a, position, stop)
+            return pc.if_else(pc.equal(result, ''), pa.scalar(None, result.type), result)
+        return _index
+
+    @staticmethod
+    def _function(node: ast.Call, name: str) -> Callable:
+        """private method compiling a whitelisted function call"""
+        func_name = node.func.id
+        if node.keywords:
+            raise ValueError(f"Keyword arguments are not supported for the function '{func_name}'")
+        args = node.args
+        if func_name == 'isinstance':
+            target = Expression._build(args[0], name)
+            types = args[1].elts if isinstance(args[1], ast.Tuple) else [args[1]]
+            check = {'str': (pa.types.is_string, pa.types.is_large_string),
+                     'int': (pa.types.is_integer,), 'float': (pa.types.is_floating,), 'bool': (pa.types.is_boolean,),
+                     'list': (pa.types.is_list, pa.types.is_large_list)}
+            if not all(isinstance(t, ast.Name) and t.id in check for t in types):
+                raise ValueError(f"isinstance only supports the types {list(check.keys())}")
+
+            def _isinstance(v):
+                a = target(v)
+                a_type = a.type.value_type if pa.types.is_dictionary(a.type) else a.type
+                if any(f(a_type) for t in types for f in check[t.id]):
+                    return pc.is_valid(a)
+                return pa.repeat(pa.scalar(False), len(a))
+            return _isinstance
+        params = [Expression._build(n, name) for n in args]
+        if func_name in Expression._NUMERIC and len(params) == 1:
+            return lambda v: Expression._numeric(Expression._NUMERIC[func_name], params[0](v))
+        if func_name == 'round' and len(params) in [1, 2]:
+            digits = Expression._literal(args[1]) if len(args) == 2 else 0
+            return lambda v: pc.round(params[0](v), digits)
+        if func_name in ['min', 'max'] and len(params) >= 2:
+            func = pc.min_element_wise if func_name == 'min' else pc.max_element_wise
+            return lambda v: func(*[p(v) for p in params], skip_nulls=False)
+        if func_name == 'clip' and len(params) == 3:
+            return lambda v: pc.min_element_wise(pc.max_element_wise(params[0](v), params[1](v), skip_nulls=False),
+                                                 params[2](v), skip_nulls=False)
+        if func_name == 'len' and len(params) == 1:
+            return lambda v: Expression._length(params[0](v))
+        if func_name in ['str', 'int', 'float', 'bool'] and len(params) == 1:
+            return lambda v: Expression._astype(params[0](v), func_name)
+        if func_name in ['is_null', 'is_valid'] and len(params) == 1:
+            return lambda v: getattr(pc, func_name)(params[0](v))
+        if func_name == 'fill_null' and len(params) == 2:
+            return lambda v: pc.fill_null(params[0](v), params[1](v))
+        raise ValueError(f"The function '{func_name}' with {len(params)} arguments is not supported")
+
+    @staticmethod
+    def _method(node: ast.Call, name: str) -> Callable:
+        """private method compiling a whitelisted method call on a value or on its str accessor"""
+        attr = node.func
+        method = attr.attr
+        is_str = isinstance(attr.value, ast.Attribute) and attr.value.attr == 'str'
+        target = Expression._build(attr.value.value if is_str else attr.value, name)
+        args = [Expression._literal(n) for n in node.args if not isinstance(n, ast.Lambda)]
+        kwargs = {k.arg: Expression._literal(k.value) for k in node.keywords}
+        if is_str:
+            func = Expression._str_method(method, args, kwargs)
+            return lambda v: func(target(v))
+        if method == 'apply':
+            if len(node.args) != 1 or not isinstance(node.args[0], ast.Lambda):
+                raise ValueError("apply only supports a single lambda argument")
+            arg_name, body = Expression._lambda(node.args[0])
+            func = Expression._build(body, arg_name)
+            return lambda v: func(target(v))
+        func = Expression._value_method(method, args, kwargs)
+        return lambda v: func(target(v))
+
+    @staticmethod
+    def _value_method(method: str, args: list, kwargs: dict) -> Callable:
+        """private method returning a compiled pandas style value method"""
+        if method == 'astype':
+            return lambda a: Expression._astype(a, (args or [kwargs.get('dtype')])[0])
+        if method == 'fillna':
+            value = (args or [kwargs.get('value')])[0]
+            return lambda a: pc.fill_null(a, value)
+        if method == 'round':
+            digits = (args or [kwargs.get('decimals', 0)])[0]
+            return lambda a: pc.round(a, digits)
+        if method == 'abs':
+            return lambda a: pc.abs(a)
+        if method == 'clip':
+            lower = args[0] if len(args) > 0 else kwargs.get('lower')
+            upper = args[1] if len(args) > 1 else kwargs.get('upper')
+
+            def _clip(a):
+                a = pc.max_element_wise(a, lower, skip_nulls=False) if lower is not None else a
+                return pc.min_element_wise(a, upper, skip_nulls=False) if upper is not None else a
+            return _clip
+        if method in ['isna', 'isnull']:
+            return lambda a: pc.is_null(a, nan_is_null=True)
+        if method in ['notna', 'notnull']:
+            return lambda a: pc.invert(pc.is_null(a, nan_is_null=True))
+        if method == 'between' and len(args) == 2:
+            return lambda a: pc.and_kleene(pc.greater_equal(a, args[0]), pc.less_equal(a, args[1]))
+        if method == 'map' and len(args) == 1 and isinstance(args[0], dict):
+            keys, values = list(args[0].keys()), list(args[0].values())
+
+            def _map(a):
+                idx = pc.index_in(a, value_set=pa.array(keys))
+                return pa.array(values).take(idx)
+            return _map
+        if method == 'replace' and len(args) == 2:
+            return lambda a: Expression._if_else(pc.equal(a, args[0]), args[1], a)
+        if method == 'cumsum':
+            return lambda a: pc.cumulative_sum(a, skip_nulls=True)
+        raise ValueError(f"The method '{method}' is not supported")
+
+    @staticmethod
+    def _str_method(method: str, args: list, kwargs: dict) -> Callable:
+        """private method returning a compiled pandas style str accessor method"""
+        simple = {'lower': 'utf8_lower', 'upper': 'utf8_upper', 'title': 'utf8_title',
+                  'capitalize': 'utf8_capitalize', 'len': 'utf8_length', 'swapcase': 'utf8_swapcase'}
+        if method in simple:
+            return getattr(pc, simple[method])
+        if method in ['strip', 'lstrip', 'rstrip']:
+            side = {'strip': 'utf8_trim', 'lstrip': 'utf8_ltrim', 'rstrip': 'utf8_rtrim'}[method]
+            chars = (args or [kwargs.get('to_strip')])[0]
+            if chars is None:
+                return getattr(pc, f"{side}_whitespace")
+            return lambda a: getattr(pc, side)(a, characters=chars)
+        if method in ['startswith', 'endswith']:
+            func = pc.starts_with if method == 'startswith' else pc.ends_with
+            return lambda a: func(a, pattern=args[0])
+        if method == 'contains':
+            pattern = (args or [kwargs.get('pat')])[0]
+            regex = kwargs.get('regex', True)
+            ignore_case = not kwargs.get('case', True)
+            func = pc.match_substring_regex if regex else pc.match_substring
+            return lambda a: func(a, pattern=pattern, ignore_case=ignore_case)
+        if method == 'replace':
+            pattern, replacement = args[0], args[1]
+            func = pc.replace_substring_regex if kwargs.get('regex', False) else pc.replace_substring
+            return lambda a: func(a, pattern=pattern, replacement=replacement)
+        if method == 'extract':
+            pattern = Expression._named_groups((args or [kwargs.get('pat')])[0])
+
+            def _extract(a):
+                result = pc.extract_regex(a, pattern=pattern)
+                return pc.struct_field(result, [0])
+            return _extract
+        if method == 'slice':
+            start = args[0] if len(args) > 0 else kwargs.get('start', 0)
+            stop = args[1] if len(args) > 1 else kwargs.get('stop')
+            stop = stop if isinstance(stop, int) else np.iinfo(np.int64).max
+            step = args[2] if len(args) > 2 else kwargs.get('step', 1)
+            return lambda a: pc.utf8_slice_codeunits(a, start or 0, stop, step or 1)
+        if method == 'split':
+            pattern = (args or [kwargs.get('pat', ' ')])[0]
+            return lambda a: pc.split_pattern(a, pattern=pattern if pattern is not None else ' ')
+        if method in ['pad', 'zfill']:
+            width = args[0] if len(args) > 0 else kwargs.get('width')
+            if method == 'zfill':
+                return lambda a: pc.utf8_lpad(a, width=width, padding='0')
+            side = kwargs.get('side', args[1] if len(args) > 1 else 'left')
+            fill = kwargs.get('fillchar', args[2] if len(args) > 2 else ' ')
+            func = {'left': pc.utf8_lpad, 'right': pc.utf8_rpad, 'both': pc.utf8_center}[side]
+            return lambda a: func(a, width=width, padding=fill)
+        if method == 'decode':
+            def _decode(a):
+                if pa.types.is_binary(a.type) or pa.types.is_large_binary(a.type):
+                    return a.cast(pa.string())
+                return a
+            return _decode
+        raise ValueError(f"The str method '{method}' is not supported")
+
+    @staticmethod
+    def _named_groups(pattern: str) -> str:
+        """private method naming the unnamed capture groups of a regex as required by extract_regex"""
+        count = iter(range(1000))
+        return re.sub(r'(?<!\\)\((?!\?)', lambda m: f"(?P<g{next(count)}>", pattern)
+
+    @staticmethod
+    def _numeric(func_name: str, a: Any) -> pa.Array:
+        """private method applying a numeric compute function, falling back to the numpy ufunc"""
+        if hasattr(pc, func_name):
+            if func_name not in ['abs', 'sign', 'floor', 'ceil', 'trunc']:
+                a = Expression._as_float(a)
+            return getattr(pc, func_name)(a)
+        return Expression._ufunc(getattr(np, func_name), a)
+
+    @staticmethod
+    def _ufunc(func: np.ufunc, *args) -> pa.Array:
+        """private method applying a numpy ufunc to arrays or scalars, preserving the nulls"""
+        mask = None
+        values = []
+        for a in args:
+            if isinstance(a, (pa.Array, pa.ChunkedArray)):
+                is_null = a.is_null().to_numpy(zero_copy_only=False)
+                mask = is_null if mask is None else mask | is_null
+                a = a.cast(pa.float64()).to_numpy(zero_copy_only=False)
+            elif isinstance(a, pa.Scalar):
+                a = a.as_py()
+            values.append(a)
+        result = func(*values)
+        return pa.array(result, mask=mask)
+
+    @staticmethod
+    def _astype(a: Any, dtype: str) -> pa.Array:
+        """private method casting to a named type"""
+        if dtype == 'category':
+            return pc.dictionary_encode(a)
+        if dtype not in Expression._TYPES:
+            raise ValueError(f"The type '{dtype}' is not supported, use one of {list(Expression._TYPES.keys())}")
+        if pa.types.is_dictionary(a.type):
+            a = a.cast(a.type.value_type)
+        return a.cast(Expression._TYPES[dtype])
+
+    @staticmethod
+    def _length(a: Any) -> pa.Array:
+        """private method returning the length of a string or list"""
+        if pa.types.is_list(a.type) or pa.types.is_large_list(a.type):
+            return pc.list_value_length(a)
+        return pc.utf8_length(a)
+
+    @staticmethod
+    def _if_else(cond: Any, a: Any, b: Any) -> pa.Array:
+        """private method of a conditional where either value can be None"""
+        if a is None and b is None:
+            return pc.if_else(cond, pa.scalar(None, pa.null()), pa.scalar(None, pa.null()))
+        a_type = a.type if isinstance(a, (pa.Array, pa.Scalar)) else pa.scalar(a).type if a is not None else None
+        b_type = b.type if isinstance(b, (pa.Array, pa.Scalar)) else pa.scalar(b).type if b is not None else None
+        a = pa.scalar(None, b_type) if a is None else a
+        b = pa.scalar(None, a_type) if b is None else b
+        return pc.if_else(cond, a, b)
+
+    @staticmethod
+    def _as_bool(a: Any) -> Any:
+        """private method casting a value to boolean"""
+        if isinstance(a, (pa.Array, pa.ChunkedArray, pa.Scalar)) and not pa.types.is_boolean(a.type):
+            return a.cast(pa.bool_())
+        return a
+
+    @staticmethod
+    def _as_float(a: Any) -> Any:
+        """private method casting integer values to float so division is true division"""
+        if isinstance(a, (pa.Array, pa.ChunkedArray, pa.Scalar)) and pa.types.is_integer(a.type):
+            return a.cast(pa.float64())
+        if isinstance(a, int) and not isinstance(a, bool):
+            return float(a)
+        return a
+
+    @staticmethod
+    def _is_string(a: Any) -> bool:
+        """private method checking if a value is a string type"""
+        if isinstance(a, str):
+            return True
+        if isinstance(a, (pa.Array, pa.ChunkedArray, pa.Scalar)):
+            return pa.types.is_string(a.type) or pa.types.is_large_string(a.type)
+        return False
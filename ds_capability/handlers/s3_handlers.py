@@ -104,6 +104,11 @@ class S3SourceHandler(AbstractSourceHandler):
             self._file_state = state
         return self._changed_flag
 
+    @property
+    def change_state(self):
+        """ the source state last seen by has_changed, or None if the source has no change state """
+        return self._file_state or None
+
     def reset_changed(self, changed: bool = False):
         """ manual reset to say the file has been seen. This is automatically called if the file is loaded"""
         changed = changed if isinstance(changed, bool) else False
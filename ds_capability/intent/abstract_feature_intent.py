@@ -1,3 +1,4 @@
+import os
 import pyarrow as pa
 import pyarrow.compute as pc
 from ds_core.intent.abstract_intent import AbstractIntentModel
@@ -9,6 +10,11 @@ class AbstractFeatureIntentModel(AbstractIntentModel):
     _INTENT_PARAMS = ['self', 'save_intent', 'intent_level', 'intent_order',
                       'replace_intent', 'remove_duplicates', 'seed']
 
+    # remote tables by connector name, held with the connector uri and change state they were loaded at
+    _REMOTE_CACHE = {}
+    # remote tables are whole canonicals so only a few are held
+    _REMOTE_CACHE_LIMIT = 4
+
     def run_intent_pipeline(self, canonical: pa.Table=None, intent_level: [str, int]=None, seed: int=None,
                             simulate: bool=None, **kwargs) -> pa.Table:
         """Collectively runs all parameterised intent taken from the property manager against the code base as
@@ -25,30 +31,37 @@ class AbstractFeatureIntentModel(AbstractIntentModel):
         intent_level = intent_level if isinstance(intent_level, (str, int)) else self._default_intent_level
         col_sim = {"column": [], "order": [], "method": []}
         canonical = self._get_canonical(canonical)
-        size = canonical.shape[0] if isinstance(canonical, pa.Table) else kwargs.pop('size', 1000)
-        # test if there is any intent to run
-        if not self._pm.has_intent(intent_level):
-            raise ValueError(f"intent '{intent_level}' is not in [{self._pm.get_intent()}]")
-        level_key = self._pm.join(self._pm.KEY.intent_key, intent_level)
-        for order in sorted(self._pm.get(level_key, {})):
-            for method, params in self._pm.get(self._pm.join(level_key, order), {}).items():
-                try:
-                    if method in self.__dir__():
-                        if simulate:
-                            col_sim['column'].append(intent_level)
-                            col_sim['order'].append(order)
-                            col_sim['method'].append(method)
-                            continue
-                        params.update(params.pop('kwargs', {}))
-                        params.update({'save_intent': False})
-                        if isinstance(seed, int):
-                            params.update({'seed': seed})
-                        _ = params.pop('intent_creator', 'Unknown')
-                        canonical = eval(f"self.{method}(canonical=canonical, **params)", globals(), locals())
-                except ValueError as ve:
-                    raise ValueError(f"intent '{intent_level}', order '{order}', method '{method}' failed with: {ve}")
-                except TypeError as te:
-                    raise TypeError(f"intent '{intent_level}', order '{order}', method '{method}' failed with: {te}")
+        # decoded columns are cached for the duration of the run
+        self._column_cache = {}
+        try:
+            size = canonical.shape[0] if isinstance(canonical, pa.Table) else kwargs.pop('size', 1000)
+            # test if there is any intent to run
+            if not self._pm.has_intent(intent_level):
+                raise ValueError(f"intent '{intent_level}' is not in [{self._pm.get_intent()}]")
+            level_key = self._pm.join(self._pm.KEY.intent_key, intent_level)
+            for order in sorted(self._pm.get(level_key, {})):
+                for method, params in self._pm.get(self._pm.join(level_key, order), {}).items():
+                    try:
+                        if method in self.__dir__():
+                            if simulate:
+                                col_sim['column'].append(intent_level)
+                                col_sim['order'].append(order)
+                                col_sim['method'].append(method)
+                                continue
+                            params.update(params.pop('kwargs', {}))
+                            params.update({'save_intent': False})
+                            if isinstance(seed, int):
+                                params.update({'seed': seed})
+                            _ = params.pop('intent_creator', 'Unknown')
+                            canonical = eval(f"self.{method}(canonical=canonical, **params)", globals(), locals())
+                    except ValueError as ve:
+                        raise ValueError(f"intent '{intent_level}', order '{order}', method '{method}' failed with: "
+                                         f"{ve}")
+                    except TypeError as te:
+                        raise TypeError(f"intent '{intent_level}', order '{order}', method '{method}' failed with: "
+                                        f"{te}")
+        finally:
+            self._column_cache = None
         if simulate:
             return pa.Table.from_pydict(col_sim)
         return canonical
@@ -57,6 +70,58 @@ class AbstractFeatureIntentModel(AbstractIntentModel):
         PRIVATE METHODS SECTION
     """
 
+    def _decoded_column(self, canonical: pa.Table, header: str) -> pa.Array:
+        """Returns the combined column of a header with any dictionary decoded. Within a pipeline run the decoded
+        column is cached against the column buffers so repeated conditions on an unchanged column decode once.
+        """
+        column = canonical.column(header)
+        if not pa.types.is_dictionary(column.type):
+            return column.combine_chunks()
+        cache = getattr(self, '_column_cache', None)
+        if not isinstance(cache, dict):
+            return column.combine_chunks().dictionary_decode()
+        key = (header, len(column), tuple((c.indices.buffers()[1].address, c.dictionary.buffers()[-1].address)
+                                          for c in column.chunks))
+        if key not in cache:
+            # keep the source column so its buffers, and so the key, stay valid while cached
+            cache[key] = (column, column.combine_chunks().dictionary_decode())
+        return cache[key][1]
+
+    @staticmethod
+    def _condition_expression(header: str, condition: list) -> pc.Expression:
+        """Compiles a condition list of tuples, as used by _extract_mask, into a pyarrow compute Expression on the
+        header field. The tuples follow the same comparison, operator and logic triumvirate.
+        """
+        if isinstance(condition, tuple):
+            condition = [condition]
+        field = pc.field(header)
+        # the Expression & and | are Kleene, so a null either side is kept null to share the null logic of
+        # _extract_mask, and a rule and a condition agree
+        logic_map = {'and': lambda a, b: a & b, 'and_': lambda a, b: a & b, 'or': lambda a, b: a | b,
+                     'or_': lambda a, b: a | b, 'xor': lambda a, b: (a | b) & ~(a & b),
+                     'and_not': lambda a, b: a & ~b}
+
+        def _combine(logic: str, a: pc.Expression, b: pc.Expression) -> pc.Expression:
+            return pc.if_else(a.is_valid() & b.is_valid(), logic_map[logic](a, b), pa.scalar(None, pa.bool_()))
+
+        final_expr = None
+        last_logic = None
+        for (comparison, operator, logic) in condition:
+            if operator in ['greater', 'less', 'greater_equal', 'less_equal', 'equal', 'not_equal',
+                            'match_substring', 'match_substring_regex']:
+                expr = getattr(pc, operator)(field, comparison)
+            elif operator == 'is_in':
+                value_set = comparison if isinstance(comparison, (pa.Array, pa.ChunkedArray)) else pa.array(comparison)
+                expr = field.isin(value_set)
+            elif operator == 'is_null':
+                expr = field.is_null()
+            else:
+                raise ValueError(f"Currently the operator '{operator}' is not implemented.")
+            logic = logic if logic in logic_map.keys() else 'or'
+            final_expr = expr if final_expr is None else _combine(last_logic, final_expr, expr)
+            last_logic = logic
+        return final_expr
+
     @staticmethod
     def _extract_mask(column: pa.Array, condition: list, mask_null: bool=None):
         """Creates a mask of the column based on the condition list of tuples. The condition tuple
@@ -88,7 +153,7 @@ class AbstractFeatureIntentModel(AbstractIntentModel):
                 elif operator == 'equal':
                     c_bool = pc.equal(column, comparison)
                 elif operator == 'not_equal':
-                    c_bool = pc.not_qual(column, comparison)
+                    c_bool = pc.not_equal(column, comparison)
                 elif operator == 'is_in':
                     c_bool = pc.is_in(column, comparison)
                 elif operator == 'is_null':
@@ -128,6 +193,52 @@ class AbstractFeatureIntentModel(AbstractIntentModel):
             return canonical
         raise ValueError(f"The canonical format is not recognised, {type(data)} passed")
 
+    def _get_cached_canonical(self, data: [pa.Table, str]) -> pa.Table:
+        """ as _get_canonical but a table loaded through a connector is held in memory and reused until the
+        connector uri or the change state of its source changes. Connectors without a change state are not cached.
+
+        :param data: a pa.Table or connector name
+        :return: a pa.Table
+        """
+        key = self._canonical_state(data)
+        if key is None:
+            return self._get_canonical(data)
+        cached = AbstractFeatureIntentModel._REMOTE_CACHE.get(data)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        canonical = self._pm.get_connector_handler(data).load_canonical()
+        if len(AbstractFeatureIntentModel._REMOTE_CACHE) >= AbstractFeatureIntentModel._REMOTE_CACHE_LIMIT:
+            AbstractFeatureIntentModel._REMOTE_CACHE.clear()
+        AbstractFeatureIntentModel._REMOTE_CACHE[data] = (key, canonical)
+        return canonical
+
+    def _canonical_state(self, data: [pa.Table, str]) -> [tuple, None]:
+        """ returns the connector uri and the change state of its source as a tuple, or None if data is not a
+        connector name or the connector has no change state. The state is the handler change_state where the
+        handler has one, else the modified time of a local file source.
+
+        :param data: a pa.Table or connector name
+        :return: a tuple or None
+        """
+        if not isinstance(data, str) or not self._pm.has_connector(connector_name=data):
+            return None
+        handler = self._pm.get_connector_handler(data)
+        try:
+            # refreshes the change state of the source
+            handler.has_changed()
+        except (NotImplementedError, ModuleNotFoundError, OSError):
+            return None
+        state = getattr(handler, 'change_state', None)
+        address = handler.connector_contract.address
+        if state is None and isinstance(address, str) and os.path.isfile(address):
+            stat = os.stat(address)
+            # the size guards against a rewrite within the file system timestamp resolution
+            state = (stat.st_mtime_ns, stat.st_size) if stat.st_mtime_ns else None
+        # an empty state, such as a web source with no last modified, is no change state
+        if not state:
+            return None
+        return handler.connector_contract.uri, state
+
     def _intent_builder(self, method: str, params: dict, exclude: list = None) -> dict:
         """builds the intent_params. Pass the method name and local() parameters
             Example:
@@ -1,10 +1,13 @@
 import time
+import hashlib
 from typing import Callable
 
 import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pyarrow.compute as pc
+from scipy import stats
+from sklearn.decomposition import PCA, IncrementalPCA
 from ds_capability.components.commons import Commons
 from ds_core.handlers.abstract_handlers import ConnectorContract
 
@@ -13,6 +16,11 @@ __author__ = 'Darryl Oatridge'
 
 class CommonsIntentModel(object):
 
+    # key indexes by connector name, reused within the process
+    _KEY_INDEX_CACHE = {}
+    # the number of items hashed together by _segment_hash
+    _HASH_CHUNK = 1 << 20
+
     @classmethod
     def __dir__(cls):
         """returns the list of available methods associated with the parameterized intent"""
@@ -65,11 +73,9 @@ class CommonsIntentModel(object):
         size = len(values)
         num_nulls = int(num_nulls * size) if isinstance(num_nulls, float) and 0 <= num_nulls <= 1 else int(num_nulls)
         num_nulls = num_nulls if 0 <= num_nulls < size else size
-        rng = np.random.default_rng(seed)
-        mask = [True] * size
-        mask[:num_nulls] = [False] * num_nulls
-        rng.shuffle(mask)
-        return pc.if_else(mask, values, None)
+        generator = np.random.default_rng(seed)
+        mask = CommonsIntentModel._mask_matrix(size=size, count=num_nulls, generator=generator)[0]
+        return pc.if_else(pa.array(mask), None, values)
 
     def _set_quantity(self, selection, quantity, seed=None):
         """Returns the quantity percent of good values in selection with the rest fill"""
@@ -117,6 +123,1016 @@ class CommonsIntentModel(object):
         UTILITY METHODS SECTION
     """
 
+    @staticmethod
+    def _mask_matrix(size: int, count: int, num_columns: int=None, generator: np.random.Generator=None) -> np.ndarray:
+        """ returns a (num_columns, size) boolean matrix where each row has exactly 'count' randomly placed True values
+
+        :param size: the length of each row
+        :param count: the number of True values in each row
+        :param num_columns: (optional) the number of rows in the matrix. Default to 1
+        :param generator: (optional) a numpy Generator
+        :return: a numpy boolean matrix
+        """
+        num_columns = num_columns if isinstance(num_columns, int) else 1
+        generator = generator if isinstance(generator, np.random.Generator) else np.random.default_rng()
+        mask = np.zeros((num_columns, size), dtype=bool)
+        if count <= 0 or size == 0:
+            return mask
+        if count >= size:
+            mask[:] = True
+            return mask
+        positions = np.argpartition(generator.random((num_columns, size)), count - 1, axis=1)[:, :count]
+        np.put_along_axis(mask, positions, True, axis=1)
+        return mask
+
+    @staticmethod
+    def _dist_matrix(distribution: str, size: int, num_columns: int=None, is_stats: bool=None, precision: int=None,
+                     generator: np.random.Generator=None, **kwargs) -> np.ndarray:
+        """ draws a (num_columns, size) matrix of values in a single vectorised call. Each row is a contiguous
+        column of values. Distribution parameters can be a single value or a list with a value per column.
+
+        :param distribution: the name of the numpy Generator method or the scipy stats distribution
+        :param size: the number of values in each column
+        :param num_columns: (optional) the number of columns. Default to 1
+        :param is_stats: (optional) if the distribution is from the scipy stats package and not numpy
+        :param precision: (optional) the decimal precision of float values. If None no rounding is applied
+        :param generator: (optional) a numpy Generator
+        :param kwargs: the parameters of the distribution
+        :return: a numpy matrix
+        """
+        num_columns = num_columns if isinstance(num_columns, int) else 1
+        generator = generator if isinstance(generator, np.random.Generator) else np.random.default_rng()
+        if num_columns > 1:
+            # per column parameters broadcast against the rows
+            for k, v in kwargs.items():
+                if isinstance(v, (list, tuple, np.ndarray)) and len(v) == num_columns:
+                    kwargs[k] = np.asarray(v).reshape(num_columns, 1)
+        if isinstance(is_stats, bool) and is_stats:
+            if not hasattr(stats, distribution):
+                raise ValueError(f"The distribution '{distribution}' is not a scipy stats distribution")
+            result = getattr(stats, distribution).rvs(size=(num_columns, size), random_state=generator, **kwargs)
+        else:
+            if distribution.startswith('_') or not hasattr(generator, distribution):
+                raise ValueError(f"The distribution '{distribution}' is not a numpy Generator distribution")
+            result = getattr(generator, distribution)(size=(num_columns, size), **kwargs)
+        result = np.ascontiguousarray(result)
+        if isinstance(precision, int) and np.issubdtype(result.dtype, np.floating):
+            np.round(result, precision, out=result)
+        return result
+
+    @staticmethod
+    def _dist_table(values: np.ndarray, names: list, quantity: float=None,
+                    generator: np.random.Generator=None) -> pa.Table:
+        """ builds a table from a (num_columns, size) matrix using each row as a column. Where quantity is less
+        than 1 the same proportion of nulls are randomly placed in each column.
+
+        :param values: a numpy matrix where each row is a column
+        :param names: the column names
+        :param quantity: (optional) a number between 0 and 1 representing data that isn't null
+        :param generator: (optional) a numpy Generator
+        :return: pa.Table
+        """
+        num_columns, size = values.shape
+        num_nulls = int(round(size * (1 - CommonsIntentModel._quantity(quantity)), 0))
+        mask = None
+        if num_nulls > 0:
+            mask = CommonsIntentModel._mask_matrix(size=size, count=num_nulls, num_columns=num_columns,
+                                                   generator=generator)
+        arrays = [pa.array(values[i], mask=None if mask is None else mask[i]) for i in range(num_columns)]
+        return pa.Table.from_arrays(arrays, names=names)
+
+    @staticmethod
+    def _choice_index(size: int, choice: [int, float], seed: int=None) -> [np.ndarray, None]:
+        """ returns a random index of the rows chosen where choice is a count or a percentage between 0 and 1.
+        If all the rows are chosen None is returned"""
+        choice = int(choice * size) if isinstance(choice, float) and 0 <= choice <= 1 else int(choice)
+        choice = choice if 0 <= choice < size else size
+        if choice == size:
+            return None
+        generator = np.random.default_rng(seed=seed)
+        return generator.choice(size, size=choice, replace=False)
+
+    @staticmethod
+    def _list_choice(values: pa.Array, size: int, generator: np.random.Generator) -> pa.ListArray:
+        """ returns a list array of a random choice, with replacement, of size elements from each list. Empty or
+        null lists return an empty list"""
+        values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+        lengths = pc.fill_null(pc.list_value_length(values), 0).to_numpy(zero_copy_only=False).astype(np.int64)
+        starts = values.offsets.to_numpy()[:-1].astype(np.int64)
+        size = size if lengths.sum() > 0 else 0
+        picks = np.repeat(lengths > 0, size)
+        idx = starts[:, None] + np.floor(generator.random((lengths.size, size)) * lengths[:, None]).astype(np.int64)
+        flat = values.values.take(pa.array(idx.ravel()[picks]))
+        offsets = np.concatenate([[0], np.cumsum(np.where(lengths > 0, size, 0))])
+        return pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), flat)
+
+    @staticmethod
+    def _list_median(values: pa.Array) -> pa.Array:
+        """ returns the exact float64 median of each list, the mean of the two middle values where the count is
+        even as with pandas. Nulls within a list are skipped and empty or null lists return null. The lists are
+        sorted in a single pass by list and value"""
+        values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+        parents = pc.list_parent_indices(values)
+        flat = pc.list_flatten(values).cast(pa.float64())
+        keep = pc.is_valid(flat)
+        tbl = pa.table([parents, flat], names=['parent', 'value']).filter(keep)
+        tbl = tbl.take(pc.sort_indices(tbl, sort_keys=[('parent', 'ascending'), ('value', 'ascending')]))
+        sorted_values = tbl.column('value').to_numpy()
+        counts = np.bincount(tbl.column('parent').to_numpy(), minlength=len(values))
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        has_values = counts > 0
+        low = (starts + (counts - 1) // 2)[has_values]
+        high = (starts + counts // 2)[has_values]
+        median = np.zeros(len(values), dtype=np.float64)
+        median[has_values] = (sorted_values[low] + sorted_values[high]) / 2
+        return pa.array(median, mask=~has_values)
+
+    @staticmethod
+    def _row_aggregate(columns: list, action: str, precision: int=None) -> pa.Array:
+        """ aggregates across a list of equal length columns for each row. The actions are 'sum', 'prod',
+        'count', 'min', 'max', 'mean', 'list', 'list_first' and 'list_last'. Nulls are skipped as with pandas.
+        Numeric actions accumulate column by column into a single row buffer so memory is bounded by the row
+        count rather than the number of columns, and lists are assembled with a single take. Integer and boolean
+        columns accumulate in int64 for all but the mean so large totals stay exact."""
+        columns = [c.combine_chunks() if isinstance(c, pa.ChunkedArray) else c for c in columns]
+        columns = [c.dictionary_decode() if pa.types.is_dictionary(c.type) else c for c in columns]
+        if len(columns) == 0:
+            raise ValueError("At least one column is required to aggregate")
+        size = len(columns[0])
+        if action == 'count':
+            count = np.zeros(size, dtype=np.int64)
+            for c in columns:
+                count += pc.is_valid(c).to_numpy(zero_copy_only=False)
+            return pa.array(count)
+        if action.startswith('list'):
+            types = {c.type for c in columns}
+            if len(types) > 1:
+                numeric = all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types)
+                columns = [c.cast(pa.float64() if numeric else pa.string()) for c in columns]
+            if action == 'list_first':
+                return pc.coalesce(*columns)
+            if action == 'list_last':
+                return pc.coalesce(*columns[::-1])
+            if action != 'list':
+                raise ValueError(f"The action '{action}' is not a recognised row aggregation")
+            # row major positions into the column major concatenation of the valid values
+            valid = np.stack([pc.is_valid(c).to_numpy(zero_copy_only=False) for c in columns], axis=1)
+            rows, cols = np.nonzero(valid)
+            values = pa.concat_arrays(columns).take(pa.array(cols * size + rows))
+            offsets = np.concatenate([[0], np.cumsum(valid.sum(axis=1))]).astype(np.int32)
+            return pa.ListArray.from_arrays(pa.array(offsets), values)
+        if action not in ['sum', 'prod', 'min', 'max', 'mean']:
+            raise ValueError(f"The action '{action}' is not a recognised row aggregation")
+        if not all(pa.types.is_integer(c.type) or pa.types.is_floating(c.type) or pa.types.is_boolean(c.type)
+                   for c in columns):
+            raise ValueError(f"The action '{action}' can only be applied to numeric columns")
+        is_int = all(pa.types.is_integer(c.type) or pa.types.is_boolean(c.type) for c in columns)
+        if is_int and action != 'mean':
+            # integers accumulate in int64 so totals beyond the float64 mantissa stay exact
+            fill = {'sum': 0, 'prod': 1, 'min': np.iinfo(np.int64).max, 'max': np.iinfo(np.int64).min}[action]
+            result = np.full(size, fill, dtype=np.int64)
+            count = np.zeros(size, dtype=np.int64)
+            for c in columns:
+                values = c.cast(pa.int64(), safe=False).fill_null(fill).to_numpy(zero_copy_only=False)
+                if action == 'sum':
+                    np.add(result, values, out=result)
+                elif action == 'prod':
+                    np.multiply(result, values, out=result)
+                elif action == 'min':
+                    np.minimum(result, values, out=result)
+                else:
+                    np.maximum(result, values, out=result)
+                count += pc.is_valid(c).to_numpy(zero_copy_only=False) if c.null_count > 0 else 1
+            if action in ['min', 'max']:
+                return pa.array(result, mask=count == 0)
+            return pa.array(result)
+        fill = {'sum': 0.0, 'prod': 1.0, 'mean': 0.0, 'min': np.nan, 'max': np.nan}[action]
+        result = np.full(size, fill, dtype=np.float64)
+        count = np.zeros(size, dtype=np.int64)
+        for c in columns:
+            values = c.cast(pa.float64()).to_numpy(zero_copy_only=False)
+            has_nulls = c.null_count > 0 or (pa.types.is_floating(c.type) and np.isnan(values).any())
+            if action in ['sum', 'mean']:
+                np.add(result, np.nan_to_num(values, nan=0.0) if has_nulls else values, out=result)
+            elif action == 'prod':
+                np.multiply(result, np.nan_to_num(values, nan=1.0) if has_nulls else values, out=result)
+            elif action == 'min':
+                np.fmin(result, values, out=result)
+            else:
+                np.fmax(result, values, out=result)
+            if has_nulls:
+                count += ~np.isnan(values)
+            else:
+                count += 1
+        if action == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = result / count
+        if isinstance(precision, int):
+            result = np.round(result, precision)
+        return pa.array(result, mask=np.isnan(result))
+
+    @staticmethod
+    def _merge_positions(left: pa.Table, right: pa.Table, how: str) -> tuple:
+        """ returns the left and right row positions of a join on the key tables, left and right, of equal width.
+        Only the keys and row positions go through the hash join so any payload type can be taken after. Positions
+        with no match are null and rows follow the left order, or the right order for a right join"""
+        left_keys = [f"__key_{i}" for i in range(left.num_columns)]
+        right_keys = [f"__rkey_{i}" for i in range(right.num_columns)]
+        columns = [c.dictionary_decode() if pa.types.is_dictionary(c.type) else c for c in left.columns]
+        lt = pa.table(columns + [pa.array(np.arange(left.num_rows))], names=left_keys + ['__left'])
+        columns = [c.dictionary_decode() if pa.types.is_dictionary(c.type) else c for c in right.columns]
+        columns = [c.cast(lt.column(i).type) if c.type != lt.column(i).type else c for i, c in enumerate(columns)]
+        rt = pa.table(columns + [pa.array(np.arange(right.num_rows))], names=right_keys + ['__right'])
+        join_type = {'left': 'left outer', 'right': 'right outer', 'outer': 'full outer', 'inner': 'inner'}[how]
+        joined = lt.join(rt, keys=left_keys, right_keys=right_keys, join_type=join_type, coalesce_keys=False)
+        order = ['__right', '__left'] if how == 'right' else ['__left', '__right']
+        joined = joined.select(['__left', '__right']).sort_by([(h, 'ascending') for h in order])
+        return joined.column('__left').combine_chunks(), joined.column('__right').combine_chunks()
+
+    @staticmethod
+    def _key_index(values: pa.Array) -> pa.Table:
+        """ returns a sorted key index of the values as a table of the non-null keys and their row position"""
+        values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+        values = values.dictionary_decode() if pa.types.is_dictionary(values.type) else values
+        order = pc.sort_indices(values, null_placement='at_end')
+        order = order.slice(0, len(values) - values.null_count)
+        return pa.table([values.take(order), order.cast(pa.int64())], names=['key', 'position'])
+
+    @staticmethod
+    def _valid_key_index(values: pa.Array, key_index: pa.Table) -> bool:
+        """ checks the key index is a sorted index of exactly the non-null values, with each position used once and
+        the values at the positions equal to the index keys. The check is a single take and compare, so it is
+        cheaper than rebuilding the index with a sort"""
+        values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+        values = values.dictionary_decode() if pa.types.is_dictionary(values.type) else values
+        if key_index.num_rows != len(values) - values.null_count:
+            return False
+        keys = key_index.column('key').combine_chunks()
+        if keys.type != values.type or keys.null_count > 0:
+            return False
+        positions = key_index.column('position').to_numpy()
+        if positions.size == 0:
+            return True
+        if positions.min() < 0 or positions.max() >= len(values):
+            return False
+        if np.bincount(positions, minlength=len(values)).max() > 1:
+            return False
+        if not values.take(pa.array(positions)).equals(keys):
+            return False
+        return positions.size < 2 or not pc.any(pc.less(keys.slice(1), keys.slice(0, len(keys) - 1))).as_py()
+
+    def _get_key_index(self, connector_name: str, other: pa.Table, key: str) -> pa.Table:
+        """ returns the key index of the other key column, loaded from the named connector if it was built from a
+        table of the same key, row count and sampled key values and still matches the full key column, else built
+        and persisted to the connector"""
+        if not self._pm.has_connector(connector_name=connector_name):
+            raise ValueError(f"The key index connector name '{connector_name}' is not in the connectors catalog")
+        sample = other.column(key).take(np.linspace(0, max(other.num_rows - 1, 0), min(other.num_rows, 1024),
+                                                    dtype=np.int64))
+        fingerprint = hashlib.md5(str(sample.to_pylist()).encode()).hexdigest()
+        signature = f"{key}:{other.num_rows}:{fingerprint}"
+        cached = CommonsIntentModel._KEY_INDEX_CACHE.get(connector_name)
+        if cached is not None and cached[0] == signature and self._valid_key_index(other.column(key), cached[1]):
+            return cached[1]
+        handler = self._pm.get_connector_handler(connector_name)
+        index = None
+        if handler.exists():
+            index = handler.load_canonical()
+            metadata = index.schema.metadata or {}
+            # the signature is a quick check, an edit the sample misses is caught against the full key column
+            if metadata.get(b'key_index', b'').decode() != signature or \
+                    not self._valid_key_index(other.column(key), index):
+                index = None
+        if index is None:
+            index = self._key_index(other.column(key))
+            index = index.replace_schema_metadata({'key_index': signature})
+            handler.persist_canonical(index)
+        CommonsIntentModel._KEY_INDEX_CACHE[connector_name] = (signature, index)
+        return index
+
+    @staticmethod
+    def _key_index_positions(values: pa.Array, key_index: pa.Table, how: str) -> tuple:
+        """ returns the left and right row positions of a left or inner join of the values against a key index
+        by binary search, so no hash table of the right side is built. Keys that are not numeric are looked up
+        Arrow side in the distinct sorted keys, as numpy would compare them as Python objects"""
+        values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+        values = values.dictionary_decode() if pa.types.is_dictionary(values.type) else values
+        keys = key_index.column('key').combine_chunks()
+        values = values.cast(keys.type) if values.type != keys.type else values
+        positions = key_index.column('position').to_numpy()
+        if pa.types.is_integer(keys.type) or pa.types.is_floating(keys.type) or pa.types.is_temporal(keys.type):
+            keys = keys.to_numpy(zero_copy_only=False)
+            is_valid = pc.is_valid(values).to_numpy(zero_copy_only=False)
+            search = values.fill_null(keys[0]) if len(keys) > 0 and values.null_count > 0 else values
+            search = search.to_numpy(zero_copy_only=False)
+            lower = np.searchsorted(keys, search, side='left')
+            counts = np.where(is_valid, np.searchsorted(keys, search, side='right') - lower, 0)
+        else:
+            # the runs of equal keys in the sorted index
+            first = np.ones(len(keys), dtype=bool)
+            if len(keys) > 1:
+                first[1:] = pc.not_equal(keys.slice(1), keys.slice(0, len(keys) - 1)).to_numpy(zero_copy_only=False)
+            run_starts = np.flatnonzero(first)
+            run_counts = np.diff(np.append(run_starts, len(keys)))
+            found = pc.index_in(values, value_set=keys.filter(pa.array(first)))
+            is_valid = found.is_valid().to_numpy(zero_copy_only=False)
+            found = found.fill_null(0).to_numpy(zero_copy_only=False)
+            lower = np.where(is_valid, run_starts[found] if run_starts.size else 0, 0)
+            counts = np.where(is_valid, run_counts[found] if run_counts.size else 0, 0)
+        if how == 'left':
+            repeat = np.maximum(counts, 1)
+        else:
+            repeat = counts
+        left = np.repeat(np.arange(len(values)), repeat)
+        matched = np.repeat(counts > 0, repeat)
+        starts = np.repeat(np.cumsum(repeat) - repeat, repeat)
+        idx = np.arange(left.size) - starts + np.repeat(lower, repeat)
+        right = np.where(matched, positions[np.minimum(idx, max(positions.size - 1, 0))] if positions.size else 0, 0)
+        return pa.array(left), pa.array(right, mask=~matched)
+
+    def _get_fitted(self, connector_name: str, headers: list, fit: Callable) -> pa.Table:
+        """ returns a fitted table of rows keyed by a 'header' column, loaded from the named connector. Headers not
+        yet in the connector are fitted by passing their list to fit, which returns their rows, and the connector
+        persisted again so every run after is encoded with the same fit"""
+        if not self._pm.has_connector(connector_name=connector_name):
+            raise ValueError(f"The fitted connector name '{connector_name}' is not in the connectors catalog")
+        handler = self._pm.get_connector_handler(connector_name)
+        fitted = handler.load_canonical() if handler.exists() else None
+        known = set(pc.unique(fitted.column('header')).to_pylist()) if isinstance(fitted, pa.Table) else set()
+        missing = [h for h in headers if h not in known]
+        if missing:
+            rows = fit(missing)
+            fitted = pa.concat_tables([fitted.cast(rows.schema), rows]) if isinstance(fitted, pa.Table) else rows
+            handler.persist_canonical(fitted)
+        return fitted.filter(pc.is_in(fitted.column('header'), pa.array(headers, pa.string())))
+
+    def _get_vocabulary(self, canonical: pa.Table, headers: list, vocabulary: [str, dict]=None,
+                        ordered: bool=True) -> pa.Table:
+        """ returns the 'header' and 'category' table of each header. A str vocabulary is a fitted connector name
+        passed to _get_fitted, a dict gives the categories of its headers with any others fitted, else every header
+        is fitted from the canonical"""
+        fit = lambda x: self._fit_categories(canonical, x, ordered)
+        if isinstance(vocabulary, str):
+            return self._get_fitted(vocabulary, headers, fit=fit)
+        if isinstance(vocabulary, dict):
+            given = [pa.table([pa.array([h] * len(vocabulary[h]), pa.string()),
+                               self._vocabulary_strings(vocabulary[h])], names=['header', 'category'])
+                     for h in headers if h in vocabulary]
+            return pa.concat_tables(given + [fit([h for h in headers if h not in vocabulary])])
+        return fit(headers)
+
+    @staticmethod
+    def _fit_categories(canonical: pa.Table, headers: list, ordered: bool=True) -> pa.Table:
+        """ returns a 'header' and 'category' table of the distinct values of each header as strings, sorted or,
+        if not ordered, in the order they first appear"""
+        tables = []
+        for header in headers:
+            values = canonical.column(header)
+            values = values.dictionary_decode() if pa.types.is_dictionary(values.type) else values
+            values = pc.unique(values).drop_null()
+            categories = (values.take(pc.sort_indices(values)) if ordered else values).cast(pa.string())
+            tables.append(pa.table([pa.array([header] * len(categories), pa.string()), categories],
+                                   names=['header', 'category']))
+        if not tables:
+            return pa.table([pa.array([], pa.string())] * 2, names=['header', 'category'])
+        return pa.concat_tables(tables)
+
+    @staticmethod
+    def _category_codes(values: pa.Array, categories: pa.Array) -> pa.Array:
+        """ returns the int32 position of each value in categories, null where the value is null or not one of the
+        categories. The lookup runs once over the dictionary of the values and is taken through its indices"""
+        values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+        values = values if pa.types.is_dictionary(values.type) else values.dictionary_encode()
+        dictionary = values.dictionary
+        if dictionary.type != categories.type:
+            dictionary = dictionary.cast(categories.type)
+        positions = pc.index_in(dictionary, value_set=categories)
+        return positions.take(values.indices).cast(pa.int32())
+
+    @staticmethod
+    def _vocabulary_strings(vocabulary: list) -> pa.Array:
+        """ returns a list of categories as the strings _fit_categories casts them to, so a given vocabulary matches
+        the values it is fitted against. Lists Arrow can't type are cast with str"""
+        try:
+            return pa.array(vocabulary).cast(pa.string())
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return pa.array([str(v) for v in vocabulary], pa.string())
+
+    @staticmethod
+    def _category_labels(categories: pa.Array, value_type: pa.DataType) -> list:
+        """ returns the string categories as pandas labels them, cast back to the value type and printed by Python,
+        so a float category is '1.0' and a boolean 'True'. Categories that don't cast back are kept as they are"""
+        value_type = value_type.value_type if pa.types.is_dictionary(value_type) else value_type
+        if pa.types.is_string(value_type) or pa.types.is_large_string(value_type):
+            return categories.to_pylist()
+        try:
+            return [str(v) for v in categories.cast(value_type).to_pylist()]
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return categories.to_pylist()
+
+    @staticmethod
+    def _fit_edges(canonical: pa.Table, headers: list, interval: [int, list], quantiles: bool=False) -> pa.Table:
+        """ returns a 'header' and 'edge' table of the bin edges of each header. An int interval is that many equal
+        width bins across the range or, if quantiles, equal frequency bins. A list interval is the edges themselves
+        or, if quantiles, the quantiles to place the edges at"""
+        tables = []
+        for header in headers:
+            values = canonical.column(header)
+            if quantiles:
+                q = np.linspace(0, 1, interval + 1) if isinstance(interval, int) else interval
+                edges = pc.quantile(values, q=[float(x) for x in q]).to_numpy()
+            elif isinstance(interval, int):
+                lower, upper = pc.min(values).as_py(), pc.max(values).as_py()
+                if lower == upper:
+                    lower, upper = (lower - abs(lower) * 0.001, upper + abs(upper) * 0.001) if lower != 0 else (-0.001, 0.001)
+                edges = np.linspace(lower, upper, interval + 1)
+            else:
+                edges = np.asarray(interval, dtype=np.float64)
+            tables.append(pa.table([pa.array([header] * len(edges), pa.string()), pa.array(edges, pa.float64())],
+                                   names=['header', 'edge']))
+        if not tables:
+            return pa.table([pa.array([], pa.string()), pa.array([], pa.float64())], names=['header', 'edge'])
+        return pa.concat_tables(tables)
+
+    @staticmethod
+    def _activate(column: [pa.Array, pa.ChunkedArray], activation: str, precision: int=None) -> pa.ChunkedArray:
+        """ returns the 'sigmoid', 'tanh' or 'relu' activation of a numeric column, computed chunk by chunk in place
+        on a NumPy copy of the data buffer. The validity bitmap is reused so nulls stay null. Floats keep their
+        width and integers become float64, other than with relu where they stay integers"""
+        column = column if isinstance(column, pa.ChunkedArray) else pa.chunked_array([column])
+        if not (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)):
+            raise ValueError(f"The activation values must be numeric, '{column.type}' was passed")
+        if activation not in ['sigmoid', 'tanh', 'relu']:
+            raise ValueError(f"The activation '{activation}' must be one of 'sigmoid', 'tanh' or 'relu'")
+        out_type = column.type if activation == 'relu' or pa.types.is_floating(column.type) else pa.float64()
+        chunks = []
+        for chunk in column.chunks:
+            if len(chunk) == 0:
+                chunks.append(chunk.cast(out_type))
+                continue
+            values = np.frombuffer(chunk.buffers()[1], dtype=chunk.type.to_pandas_dtype())
+            out = values[:chunk.offset + len(chunk)].astype(out_type.to_pandas_dtype())
+            # the slots under nulls hold any value so their warnings are ignored
+            with np.errstate(all='ignore'):
+                if activation == 'relu':
+                    np.maximum(out, 0, out=out)
+                elif activation == 'sigmoid':
+                    np.negative(out, out=out)
+                    np.exp(out, out=out)
+                    out += 1
+                    np.reciprocal(out, out=out)
+                else:
+                    np.tanh(out, out=out)
+            if isinstance(precision, int) and pa.types.is_floating(out_type):
+                np.round(out, precision, out=out)
+            chunks.append(pa.Array.from_buffers(out_type, len(chunk), [chunk.buffers()[0], pa.py_buffer(out)],
+                                                null_count=chunk.null_count, offset=chunk.offset))
+        return pa.chunked_array(chunks, type=out_type)
+
+    @staticmethod
+    def _sample_keys(size: int, generator: np.random.Generator, weights: np.ndarray=None) -> np.ndarray:
+        """ returns a random key per row where the rows of the k largest keys are a sample of k without replacement.
+        Weighted keys are log(u)/w, the Efraimidis-Spirakis keys, and rows of no or null weight are never drawn"""
+        keys = np.log(generator.random(size))
+        if weights is None:
+            return keys
+        with np.errstate(divide='ignore', invalid='ignore'):
+            keys = keys / weights
+        return np.where(weights > 0, keys, -np.inf)
+
+    @staticmethod
+    def _sample_positions(size: int, k: int, generator: np.random.Generator, weights: np.ndarray=None,
+                          replace: bool=False) -> np.ndarray:
+        """ returns k row positions drawn from size rows, in row order if drawn without replacement, and weighted
+        in proportion to the weights if given. Rows of no, null or negative weight are never drawn, so without
+        replacement k is capped at the rows of positive weight, and with replacement there must be one"""
+        drawable = size
+        if weights is not None:
+            weights = np.nan_to_num(np.clip(weights, 0, None))
+            drawable = int(np.count_nonzero(weights))
+        if replace:
+            if k > 0 and drawable == 0:
+                raise ValueError("The weights have no positive weight to draw rows with replacement from")
+            p = None if weights is None else weights / weights.sum()
+            return generator.choice(size, size=k, replace=True, p=p)
+        k = min(k, drawable)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        keys = CommonsIntentModel._sample_keys(size, generator, weights)
+        return np.sort(np.argpartition(keys, size - k)[size - k:])
+
+    @staticmethod
+    def _reservoir_sample(batches, k: int, generator: np.random.Generator, weights: str=None) -> [pa.Table, None]:
+        """ returns a sample of k rows from a stream of record batches held in the memory of the sample and one
+        batch. Every row gets a random key, weighted by the weights column if given, and the reservoir keeps the
+        rows of the k largest keys in the order they were streamed. Returns None if the stream is empty or k is
+        not positive"""
+        if k <= 0:
+            return None
+        reservoir, keys = None, np.empty(0, dtype=np.float64)
+        for batch in batches:
+            w = None
+            if isinstance(weights, str):
+                w = batch.column(weights).cast(pa.float64()).fill_null(0).to_numpy(zero_copy_only=False)
+            batch_keys = CommonsIntentModel._sample_keys(batch.num_rows, generator, w)
+            # only rows of positive weight, and once full that beat the smallest kept key, can enter
+            beats = batch_keys > (keys.min() if keys.size >= k else -np.inf)
+            if not beats.any():
+                continue
+            if not beats.all():
+                batch, batch_keys = batch.filter(pa.array(beats)), batch_keys[beats]
+            table = pa.Table.from_batches([batch])
+            reservoir = table if reservoir is None else pa.concat_tables([reservoir, table])
+            keys = np.concatenate([keys, batch_keys])
+            if keys.size > k:
+                keep = np.sort(np.argpartition(keys, keys.size - k)[keys.size - k:])
+                reservoir, keys = reservoir.take(keep), keys[keep]
+        return reservoir
+
+    @staticmethod
+    def _stratum_codes(strata: [pa.Array, pa.ChunkedArray], rate: float, rates: dict=None) -> tuple:
+        """ returns the int stratum code of each row, with nulls as their own stratum, and the sampling rate of each
+        stratum, taken from rates by stratum value or, if not there, the rate"""
+        strata = strata.combine_chunks() if isinstance(strata, pa.ChunkedArray) else strata
+        strata = strata if pa.types.is_dictionary(strata.type) else strata.dictionary_encode()
+        labels = strata.dictionary.to_pylist() + [None]
+        codes = strata.indices.fill_null(len(labels) - 1).to_numpy(zero_copy_only=False).astype(np.int64)
+        rates = rates if isinstance(rates, dict) else {}
+        stratum_rates = np.array([rates.get(v, rates.get(str(v), rate)) for v in labels], dtype=np.float64)
+        return codes, np.clip(stratum_rates, 0, 1)
+
+    @staticmethod
+    def _stratified_positions(strata: [pa.Array, pa.ChunkedArray], rate: float, generator: np.random.Generator,
+                              rates: dict=None, weights: np.ndarray=None, replace: bool=False) -> np.ndarray:
+        """ returns the row positions of a stratified sample, in row order, drawing the rate of each stratum's
+        rows and weighted in proportion to the weights if given. Without replacement rows are ordered by stratum
+        then a random key, and each stratum keeps its quota capped at its rows of positive weight. With replacement
+        each stratum's quota is drawn from its own rows"""
+        codes, stratum_rates = CommonsIntentModel._stratum_codes(strata, rate=rate, rates=rates)
+        counts = np.bincount(codes, minlength=stratum_rates.size)
+        quotas = np.round(counts * stratum_rates).astype(np.int64)
+        drawable = counts
+        if weights is not None:
+            weights = np.nan_to_num(np.clip(weights, 0, None))
+            drawable = np.bincount(codes, weights=weights > 0, minlength=stratum_rates.size).astype(np.int64)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        if replace:
+            if np.any((quotas > 0) & (drawable == 0)):
+                raise ValueError("A stratum has no positive weight to draw rows with replacement from")
+            order = np.argsort(codes, kind='stable')
+            positions = []
+            for code in np.flatnonzero(quotas > 0):
+                rows = order[starts[code]:starts[code] + counts[code]]
+                p = None if weights is None else weights[rows] / weights[rows].sum()
+                positions.append(generator.choice(rows, size=quotas[code], replace=True, p=p))
+            return np.sort(np.concatenate(positions)) if positions else np.empty(0, dtype=np.int64)
+        quotas = np.minimum(quotas, drawable)
+        if weights is None:
+            order = np.lexsort((generator.random(codes.size), codes))
+        else:
+            order = np.lexsort((-CommonsIntentModel._sample_keys(codes.size, generator, weights), codes))
+        ranked = codes[order]
+        return np.sort(order[np.arange(codes.size) - starts[ranked] < quotas[ranked]])
+
+    @staticmethod
+    def _noise_screen(column: [pa.Array, pa.ChunkedArray], variance_threshold: float=None,
+                      dominance: bool=False) -> dict:
+        """ returns the null ratio, variance and if the values are constant of a column in one pass over its chunks.
+        Numeric variance is merged chunk by chunk and stops once its lower bound is above the variance threshold,
+        returning that bound. Other values stop at the first chunk that proves them not constant. The share of the
+        most common value is only counted with dominance"""
+        column = column if isinstance(column, pa.ChunkedArray) else pa.chunked_array([column])
+        size = len(column)
+        screen = {'nulls': column.null_count / size if size > 0 else 1.0, 'variance': None, 'constant': True}
+        numeric = pa.types.is_integer(column.type) or pa.types.is_floating(column.type)
+        valid = size - column.null_count
+        count, mean, m2, first = 0, 0.0, 0.0, None
+        for chunk in column.chunks:
+            if chunk.null_count == len(chunk):
+                continue
+            if numeric:
+                values = chunk.drop_null().to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+                values = values[~np.isnan(values)] if pa.types.is_floating(chunk.type) else values
+                if values.size == 0:
+                    continue
+                chunk_mean = values.mean()
+                delta, total = chunk_mean - mean, count + values.size
+                m2 += np.square(values - chunk_mean).sum() + delta ** 2 * count * values.size / total
+                mean += delta * values.size / total
+                count = total
+                # the sum of squares only grows so the variance can be bound from below
+                if isinstance(variance_threshold, float) and m2 / valid > variance_threshold:
+                    screen.update(variance=m2 / valid, constant=False)
+                    break
+                continue
+            chunk = chunk.dictionary_decode() if pa.types.is_dictionary(chunk.type) else chunk
+            try:
+                low, high = pc.min_max(chunk).values()
+            except pa.ArrowNotImplementedError:
+                distinct = pc.unique(chunk).drop_null()
+                low, high = distinct[0], distinct[-1]
+            first = low if first is None else first
+            if low != high or low != first:
+                screen['constant'] = False
+                break
+        else:
+            if numeric and count > 0:
+                screen.update(variance=m2 / count, constant=m2 == 0)
+        if dominance:
+            counts = column.value_counts()
+            counts = counts.filter(counts.field('values').is_valid()).field('counts')
+            screen['dominance'] = pc.max(counts).as_py() / valid if len(counts) > 0 else 1.0
+        return screen
+
+    @staticmethod
+    def _standardised_batches(canonical: pa.Table, headers: list, mean: np.ndarray, scale: np.ndarray,
+                              batch_size: int, min_size: int=1):
+        """ yields the standardised float64 matrix of the headers a row batch at a time from zero-copy slices of
+        the table. A last batch shorter than min_size is folded into the one before"""
+        size = canonical.num_rows
+        starts = list(range(0, size, batch_size))
+        if len(starts) > 1 and size - starts[-1] < min_size:
+            starts.pop()
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else size
+            batch = canonical.slice(start, end - start)
+            values = np.column_stack([batch.column(h).cast(pa.float64()).to_numpy() for h in headers])
+            yield (values - mean) / scale
+
+    @staticmethod
+    def _fit_projection(canonical: pa.Table, headers: list, n_components: [int, float], solver: str=None,
+                        batch_size: int=None, seed: int=None, **kwargs) -> pa.Table:
+        """ returns a fitted principal component projection as a table of a row per header with its 'mean' and
+        'scale', the 'center' of its standardised values and its loading on each component. The 'full' and
+        'randomized' solvers fit a PCA on the standardised matrix, 'incremental' partially fits an IncrementalPCA
+        a row batch at a time. Whitening is folded into the loadings"""
+        batch_size = batch_size if isinstance(batch_size, int) and batch_size > 0 else 100_000
+        columns = [canonical.column(h).cast(pa.float64()) for h in headers]
+        mean = np.array([pc.mean(c).as_py() or 0 for c in columns], dtype=np.float64)
+        scale = np.array([pc.stddev(c).as_py() or 1 for c in columns], dtype=np.float64)
+        if solver == 'incremental':
+            if not isinstance(n_components, int):
+                raise ValueError(f"The incremental solver needs an int n_components, '{n_components}' was passed")
+            model = IncrementalPCA(n_components=n_components, **kwargs)
+            for values in CommonsIntentModel._standardised_batches(canonical, headers, mean, scale, batch_size,
+                                                                   min_size=n_components):
+                model.partial_fit(values)
+        else:
+            if solver == 'randomized':
+                kwargs['svd_solver'] = 'randomized'
+            kwargs.setdefault('random_state', seed)
+            model = PCA(n_components=n_components, **kwargs)
+            model.fit(next(CommonsIntentModel._standardised_batches(canonical, headers, mean, scale,
+                                                                    max(canonical.num_rows, 1))))
+        components = model.components_
+        if getattr(model, 'whiten', False):
+            components = components / np.sqrt(model.explained_variance_)[:, None]
+        gen = Commons.label_gen(prefix='pca_')
+        names = [next(gen) for _ in range(components.shape[0])]
+        return pa.table([pa.array(headers, pa.string()), pa.array(mean), pa.array(scale), pa.array(model.mean_)] +
+                        [pa.array(c) for c in components], names=['header', 'mean', 'scale', 'center'] + names)
+
+    @staticmethod
+    def _projection(canonical: pa.Table, model: pa.Table, batch_size: int=None) -> pa.Table:
+        """ projects the canonical onto the components of a fitted projection a row batch at a time. Each batch is
+        multiplied out component major so every projected column is built zero-copy from a row of the result"""
+        batch_size = batch_size if isinstance(batch_size, int) and batch_size > 0 else 100_000
+        headers = model.column('header').to_pylist()
+        mean, scale, center = [model.column(n).to_numpy() for n in ['mean', 'scale', 'center']]
+        names = model.column_names[4:]
+        components = np.vstack([model.column(n).to_numpy() for n in names])
+        chunks = [components @ (values - center).T for values in
+                  CommonsIntentModel._standardised_batches(canonical, headers, mean, scale, batch_size)]
+        return pa.table([pa.chunked_array([pa.array(c[i]) for c in chunks], pa.float64())
+                         for i in range(len(names))], names=names)
+
+    @staticmethod
+    def _correlation_moments(left: np.ndarray, right: np.ndarray, moments: dict=None) -> dict:
+        """ returns the pairwise complete co-moments of the left and right columns of a float32 row batch, with
+        nulls as NaN, added to the moments of the batches before so the correlation updates as row batches arrive"""
+        valid_left, valid_right = ~np.isnan(left), ~np.isnan(right)
+        x, y = np.where(valid_left, left, 0), np.where(valid_right, right, 0)
+        if valid_left.all() and valid_right.all():
+            shape = (left.shape[1], right.shape[1])
+            update = {'n': np.full(shape, left.shape[0], dtype=np.float64),
+                      'x': np.broadcast_to(x.sum(axis=0, dtype=np.float64)[:, None], shape),
+                      'y': np.broadcast_to(y.sum(axis=0, dtype=np.float64)[None, :], shape),
+                      'xx': np.broadcast_to(np.square(x).sum(axis=0, dtype=np.float64)[:, None], shape),
+                      'yy': np.broadcast_to(np.square(y).sum(axis=0, dtype=np.float64)[None, :], shape)}
+        else:
+            m, n = valid_left.astype(np.float32), valid_right.astype(np.float32)
+            update = {'n': m.T @ n, 'x': x.T @ n, 'y': m.T @ y, 'xx': np.square(x).T @ n, 'yy': m.T @ np.square(y)}
+        update['xy'] = x.T @ y
+        if moments is None:
+            return {k: v.astype(np.float64) for k, v in update.items()}
+        return {k: moments[k] + v for k, v in update.items()}
+
+    @staticmethod
+    def _moments_correlation(moments: dict) -> np.ndarray:
+        """ returns the pearson correlation of accumulated co-moments, zero where a column has no variance """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            n = moments['n']
+            mean_x, mean_y = moments['x'] / n, moments['y'] / n
+            var_x, var_y = moments['xx'] / n - np.square(mean_x), moments['yy'] / n - np.square(mean_y)
+            corr = (moments['xy'] / n - mean_x * mean_y) / np.sqrt(var_x * var_y)
+        return np.nan_to_num(np.clip(corr, -1, 1), nan=0.0)
+
+    @staticmethod
+    def _correlated_pairs(canonical: pa.Table, headers: list, threshold: float, block_size: int=None,
+                          batch_size: int=None, confidence: float=None) -> np.ndarray:
+        """ returns the (later, earlier) header positions of each pair with an absolute correlation above the
+        threshold. Columns are standardised to float32 and correlated a block at a time with matrix products over
+        row batches, keeping only the pairs below the diagonal. With a confidence, pairs are kept if the upper
+        confidence bound of their correlation is above the threshold, for screening on a sample of rows"""
+        block_size = block_size if isinstance(block_size, int) and block_size > 0 else 512
+        batch_size = batch_size if isinstance(batch_size, int) and batch_size > 0 else 65536
+        columns = [canonical.column(h).cast(pa.float64()) for h in headers]
+        shift = np.array([pc.mean(c).as_py() or 0 for c in columns], dtype=np.float64)
+        scale = np.array([pc.stddev(c).as_py() or 1 for c in columns], dtype=np.float64)
+        canonical = pa.table(columns, names=[str(i) for i in range(len(headers))])
+        pairs = []
+        for start in range(0, len(headers), block_size):
+            end = min(start + block_size, len(headers))
+            moments = None
+            for batch in canonical.select(list(range(end))).to_batches(max_chunksize=batch_size):
+                values = np.column_stack([c.to_numpy(zero_copy_only=False) for c in batch.columns])
+                values = ((values - shift[:end]) / scale[:end]).astype(np.float32)
+                moments = CommonsIntentModel._correlation_moments(values[:, start:end], values, moments)
+            if moments is None:
+                break
+            corr = np.abs(CommonsIntentModel._moments_correlation(moments))
+            if isinstance(confidence, float):
+                bound = stats.norm.ppf(1 - (1 - confidence) / 2) / np.sqrt(np.maximum(moments['n'] - 3, 1))
+                corr = np.tanh(np.arctanh(np.minimum(corr, 1 - 1e-7)) + bound)
+            below = np.arange(end)[None, :] < np.arange(start, end)[:, None]
+            later, earlier = np.nonzero((corr > threshold) & below)
+            pairs.append(np.column_stack([later + start, earlier]))
+        return np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+
+    @staticmethod
+    def _aligned_columns(left: pa.Array, right: pa.Array) -> tuple:
+        """ returns the left and right columns decoded and cast to a shared type so they can be compared and
+        hashed alike. Mixed numeric types meet as float64, any other mismatch as string"""
+        left, right = [c.combine_chunks() if isinstance(c, pa.ChunkedArray) else c for c in (left, right)]
+        left, right = [c.dictionary_decode() if pa.types.is_dictionary(c.type) else c for c in (left, right)]
+        if left.type == right.type:
+            return left, right
+        if all(pa.types.is_integer(c.type) or pa.types.is_floating(c.type) for c in (left, right)):
+            return left.cast(pa.float64()), right.cast(pa.float64())
+        return left.cast(pa.string()), right.cast(pa.string())
+
+    @staticmethod
+    def _mix_hash(values: np.ndarray) -> np.ndarray:
+        """ returns the splitmix64 step of a uint64 array, so close values spread across the hash range """
+        values = values + np.uint64(0x9E3779B97F4A7C15)
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+    @staticmethod
+    def _segment_hash(items: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """ returns a uint64 hash of each segment of the items between consecutive offsets, as a polynomial over the
+        items in order and the segment length. The segments are reduced together in chunks of whole rows of about
+        _HASH_CHUNK items, so only a chunk of the items is widened to uint64 at a time"""
+        offsets = offsets.astype(np.int64)
+        lengths = np.diff(offsets)
+        result = CommonsIntentModel._mix_hash(lengths.astype(np.uint64))
+        if lengths.size == 0 or offsets[-1] == offsets[0]:
+            return result
+        powers = np.ones(1, dtype=np.uint64)
+        start = 0
+        while start < lengths.size:
+            # the last row whose items end within the chunk, at least one row
+            end = int(np.searchsorted(offsets, offsets[start] + CommonsIntentModel._HASH_CHUNK, side='right')) - 1
+            end = min(max(end, start + 1), lengths.size)
+            bounds = offsets[start:end + 1] - offsets[start]
+            counts = lengths[start:end]
+            start, first = end, start
+            if bounds[-1] == 0:
+                continue
+            chunk = items[offsets[first]:offsets[end]].astype(np.uint64)
+            if powers.size < counts.max():
+                powers = np.ones(int(counts.max()), dtype=np.uint64)
+                powers[1:] = np.uint64(0x100000001B3)
+                powers = np.cumprod(powers, dtype=np.uint64)
+            owner = np.repeat(np.arange(counts.size), counts)
+            terms = (chunk + np.uint64(1)) * powers[bounds[1:][owner] - 1 - np.arange(chunk.size)]
+            filled = counts > 0
+            sums = np.add.reduceat(terms, bounds[:-1][filled])
+            block = result[first:end]
+            block[filled] = CommonsIntentModel._mix_hash(block[filled] ^ sums)
+        return result
+
+    @staticmethod
+    def _value_hash(values: pa.Array) -> np.ndarray:
+        """ returns a uint64 hash of each value computed from the Arrow buffers. Numeric and temporal values hash on
+        their 64 bit representation, strings and binaries on their bytes, lists on their element hashes and structs
+        on their field hashes. Dictionaries hash their dictionary once and take by the indices, and all nulls share
+        the one hash"""
+        values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+        null_hash = np.uint64(0x9E3779B97F4A7C15)
+        if pa.types.is_dictionary(values.type):
+            result = CommonsIntentModel._value_hash(values.dictionary)
+            indices = values.indices.fill_null(0).to_numpy(zero_copy_only=False).astype(np.int64)
+            result = result[indices] if result.size else np.full(len(values), null_hash, dtype=np.uint64)
+            return np.where(pc.is_valid(values).to_numpy(zero_copy_only=False), result, null_hash)
+        if pa.types.is_decimal(values.type):
+            values = values.cast(pa.string())
+        elif pa.types.is_fixed_size_binary(values.type):
+            values = values.cast(pa.binary())
+        if pa.types.is_date32(values.type) or pa.types.is_time32(values.type):
+            values = values.cast(pa.int32())
+        if pa.types.is_temporal(values.type):
+            values = values.cast(pa.int64())
+        if pa.types.is_boolean(values.type):
+            values = values.cast(pa.int64())
+        if len(values) == 0 or values.null_count == len(values):
+            return np.full(len(values), null_hash, dtype=np.uint64)
+        if pa.types.is_integer(values.type):
+            bits = values.cast(pa.int64(), safe=False).fill_null(0).to_numpy().view(np.uint64)
+            result = CommonsIntentModel._mix_hash(bits)
+        elif pa.types.is_floating(values.type):
+            floats = values.cast(pa.float64()).fill_null(0).to_numpy()
+            # equal values share a hash, so negative zero and every nan are made one
+            floats = np.where(np.isnan(floats), np.nan, floats + 0.0)
+            result = CommonsIntentModel._mix_hash(floats.view(np.uint64))
+        elif pa.types.is_string(values.type) or pa.types.is_large_string(values.type) or \
+                pa.types.is_binary(values.type) or pa.types.is_large_binary(values.type):
+            width = np.int64 if pa.types.is_large_string(values.type) or pa.types.is_large_binary(values.type) \
+                else np.int32
+            offsets = np.frombuffer(values.buffers()[1], dtype=width)[values.offset:values.offset + len(values) + 1]
+            data = values.buffers()[2]
+            data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(0, dtype=np.uint8)
+            result = CommonsIntentModel._segment_hash(data, offsets)
+        elif pa.types.is_list(values.type) or pa.types.is_large_list(values.type) or pa.types.is_map(values.type):
+            child = CommonsIntentModel._value_hash(values.values)
+            result = CommonsIntentModel._segment_hash(child, values.offsets.to_numpy())
+        elif pa.types.is_fixed_size_list(values.type):
+            child = CommonsIntentModel._value_hash(values.flatten())
+            offsets = np.arange(len(values) + 1, dtype=np.int64) * values.type.list_size
+            result = CommonsIntentModel._segment_hash(child, offsets)
+        elif pa.types.is_struct(values.type):
+            result = np.full(len(values), np.uint64(values.type.num_fields), dtype=np.uint64)
+            for field in values.flatten():
+                result = CommonsIntentModel._mix_hash(result * np.uint64(0x100000001B3) ^
+                                                      CommonsIntentModel._value_hash(field))
+        else:
+            raise ValueError(f"The values of type '{values.type}' can not be hashed")
+        if values.null_count > 0:
+            result = np.where(pc.is_valid(values).to_numpy(zero_copy_only=False), result, null_hash)
+        return result
+
+    @staticmethod
+    def _row_fingerprint(columns: list, size: int) -> np.ndarray:
+        """ returns a uint64 fingerprint of each row of the columns, combining the value hashes column by
+        column so no row is materialised"""
+        fingerprint = np.full(size, 0xCBF29CE484222325, dtype=np.uint64)
+        for column in columns:
+            fingerprint = (fingerprint ^ CommonsIntentModel._value_hash(column)) * np.uint64(0x100000001B3)
+        return fingerprint
+
+    def _get_fingerprints(self, connector_name: str, other: [pa.Table, str], keys: pa.Table, columns: list,
+                          headers: list) -> np.ndarray:
+        """ returns the row fingerprints of the other columns, loaded from the named connector if they were built
+        from the same source state and column types, else built and persisted to the connector with the keys"""
+        if not self._pm.has_connector(connector_name=connector_name):
+            raise ValueError(f"The fingerprint connector name '{connector_name}' is not in the connectors catalog")
+        state = self._canonical_state(other)
+        signature = None
+        if state is not None:
+            types = ','.join(f"{h}:{c.type}" for h, c in zip(headers, columns))
+            signature = f"{state[0]}:{state[1]}:{keys.num_rows}:{types}"
+        handler = self._pm.get_connector_handler(connector_name)
+        if signature is not None and handler.exists():
+            stored = handler.load_canonical()
+            metadata = stored.schema.metadata or {}
+            if metadata.get(b'fingerprint', b'').decode() == signature and stored.num_rows == keys.num_rows:
+                return stored.column('fingerprint').to_numpy()
+        fingerprint = self._row_fingerprint(columns, keys.num_rows)
+        stored = keys.append_column('fingerprint', pa.array(fingerprint))
+        handler.persist_canonical(stored.replace_schema_metadata({'fingerprint': signature or ''}))
+        return fingerprint
+
+    @staticmethod
+    def _to_timestamp(values: pa.Array, day_first: bool=None, year_first: bool=None, date_format: str=None) -> pa.Array:
+        """ returns the values as a timestamp array. String dates are parsed by the Arrow kernels with the date_format
+        or else a format detected from a sample of the values. Values the format doesn't parse, strings of no known
+        format, and other types, are parsed through pandas with unparsable values becoming null"""
+        values = values.combine_chunks() if isinstance(values, pa.ChunkedArray) else values
+        values = values.dictionary_decode() if pa.types.is_dictionary(values.type) else values
+        if pa.types.is_timestamp(values.type):
+            return values
+        if pa.types.is_date(values.type):
+            return values.cast(pa.timestamp('us'))
+        if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+            if not isinstance(date_format, str):
+                date_format = CommonsIntentModel._date_format(values, day_first, year_first)
+            if date_format == 'ISO8601':
+                try:
+                    return values.cast(pa.timestamp('us'))
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    pass
+            elif isinstance(date_format, str):
+                result = pc.strptime(values, format=date_format, unit='us', error_is_null=True)
+                if result.null_count == values.null_count:
+                    return result
+                # values the format doesn't parse are parsed one by one through pandas
+                residual = pc.if_else(pc.is_null(result), values, pa.nulls(len(values), values.type))
+                residual = pd.to_datetime(residual.to_pandas(), errors='coerce', format='mixed',
+                                          dayfirst=bool(day_first), yearfirst=bool(year_first))
+                if residual.dt.tz is not None:
+                    residual = residual.dt.tz_convert('UTC' if result.type.tz else None)
+                    residual = residual if result.type.tz else residual.dt.tz_localize(None)
+                elif result.type.tz:
+                    residual = residual.dt.tz_localize('UTC')
+                return pc.coalesce(result, pa.array(residual, from_pandas=True).cast(result.type))
+        values = pd.to_datetime(values.to_pandas(), errors='coerce', dayfirst=bool(day_first),
+                                yearfirst=bool(year_first))
+        return pa.array(values, from_pandas=True)
+
+    @staticmethod
+    def _date_format(values: pa.Array, day_first: bool=None, year_first: bool=None) -> [str, None]:
+        """ returns the format that parses most of a strided sample of the string dates, the first of any tie, or
+        None if none parse. 'ISO8601' denotes the dates cast directly"""
+        values = values.drop_null()
+        if len(values) == 0:
+            return None
+        sample = values.take(np.unique(np.linspace(0, len(values) - 1, min(len(values), 64), dtype=np.int64)))
+        ymd = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%d %H:%M:%S%z', '%Y-%m-%d %H:%M', '%Y/%m/%d %H:%M:%S',
+               '%Y/%m/%d %H:%M', '%Y/%m/%d', '%Y%m%d']
+        dmy = ['%d-%m-%Y %H:%M:%S', '%d-%m-%Y %H:%M', '%d-%m-%Y', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y',
+               '%d.%m.%Y', '%d/%m/%y']
+        mdy = ['%m-%d-%Y %H:%M:%S', '%m-%d-%Y %H:%M', '%m-%d-%Y', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M', '%m/%d/%Y',
+               '%m.%d.%Y', '%m/%d/%y']
+        text = ['%d %b %Y', '%d %B %Y', '%b %d %Y', '%B %d %Y', '%d-%b-%Y', '%d %b %Y %H:%M:%S']
+        formats = (['%y/%m/%d', '%y-%m-%d'] if year_first else []) + ymd + (dmy + mdy if day_first else mdy + dmy) + text
+        result = None
+        try:
+            sample.cast(pa.timestamp('us'))
+            result = 'ISO8601'
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            best = 0
+            for date_format in formats:
+                parsed = len(sample) - pc.strptime(sample, format=date_format, unit='us', error_is_null=True).null_count
+                if parsed > best:
+                    result, best = date_format, parsed
+                if best == len(sample):
+                    break
+        return result
+
+    @staticmethod
+    def _duration_factor(units: str) -> float:
+        """ returns the number of microseconds in a unit of 'Y', 'M', 'W', 'D', 'h', 'm', 's', 'ms' or 'us', where
+        a year and month are the average Gregorian lengths as numpy has them"""
+        factors = {'Y': 31556952e6, 'M': 2629746e6, 'W': 604800e6, 'D': 86400e6, 'h': 3600e6, 'm': 60e6, 's': 1e6,
+                   'ms': 1e3, 'us': 1.0}
+        if units not in factors:
+            raise ValueError(f"The units '{units}' is not recognised. Use one of {list(factors.keys())}")
+        return factors[units]
+
+    @staticmethod
+    def _date_offset(values: np.ndarray, offset: dict) -> np.ndarray:
+        """ applies a DateOffset style offset to a datetime64[us] array without leaving numpy. Plural keys are added
+        to the date and singular keys replace the date element, with the replacement applied first. Where a month
+        arithmetic lands beyond the month end the day is clipped to the last day of the month.
+
+        :param values: a numpy datetime64[us] array
+        :param offset: a dict of units 'years', 'months', 'weeks', 'days', 'hours', 'minutes', 'seconds' or singular
+        :return: a numpy datetime64[us] array
+        """
+        values = values.astype('datetime64[us]')
+        day_part = values.astype('datetime64[D]')
+        month_part = values.astype('datetime64[M]')
+        time_part = (values - day_part).astype(np.int64)
+        month_index = month_part.astype(np.int64)
+        day = (day_part - month_part.astype('datetime64[D]')).astype(np.int64) + 1
+        # replace elements
+        if 'year' in offset:
+            month_index = (int(offset['year']) - 1970) * 12 + month_index % 12
+        if 'month' in offset:
+            month_index = month_index - month_index % 12 + int(offset['month']) - 1
+        if 'day' in offset:
+            day = np.full(day.shape, int(offset['day']), dtype=np.int64)
+        time_units = {'hour': (3_600_000_000, 86_400_000_000), 'minute': (60_000_000, 3_600_000_000),
+                      'second': (1_000_000, 60_000_000)}
+        for unit, (factor, upper) in time_units.items():
+            if unit in offset:
+                element = (time_part % upper) // factor
+                time_part = time_part + (int(offset[unit]) - element) * factor
+        # add calendar elements
+        month_index = month_index + int(offset.get('years', 0)) * 12 + int(offset.get('months', 0))
+        month_start = month_index.astype('datetime64[M]').astype('datetime64[D]')
+        month_days = ((month_index + 1).astype('datetime64[M]').astype('datetime64[D]') - month_start).astype(np.int64)
+        day = np.minimum(day, month_days)
+        result = month_start + (day - 1).astype('timedelta64[D]') + time_part.astype('timedelta64[us]')
+        # add fixed elements
+        delta = 0
+        for unit, factor in {'weeks': 604_800_000_000, 'days': 86_400_000_000, 'hours': 3_600_000_000,
+                             'minutes': 60_000_000, 'seconds': 1_000_000}.items():
+            delta += int(offset.get(unit, 0)) * factor
+        result = result + np.timedelta64(delta, 'us')
+        return np.where(np.isnat(values), np.datetime64('NaT', 'us'), result)
+
     @staticmethod
     def _freq_dist_size(relative_freq: list, size: int, dist_length: int=None, dist_on: str=None, seed: int=None):
         """ utility method taking a list of relative frequencies and based on size returns the size distribution
@@ -223,16 +1239,112 @@ class CommonsIntentModel(object):
         variance = variance if isinstance(variance, int) else 2
         units_allowed = ['W', 'D', 'h', 'm', 's', 'milli', 'micro']
         units = units if isinstance(units, str) and units in units_allowed else 'D'
-        s_values = column.to_pandas()
-        s_values = generator.choice(s_values, size=size, replace=True, p=probability)
+        column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+        values = Commons.column_date2value(column.take(generator.choice(len(column), size=size, replace=True,
+                                                                        p=probability)))
         jitter = pd.Timedelta(value=variance, unit=units) if isinstance(variance, int) else pd.Timedelta(value=0)
         jitter = int(jitter.to_timedelta64().astype(int) / 10 ** 3)
         _ = generator.normal(loc=0, scale=jitter, size=size)
-        _ = pd.Series(pd.to_timedelta(_, unit='micro'), index=s_values.index)
-        result = s_values.add(_)
+        is_valid = values.is_valid().to_numpy(zero_copy_only=False)
+        result = pa.array(values.fill_null(0).to_numpy() + np.round(_).astype(np.int64), mask=~is_valid)
         if isinstance(ordered, str) and ordered.lower() in ['asc', 'des']:
-            result = result.sort_values(ascending=True if ordered.lower() == 'asc' else False)
-        return pa.TimestampArray.from_pandas(result)
+            order = 'ascending' if ordered.lower() == 'asc' else 'descending'
+            result = result.take(pc.array_sort_indices(result, order=order, null_placement='at_end'))
+        tz = column.type.tz if pa.types.is_timestamp(column.type) else None
+        return Commons.column_value2date(result, dt_tz=tz)
+
+    @staticmethod
+    def _analysis_group(other: pa.Table, size: int, group_by: list, generator: np.random.Generator,
+                        variance: float=None, date_jitter: int=None, date_units: str=None, category_limit: int=None,
+                        offset: [int, float]=None) -> pa.Table:
+        """ builds a synthetic table of size from other where each group of group_by is represented in proportion
+        to its size in other. The group statistics are computed once and every column value is drawn from its own
+        group in a single vectorised pass, with numeric and date values jittered by their group variation.
+
+        :param other: the table to analyse
+        :param size: the size of the synthetic table
+        :param group_by: a list of column names to group by
+        :param generator: a numpy Generator
+        :param variance: (optional) the jitter as a multiple of the group standard deviation. Default 0.4
+        :param date_jitter: (optional) The size of the date jitter. Default to 2
+        :param date_units: (optional) The date units. Options ['W', 'D', 'h', 'm', 's', 'milli', 'micro']
+        :param category_limit: (optional) the most distinct values a string column has to be drawn as a category,
+                    with replacement in proportion to its group frequency, as get_analysis has it. Strings of more
+                    distinct values are drawn from a shuffle of their group, repeating only once it is used up.
+                    Default to 20
+        :param offset: (optional) a value added to the numeric columns that are not grouped by. A float offset
+                    returns an integer column as float
+        :return: pa.Table
+        """
+        variance = variance if isinstance(variance, float) else 0.4
+        category_limit = category_limit if isinstance(category_limit, int) else 20
+        offset = offset if isinstance(offset, (int, float)) else 0
+        date_jitter = date_jitter if isinstance(date_jitter, int) else 2
+        units_map = {'W': 'W', 'D': 'D', 'h': 'h', 'm': 'm', 's': 's', 'milli': 'ms', 'micro': 'us'}
+        date_units = units_map.get(date_units, 'D')
+        numeric = [n for n in other.column_names if n not in group_by and
+                   (pa.types.is_integer(other.column(n).type) or pa.types.is_floating(other.column(n).type))]
+        # group statistics in a single pass
+        tbl = other.append_column('__row__', pa.array(np.arange(other.num_rows, dtype=np.int64)))
+        stats_tbl = tbl.group_by(group_by).aggregate([('__row__', 'list')] + [(n, 'stddev') for n in numeric])
+        rows = stats_tbl.column('__row___list').combine_chunks()
+        group_rows = pc.list_flatten(rows).to_numpy()
+        counts = pc.list_value_length(rows).to_numpy(zero_copy_only=False).astype(np.int64)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        # allocate the output size of each group by largest remainder so the sizes sum to size
+        quota = size * counts / other.num_rows
+        group_size = np.floor(quota).astype(np.int64)
+        remainder = size - group_size.sum()
+        if remainder > 0:
+            group_size[np.argsort(group_size - quota, kind='stable')[:remainder]] += 1
+        out_group = generator.permutation(np.repeat(np.arange(counts.size), group_size))
+        size = out_group.size
+        # the rank of each output row within its group, to walk a shuffle of the group rows
+        order = np.argsort(out_group, kind='stable')
+        rank = np.empty(size, dtype=np.int64)
+        rank[order] = np.arange(size) - np.concatenate([[0], np.cumsum(group_size)[:-1]])[out_group[order]]
+        rtn_arrays = []
+        for name in other.column_names:
+            if name in group_by:
+                rtn_arrays.append(stats_tbl.column(name).take(out_group))
+                continue
+            column = other.column(name).combine_chunks()
+            if pa.types.is_nested(column.type):
+                rtn_arrays.append(pa.nulls(size, type=column.type))
+                continue
+            # each value is drawn from its own group
+            src = group_rows[starts[out_group] + (generator.random(size) * counts[out_group]).astype(np.int64)]
+            values = column.take(src)
+            if name in numeric:
+                std = stats_tbl.column(f"{name}_stddev").fill_null(0).to_numpy()[out_group]
+                jitter = generator.normal(loc=0, scale=1, size=size) * std * variance
+                result = pc.add(values.cast(pa.float64()), pa.array(jitter))
+                if pa.types.is_integer(column.type):
+                    result = pc.round(result, 0).cast(column.type)
+                elif column.null_count < len(column):
+                    result = pc.round(result, Commons.column_precision(column))
+                result = pc.if_else(pc.equal(values, 0), values, result)
+                if offset:
+                    result = result.cast(pa.float64()) if isinstance(offset, float) else result
+                    result = pc.add(result, pa.scalar(offset).cast(result.type))
+                rtn_arrays.append(result)
+            elif pa.types.is_timestamp(column.type) or pa.types.is_date(column.type):
+                unit = column.type.unit if pa.types.is_timestamp(column.type) else 'D'
+                unit = 'ms' if pa.types.is_date64(column.type) else unit
+                scale = np.timedelta64(date_jitter, date_units) / np.timedelta64(1, unit)
+                jitter = np.round(generator.normal(loc=0, scale=scale, size=size), 0).astype(np.int64)
+                int_type = pa.int32() if pa.types.is_date32(column.type) else pa.int64()
+                result = pc.add(values.cast(int_type).cast(pa.int64()), pa.array(jitter))
+                rtn_arrays.append(result.cast(int_type).cast(column.type))
+            elif ((pa.types.is_string(column.type) or pa.types.is_large_string(column.type)) and
+                  pc.count_distinct(column).as_py() > category_limit):
+                owner = np.repeat(np.arange(counts.size), counts)
+                shuffled = group_rows[np.lexsort((generator.random(group_rows.size), owner))]
+                rtn_arrays.append(column.take(shuffled[starts[out_group] + rank % counts[out_group]]))
+            else:
+                # other types are passed through as drawn
+                rtn_arrays.append(values)
+        return pa.table(rtn_arrays, names=other.column_names)
 
 class AnalysisOptions(object):
 
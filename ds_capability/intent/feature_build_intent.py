@@ -1,6 +1,7 @@
 import inspect
-import pandas as pd
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 from ds_capability.components.discovery import DataDiscovery
 from ds_capability.intent.common_intent import CommonsIntentModel
 from ds_capability.intent.abstract_feature_build_intent import AbstractFeatureBuildIntentModel
@@ -15,9 +16,9 @@ class FeatureBuildIntent(AbstractFeatureBuildIntentModel, CommonsIntentModel):
 
     def build_difference(self, canonical: pa.Table, other: [str, pa.Table], on_key: [str, list], drop_zero_sum: bool=None,
                          summary_connector: bool=None, flagged_connector: str=None, detail_connector: str=None,
-                         unmatched_connector: str=None, seed: int=None, save_intent: bool=None,
-                         intent_level: [int, str]=None, intent_order: int=None, replace_intent: bool=None,
-                         remove_duplicates: bool=None) -> pa.Table:
+                         unmatched_connector: str=None, fingerprint_connector: str=None, seed: int=None,
+                         save_intent: bool=None, intent_level: [int, str]=None, intent_order: int=None,
+                         replace_intent: bool=None, remove_duplicates: bool=None) -> pa.Table:
         """returns the difference between two canonicals, joined on a common and unique key.
         The ``on_key`` parameter can be a direct reference to the canonical column header or to an environment
         variable. If the environment variable is used ``on_key`` should be set to ``"${<<YOUR_ENVIRON>>}"`` where
@@ -34,6 +35,11 @@ class FeatureBuildIntent(AbstractFeatureBuildIntentModel, CommonsIntentModel):
         If the ``unmatched connector`` parameter is used, the on_key's that don't match between left and right are
         reported
 
+        Rows are matched on the key and each row of common columns reduced to a fingerprint, so only rows whose
+        fingerprints differ are compared column by column. If the ``fingerprint connector`` parameter is used the
+        other's fingerprints are persisted to the connector and, where the other is a connector whose source has
+        not changed since, reused rather than rebuilt. Nulls compare as equal to nulls.
+
         :param canonical: a pa.Table as the reference table
         :param other: a direct pa.Table or reference to a connector.
         :param on_key: The name of the key that uniquely joins the canonical to others
@@ -42,6 +48,7 @@ class FeatureBuildIntent(AbstractFeatureBuildIntentModel, CommonsIntentModel):
         :param flagged_connector: (optional) a connector name where the differences are flagged
         :param detail_connector: (optional) a connector name where the differences are shown
         :param unmatched_connector: (optional) a connector name where the unmatched keys are shown
+        :param fingerprint_connector: (optional) a connector name where the other's row fingerprints are kept
         :param seed: (optional) this is a placeholder, here for compatibility across methods
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the column name that groups intent to create a column
@@ -63,105 +70,109 @@ class FeatureBuildIntent(AbstractFeatureBuildIntentModel, CommonsIntentModel):
                                    remove_duplicates=remove_duplicates, save_intent=save_intent)
         # intent action
         canonical = self._get_canonical(canonical)
-        other = self._get_canonical(other)
+        source = other
+        other = self._get_cached_canonical(other)
         seed = seed if isinstance(seed, int) else self._seed()
         drop_zero_sum = drop_zero_sum if isinstance(drop_zero_sum, bool) else False
         flagged_connector = self._extract_value(flagged_connector)
         summary_connector = self._extract_value(summary_connector)
         detail_connector = self._extract_value(detail_connector)
         unmatched_connector = self._extract_value(unmatched_connector)
+        fingerprint_connector = self._extract_value(fingerprint_connector)
         on_key = Commons.list_formatter(self._extract_value(on_key))
-        left_diff = Commons.list_diff(canonical.column_names, other.column_names, symmetric=False)
-        right_diff = Commons.list_diff(other.column_names, canonical.column_names, symmetric=False)
-        # drop columns
-        tbl_canonical = canonical.drop_columns(left_diff)
-        tbl_other = other.drop_columns(right_diff)
-        # pandas
-        df_canonical = tbl_canonical.to_pandas()
-        df_other = tbl_other.to_pandas()
-        # sort
-        df_canonical.sort_values(on_key, inplace=True)
-        df_other.sort_values(on_key, inplace=True)
-        df_other = df_other.loc[:, df_canonical.columns.to_list()]
+        for name in [flagged_connector, summary_connector, detail_connector, unmatched_connector]:
+            if isinstance(name, str) and not self._pm.has_connector(name):
+                raise ValueError(f"The connector name {name} has been given but no Connect Contract added")
+        headers = [c for c in canonical.column_names if c in other.column_names and c not in on_key]
+        aligned = [self._aligned_columns(canonical.column(h), other.column(h)) for h in headers]
+        # join the key sorted rows on their positions only
+        left_keys = pa.table([self._decoded_column(canonical, k) for k in on_key], names=on_key)
+        right_keys = pa.table([self._decoded_column(other, k) for k in on_key], names=on_key)
+        sort_keys = [(k, 'ascending') for k in on_key]
+        left_sort = pc.sort_indices(left_keys, sort_keys=sort_keys)
+        right_sort = pc.sort_indices(right_keys, sort_keys=sort_keys)
+        left_pos, right_pos = self._merge_positions(left_keys.take(left_sort), right_keys.take(right_sort), how='outer')
+        matched = pc.and_(left_pos.is_valid(), right_pos.is_valid())
+        left_idx = left_sort.take(left_pos.filter(matched))
+        right_idx = right_sort.take(right_pos.filter(matched))
+        left_only = left_sort.take(left_pos.filter(right_pos.is_null()))
+        right_only = right_sort.take(right_pos.filter(left_pos.is_null()))
+
+        # only rows with a changed fingerprint are compared column by column
+        left_fp = self._row_fingerprint([x.take(left_idx) for x, _ in aligned], len(left_idx))
+        if isinstance(fingerprint_connector, str):
+            right_fp = self._get_fingerprints(fingerprint_connector, source, right_keys, [y for _, y in aligned], headers)
+            right_fp = right_fp[right_idx.to_numpy()]
+        else:
+            right_fp = self._row_fingerprint([y.take(right_idx) for _, y in aligned], len(right_idx))
+        changed = pa.array(np.flatnonzero(left_fp != right_fp))
+        changed_left, changed_right = left_idx.take(changed), right_idx.take(changed)
+        flags, differs = {}, {}
+        for header, (x, y) in zip(headers, aligned):
+            x, y = x.take(changed_left), y.take(changed_right)
+            same = pc.and_(x.is_null(), y.is_null())
+            if pa.types.is_floating(x.type):
+                same = pc.or_(same, pc.fill_null(pc.and_(pc.is_nan(x), pc.is_nan(y)), False))
+            differ = pc.and_not(pc.fill_null(pc.not_equal(x, y), True), same).to_numpy(zero_copy_only=False)
+            flag = np.zeros(len(left_idx), dtype=np.int64)
+            flag[changed.to_numpy()] = differ
+            flags[header], differs[header] = flag, differ
+        # flag the differences
+        keep = headers
+        rows = np.arange(len(left_idx))
+        if drop_zero_sum:
+            keep = [h for h in headers if flags[h].any()]
+            rows = np.flatnonzero(np.any([flags[h] for h in keep], axis=0)) if keep else np.array([], dtype=np.int64)
+        diff_idx = left_idx.take(pa.array(rows, pa.int64()))
+        diff = pa.table([left_keys.column(k).take(diff_idx) for k in on_key] + [pa.array(flags[h][rows]) for h in keep],
+                        names=on_key + keep)
 
         # unmatched report
         if isinstance(unmatched_connector, str):
-            if self._pm.has_connector(unmatched_connector):
-                left_merge = pd.merge(df_canonical, df_other, on=on_key, how='left', suffixes=('', '_y'), indicator=True)
-                left_merge = left_merge[left_merge['_merge'] == 'left_only']
-                left_merge = left_merge[left_merge.columns[~left_merge.columns.str.endswith('_y')]]
-                right_merge = pd.merge(df_canonical, df_other, on=on_key, how='right', suffixes=('_y', ''), indicator=True)
-                right_merge = right_merge[right_merge['_merge'] == 'right_only']
-                right_merge = right_merge[right_merge.columns[~right_merge.columns.str.endswith('_y')]]
-                unmatched = pd.concat([left_merge, right_merge], axis=0, ignore_index=True)
-                unmatched = unmatched.set_index(on_key, drop=True).reset_index(drop=True)
-                unmatched.insert(0, 'found_in', unmatched.pop('_merge'))
-                handler = self._pm.get_connector_handler(unmatched_connector)
-                handler.persist_canonical(pa.Table.from_pandas(unmatched))
-            else:
-                raise ValueError(f"The connector name {unmatched_connector} has been given but no Connect Contract added")
-
-        # remove non-matching rows
-        df = pd.merge(df_canonical, df_other, on=on_key, how='inner', suffixes=('_x', '_y'))
-        df_x = df.filter(regex='(_x$)', axis=1)
-        df_y = df.filter(regex='(_y$)', axis=1)
-        df_x.columns = df_x.columns.str.removesuffix('_x')
-        df_y.columns = df_y.columns.str.removesuffix('_y')
-        # flag the differences
-        diff = df_x.ne(df_y).astype(int)
-        if drop_zero_sum:
-            diff = diff.loc[(diff != 0).any(axis=1),(diff != 0).any(axis=0)]
-        # add back the keys
-        for n in range(len(on_key)):
-            diff.insert(n, on_key[n], df[on_key[n]].iloc[diff.index])
+            names = canonical.column_names + [c for c in other.column_names if c not in canonical.column_names]
+            columns = []
+            for name in names:
+                x = self._decoded_column(canonical, name) if name in canonical.column_names else None
+                y = self._decoded_column(other, name) if name in other.column_names else None
+                if x is not None and y is not None:
+                    x, y = self._aligned_columns(x, y)
+                x = x.take(left_only) if x is not None else pa.nulls(len(left_only), y.type)
+                y = y.take(right_only) if y is not None else pa.nulls(len(right_only), x.type)
+                columns.append(pa.chunked_array([x, y], type=x.type))
+            found_in = pa.array(['left_only'] * len(left_only) + ['right_only'] * len(right_only), pa.string())
+            unmatched = pa.table([found_in] + columns, names=['found_in'] + names)
+            self._pm.get_connector_handler(unmatched_connector).persist_canonical(unmatched)
 
         # detailed report
         if isinstance(detail_connector, str):
-            if self._pm.has_connector(detail_connector):
-                diff_comp = df_x.astype(str).compare(df_y.astype(str)).fillna('-')
-                for n in range(len(on_key)):
-                    diff_comp.insert(n, on_key[n], df[on_key[n]].iloc[diff_comp.index])
-                diff_comp.columns = ['_'.join(col) for col in diff_comp.columns.values]
-                diff_comp.columns = diff_comp.columns.str.replace(r'_self$', '_x', regex=True)
-                diff_comp.columns = diff_comp.columns.str.replace(r'_other$', '_y', regex=True)
-                diff_comp.columns = diff_comp.columns.str.replace(r'_$', '', regex=True)
-                diff_comp = diff_comp.sort_values(on_key)
-                diff_comp = diff_comp.reset_index(drop=True)
-                handler = self._pm.get_connector_handler(detail_connector)
-                handler.persist_canonical(pa.Table.from_pandas(diff_comp))
-            else:
-                raise ValueError(f"The connector name {detail_connector} has been given but no Connect Contract added")
+            changed_headers = [h for h in headers if differs[h].any()]
+            rows = np.flatnonzero(np.any([differs[h] for h in changed_headers], axis=0)) if changed_headers else []
+            rows = pa.array(rows, pa.int64())
+            columns = [left_keys.column(k).take(changed_left.take(rows)) for k in on_key]
+            names = list(on_key)
+            for header, (x, y) in zip(headers, aligned):
+                if header not in changed_headers:
+                    continue
+                differ = pa.array(differs[header]).take(rows)
+                for side, values, idx in [('x', x, changed_left), ('y', y, changed_right)]:
+                    values = values.take(idx.take(rows)).cast(pa.string())
+                    columns.append(pc.if_else(differ, values, '-'))
+                    names.append(f"{header}_{side}")
+            self._pm.get_connector_handler(detail_connector).persist_canonical(pa.table(columns, names=names))
 
         # summary report
         if isinstance(summary_connector, str):
-            if self._pm.has_connector(summary_connector):
-                summary = diff.drop(on_key, axis=1).sum().reset_index()
-                summary.columns = ['Attribute', 'Summary']
-                summary = summary.sort_values(['Attribute'])
-                indicator = pd.merge(df_canonical[on_key], df_other[on_key], on=on_key, how='outer', indicator=True)
-                count = indicator['_merge'].value_counts().to_frame().reset_index().replace('both', 'matching')
-                count.columns = ['Attribute', 'Summary']
-                summary = pd.concat([count, summary], axis=0).reset_index(drop=True)
-                handler = self._pm.get_connector_handler(summary_connector)
-                handler.persist_canonical(pa.Table.from_pandas(summary))
-            else:
-                raise ValueError(f"The connector name {summary_connector} has been given but no Connect Contract added")
+            attributes = sorted(keep)
+            summary = pa.table({'Attribute': ['matching', 'left_only', 'right_only'] + attributes,
+                                'Summary': pa.array([len(left_idx), len(left_only), len(right_only)] +
+                                                    [int(flags[h].sum()) for h in attributes], pa.int64())})
+            self._pm.get_connector_handler(summary_connector).persist_canonical(summary)
 
         # flagged report
         if isinstance(flagged_connector, str):
-            if self._pm.has_connector(flagged_connector):
-                diff = diff.sort_values(on_key)
-                diff = diff.reset_index(drop=True)
-                handler = self._pm.get_connector_handler(flagged_connector)
-                handler.persist_canonical(pa.Table.from_pandas(diff))
-                return canonical
-            raise ValueError(f"The connector name {flagged_connector} has been given but no Connect Contract added")
-
-        if drop_zero_sum:
-            diff = diff.sort_values(on_key)
-            diff = diff.reset_index(drop=True)
-
-        return pa.Table.from_pandas(diff)
+            self._pm.get_connector_handler(flagged_connector).persist_canonical(diff)
+            return canonical
+        return diff
 
     def build_profiling(self, canonical: pa.Table, profiling: str, headers: [str, list]=None, d_types: [str, list]=None,
                         regex: [str, list]=None, drop: bool=None, connector_name: str=None, seed: int=None,
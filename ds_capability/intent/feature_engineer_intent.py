@@ -5,11 +5,13 @@ import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pyarrow.compute as pc
+import pyarrow.dataset as ds
 from ds_capability.components.discovery import DataDiscovery
 from scipy import stats
 from ds_capability.intent.common_intent import CommonsIntentModel
 from ds_capability.intent.abstract_feature_engineer_intent import AbstractFeatureEngineerIntentModel
 from ds_capability.components.commons import Commons
+from ds_capability.components.expression import Expression
 from ds_capability.sample.sample_data import Sample, MappedSample
 
 
@@ -383,7 +385,7 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         until = pd.to_datetime(until, errors='coerce', dayfirst=day_first,
                                yearfirst=year_first)
         if start == until:
-            rtn_list = pd.Series([start] * size)
+            values = pa.array(pd.Series([start] * size), from_pandas=True)
         else:
             dt_tz = pd.Series(start).dt.tz
             _dt_start = Commons.date2value(start, day_first=day_first, year_first=year_first)[0]
@@ -391,20 +393,26 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
             precision = 15
             rtn_tbl = self.get_number(start=_dt_start, stop=_dt_until, relative_freq=relative_freq, at_most=at_most,
                                        ordered=ordered, precision=precision, size=size, seed=seed, save_intent=False)
-            rtn_list = rtn_tbl.columns.pop(0).to_pylist()
-            rtn_list = pd.Series(Commons.value2date(rtn_list, dt_tz=dt_tz))
+            values = Commons.column_value2date(rtn_tbl.column(0), dt_tz=dt_tz)
         if ignore_time:
-            rtn_list = pd.Series(pd.DatetimeIndex(rtn_list).normalize())
+            try:
+                values = pc.floor_temporal(values, unit='day')
+            except pa.ArrowInvalid:
+                # fixed offsets are not in the timezone database so normalise the local day through pandas
+                values = pa.array(values.to_pandas().dt.normalize(), from_pandas=True)
         if ignore_seconds:
-            rtn_list = rtn_list.apply(lambda t: t.replace(second=0, microsecond=0, nanosecond=0))
+            # timezone offsets are whole minutes so the minutes floor on the UTC values
+            naive = values.cast(pa.timestamp(values.type.unit))
+            values = pc.floor_temporal(naive, unit='minute').cast(values.type)
         if as_num:
-            return Commons.date2value(rtn_list)
-        rtn_list = self._set_quantity(rtn_list, quantity=self._quantity(quantity), seed=seed)
-        if isinstance(date_format, str) and len(rtn_list) > 0:
-            rtn_list = rtn_list.dt.strftime(date_format)
-            arr = pc.cast(pa.Array.from_pandas(rtn_list), pa.string())
+            return Commons.date2value(values)
+        if self._quantity(quantity) < 1:
+            mask = pd.isna(self._set_quantity([0] * len(values), quantity=self._quantity(quantity), seed=seed))
+            values = pc.replace_with_mask(values, pa.array(mask), pa.nulls(int(mask.sum()), values.type))
+        if isinstance(date_format, str) and len(values) > 0:
+            arr = Commons.column_strftime(values, date_format=date_format)
         else:
-            arr = pc.cast(pa.TimestampArray.from_pandas(rtn_list), pa.timestamp(time_unit, timezone))
+            arr = pc.cast(values, pa.timestamp(time_unit, timezone))
         to_header = to_header if isinstance(to_header, str) else next(self.label_gen)
         return Commons.table_append(canonical, pa.table([arr], names=[to_header]))
 
@@ -529,11 +537,10 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         seed = self._seed() if seed is None else seed
         precision = precision if isinstance(precision, int) else 3
         generator = np.random.default_rng(seed=seed)
-        rtn_list = list(generator.normal(loc=mean, scale=std, size=size))
-        rtn_list = list(np.around(rtn_list, precision))
-        rtn_list = self._set_quantity(rtn_list, quantity=self._quantity(quantity), seed=seed)
+        values = self._dist_matrix('normal', size=size, precision=precision, generator=generator, loc=mean, scale=std)
         to_header = to_header if isinstance(to_header, str) else next(self.label_gen)
-        return Commons.table_append(canonical, pa.table([pa.NumericArray.from_pandas(rtn_list)], names=[to_header]))
+        rtn_tbl = self._dist_table(values, names=[to_header], quantity=quantity, generator=generator)
+        return Commons.table_append(canonical, rtn_tbl)
 
     def get_dist_binomial(self, number: [int, str, float], canonical: pa.Table=None, size: int=None,
                           num_nulls: [float, int]=None, to_header: str=None, seed: int=None, save_intent: bool=None,
@@ -580,11 +587,8 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         number = self._extract_value(number)
         number = int(number * size) if isinstance(number, float) and 0 <= number <= 1 else int(number)
         number = number if 0 <= number < size else size
-        rtn_list = [0] * size
-        rtn_list[:number] = [1] * number
-        rng = np.random.default_rng(seed)
-        rng.shuffle(rtn_list)
-        rtn_arr = pa.array(list(map(bool, rtn_list)), pa.bool_())
+        generator = np.random.default_rng(seed)
+        rtn_arr = pa.array(self._mask_matrix(size=size, count=number, generator=generator)[0], pa.bool_())
         rtn_arr = self._add_null_mask(rtn_arr, num_nulls=num_nulls, seed=seed)
         to_header = to_header if isinstance(to_header, str) else next(self.label_gen)
         return Commons.table_append(canonical, pa.table([rtn_arr], names=[to_header]))
@@ -625,10 +629,11 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
             raise ValueError("size not set. Size must be an int greater than zero")
         seed = self._seed() if seed is None else seed
         probability = self._extract_value(probability)
-        rtn_list = list(stats.bernoulli.rvs(p=probability, size=size, random_state=seed))
-        rtn_list = self._set_quantity(rtn_list, quantity=self._quantity(quantity), seed=seed)
+        generator = np.random.default_rng(seed=seed)
+        values = self._dist_matrix('bernoulli', size=size, is_stats=True, generator=generator, p=probability)
         to_header = to_header if isinstance(to_header, str) else next(self.label_gen)
-        return Commons.table_append(canonical, pa.table([pa.NumericArray.from_pandas(rtn_list)], names=[to_header]))
+        rtn_tbl = self._dist_table(values, names=[to_header], quantity=quantity, generator=generator)
+        return Commons.table_append(canonical, rtn_tbl)
 
     def get_dist_bounded_normal(self, mean: float, std: float, lower: float, upper: float, canonical: pa.Table=None,
                                 precision: int=None, size: int=None, quantity: float=None, to_header: str=None,  seed: int=None,
@@ -671,11 +676,12 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
             raise ValueError("size not set. Size must be an int greater than zero")
         precision = precision if isinstance(precision, int) else 3
         seed = self._seed() if seed is None else seed
-        rtn_list = stats.truncnorm((lower - mean) / std, (upper - mean) / std, loc=mean, scale=std)
-        rtn_list = rtn_list.rvs(size, random_state=seed).round(precision)
-        rtn_list = self._set_quantity(rtn_list, quantity=self._quantity(quantity), seed=seed)
+        generator = np.random.default_rng(seed=seed)
+        values = self._dist_matrix('truncnorm', size=size, is_stats=True, precision=precision, generator=generator,
+                                   a=(lower - mean) / std, b=(upper - mean) / std, loc=mean, scale=std)
         to_header = to_header if isinstance(to_header, str) else next(self.label_gen)
-        return Commons.table_append(canonical, pa.table([pa.NumericArray.from_pandas(rtn_list)], names=[to_header]))
+        rtn_tbl = self._dist_table(values, names=[to_header], quantity=quantity, generator=generator)
+        return Commons.table_append(canonical, rtn_tbl)
 
     def get_distribution(self, distribution: str, canonical: pa.Table=None, is_stats: bool=None, precision: int=None,
                          size: int=None, quantity: float=None, to_header: str=None,  seed: int=None, save_intent: bool=None,
@@ -718,15 +724,12 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         seed = self._seed() if seed is None else seed
         precision = 3 if precision is None else precision
         is_stats = is_stats if isinstance(is_stats, bool) else False
-        if is_stats:
-            rtn_list = eval(f"stats.{distribution}.rvs(size=size, random_state=_seed, **kwargs)", globals(), locals())
-        else:
-            generator = np.random.default_rng(seed=seed)
-            rtn_list = eval(f"generator.{distribution}(size=size, **kwargs)", globals(), locals())
-        rtn_list = list(np.around(rtn_list, precision))
-        rtn_list = self._set_quantity(rtn_list, quantity=self._quantity(quantity), seed=seed)
+        generator = np.random.default_rng(seed=seed)
+        values = self._dist_matrix(distribution, size=size, is_stats=is_stats, precision=precision,
+                                   generator=generator, **kwargs)
         to_header = to_header if isinstance(to_header, str) else next(self.label_gen)
-        return Commons.table_append(canonical, pa.table([pa.NumericArray.from_pandas(rtn_list)], names=[to_header]))
+        rtn_tbl = self._dist_table(values, names=[to_header], quantity=quantity, generator=generator)
+        return Commons.table_append(canonical, rtn_tbl)
 
     def get_string_pattern(self, pattern: str, canonical: pa.Table=None, choices: dict=None, as_binary: bool=None,
                            quantity: [float, int]=None, size: int=None, choice_only: bool=None, to_header: str=None,  seed: int=None,
@@ -965,7 +968,8 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                 column name and sorting order (“ascending” or “descending”)
 
         :param canonical: (optional) a pa.Table to append the result table to
-        :param category_limit: (optional) a global cap on categories captured. zero value returns no limits
+        :param category_limit: (optional) the most distinct values a string column has to be drawn as a category.
+                    Strings of more are drawn from a shuffle of their group. Default to 20
         :param date_jitter: (optional) The size of the jitter. Default to 2
         :param date_units: (optional) The date units. Options ['W', 'D', 'h', 'm', 's', 'milli', 'micro']. Default 'D'
         :param offset: (optional) an offset value of a numeric column
@@ -989,40 +993,28 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                                    intent_level=intent_level, intent_order=intent_order, replace_intent=replace_intent,
                                    remove_duplicates=remove_duplicates, save_intent=save_intent)
         # Code block for intent
+        canonical = self._get_canonical(canonical)
         other = self._get_canonical(other)
+        size = self._extract_value(size)
         date_jitter = date_jitter if isinstance(date_jitter, int) else 2
         units_allowed = ['W', 'D', 'h', 'm', 's', 'milli', 'micro']
         date_units = date_units if isinstance(date_units, str) and date_units in units_allowed else 'D'
-        offset = offset if isinstance(offset, (int, float)) else 0
         if other is None or other.num_rows == 0:
             raise ValueError(f"The data sample given is None or is empty")
-        # change to pandas
-        df = other.to_pandas()
-        user_groups = df.groupby(group_by).indices
-        rtn_df = pd.DataFrame()
-        size_count = 0
-        itr_count = 0
-        for key in user_groups.keys():
-            itr_count += 1
-            if  itr_count == len(user_groups):
-                sub_size = size - size_count
-            else:
-                p = len(user_groups.get(key, {})) / len(df)
-                sub_size = int(round(size * p, 0))
-                size_count += sub_size
-            # get the synthetic sub set
-            tbl = pa.Table.from_pandas(df.iloc[user_groups.get(key)])
-            result = self.get_analysis(size=sub_size, other=tbl, category_limit=category_limit, date_jitter=date_jitter,
-                                       date_units=date_units, offset=offset, seed=seed, save_intent=False)
-            result = result.to_pandas()
-            rtn_df = pd.concat([rtn_df, result], axis=0, ignore_index=True)
-
-        rtn_df = rtn_df.sample(frac=1).reset_index(drop=True)
-        rtn_tbl = pa.Table.from_pandas(rtn_df)
-        if '__index_level_0__' in rtn_tbl.column_names:
-            rtn_tbl = rtn_tbl.drop_columns('__index_level_0__')
-        if isinstance(sort_by, str) and sort_by in rtn_tbl.columns:
-            rtn_tbl = rtn_tbl.sort_by(sorting=sort_by)
+        if not isinstance(size, int):
+            raise ValueError("size not set. Size must be an int greater than zero")
+        group_by = Commons.list_formatter(group_by)
+        for name in group_by:
+            if name not in other.column_names:
+                raise ValueError(f"The group_by header '{name}' is not in the other table")
+        seed = self._seed(seed=seed)
+        generator = np.random.default_rng(seed)
+        rtn_tbl = self._analysis_group(other, size=size, group_by=group_by, generator=generator,
+                                       date_jitter=date_jitter, date_units=date_units, category_limit=category_limit,
+                                       offset=offset)
+        sort_by = Commons.list_formatter(sort_by)
+        if sort_by and all(x in rtn_tbl.column_names for x in sort_by):
+            rtn_tbl = rtn_tbl.sort_by([(x, 'ascending') for x in sort_by])
         return Commons.table_append(canonical, rtn_tbl)
 
     def get_analysis(self, size: int, other: [str, pa.Table], canonical: [str, pa.Table]=None, category_limit: int=None,
@@ -1178,13 +1170,12 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
             relative_freq=[60, 16, 2, 1, 6, 3], canonical=canonical, size=size, seed=seed,
             to_categorical=category_encode,
             to_header='race', save_intent=False)
-        canonical = self.get_sample_map(canonical=canonical, sample_map='us_persona',
-                                            headers=['first_name', 'family_name', 'gender'],
-                                            female_bias=0.4, size=size, save_intent=False)
-        canonical = self.get_sample_map(canonical=canonical, sample_map='us_zipcodes_detail',
-                                            headers=['city', 'state', 'zipcode'],
-                                            size=size, save_intent=False)
-        return canonical
+        # a single generator shared across the forename, surname and zipcode draws
+        generator = np.random.default_rng(seed=seed)
+        persona = MappedSample._us_persona_names(size=size, female_bias=0.4, seed=generator)
+        canonical = Commons.table_append(canonical, persona.select(['first_name', 'family_name', 'gender']))
+        zipcodes = MappedSample.us_zipcodes_detail(size=size, shuffle=True, seed=generator)
+        return Commons.table_append(canonical, zipcodes.select(['city', 'state', 'zipcode']))
 
     def get_synthetic_data_types(self, size: int, extend: bool=None, prob_nulls: float=None, seed: int=None,
                                  category_encode: bool=None, save_intent: bool=None, intent_level: [int, str]=None,
@@ -1325,16 +1316,14 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         num_columns = num_columns if isinstance(num_columns, int) else 1
         name_prefix = name_prefix if isinstance(name_prefix, str) else ''
         label_gen = Commons.label_gen()
-        rtn_tbl = None
         generator = np.random.default_rng(seed=seed)
-        for _ in range(num_columns):
-            seed = self._seed(seed=seed, increment=True)
-            a = generator.choice(range(1, 6))
-            b = generator.choice(range(1, 6))
-            _ = self.get_distribution(distribution='beta', a=a, b=b, precision=6, size=size, seed=seed,
-                                      to_header=f"{name_prefix}{next(label_gen)}", save_intent=False)
-            rtn_tbl = Commons.table_append(rtn_tbl, _)
-        return Commons.table_append(canonical, rtn_tbl)
+        # all noise columns are drawn together with a per column beta shape
+        a = generator.integers(1, 6, size=num_columns)
+        b = generator.integers(1, 6, size=num_columns)
+        values = self._dist_matrix('beta', size=size, num_columns=num_columns, precision=6, generator=generator,
+                                   a=a, b=b)
+        names = [f"{name_prefix}{next(label_gen)}" for _ in range(num_columns)]
+        return Commons.table_append(canonical, self._dist_table(values, names=names))
 
     def correlate_number(self, canonical: pa.Table, header: str, choice: [int, float, str]=None, choice_header: str=None,
                          to_header: str=None, precision: int=None, jitter: [int, float, str]=None, offset: [int, float, str]=None,
@@ -1387,70 +1376,49 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         if not isinstance(header, str) or header not in canonical.column_names:
             raise ValueError(f"The header '{header}' can't be found in the canonical headers")
         seed = seed if isinstance(seed, int) else self._seed()
-        s_values = canonical.column(header).to_pandas()
-        s_others = s_values.copy()
-        other_size = s_others.size
+        column = canonical.column(header).combine_chunks()
         offset = self._extract_value(offset)
         keep_zero = keep_zero if isinstance(keep_zero, bool) else False
         precision = precision if isinstance(precision, int) else 3
-        lower = lower if isinstance(lower, (int, float)) else float('-inf')
-        upper = upper if isinstance(upper, (int, float)) else float('inf')
         # mark the zeros and nulls
-        null_idx = s_values[s_values.isna()].index
-        zero_idx = s_values.where(s_values == 0).dropna().index if keep_zero else []
+        null_mask = column.is_null().to_numpy(zero_copy_only=False)
+        values = column.cast(pa.float64()).to_numpy(zero_copy_only=False)
+        zero_mask = values == 0
         # choose the items to jitter
+        choice_idx = None
         if isinstance(choice, (str, int, float)):
-            size = s_values.size
-            choice = self._extract_value(choice)
-            choice = int(choice * size) if isinstance(choice, float) and 0 <= choice <= 1 else int(choice)
-            choice = choice if 0 <= choice < size else size
-            gen = np.random.default_rng(seed=seed)
-            choice_idx = gen.choice(s_values.index, size=choice, replace=False)
-            choice_idx = [choice_idx] if isinstance(choice_idx, int) else choice_idx
-            s_values = s_values.iloc[choice_idx]
+            choice_idx = self._choice_index(values.size, choice=self._extract_value(choice), seed=seed)
+        s_values = values.copy() if choice_idx is None else values[choice_idx]
         if isinstance(jitter, (str, int, float)) and s_values.size > 0:
             jitter = self._extract_value(jitter)
-            size = s_values.size
             gen = np.random.default_rng(seed)
-            results = gen.normal(loc=0, scale=jitter, size=size)
-            s_values = s_values.add(results)
+            s_values = s_values + gen.normal(loc=0, scale=jitter, size=s_values.size)
         # set code_str
         if isinstance(code_str, str) and s_values.size > 0:
-            if code_str.startswith('lambda'):
-                s_values = s_values.transform(eval(code_str))
-            else:
-                code_str = code_str.replace("@", 'x')
-                s_values = s_values.transform(lambda x: eval(code_str))
+            s_values = Expression.evaluate(code_str, s_values)
+            s_values = s_values.cast(pa.float64()).to_numpy(zero_copy_only=False)
         # set offset for all values
         if isinstance(offset, (int, float)) and offset != 0 and s_values.size > 0:
-            s_values = s_values.add(offset)
+            s_values = s_values + offset
         # set the changed values
-        if other_size == s_values.size:
-            s_others = s_values
+        if choice_idx is None:
+            values = s_values
         else:
-            s_others.iloc[s_values.index] = s_values
+            values = values.copy()
+            values[choice_idx] = s_values
+        rtn_arr = pa.array(values, pa.float64(), mask=null_mask)
         # max and min caps
-        s_others = pd.Series([upper if x > upper else x for x in s_others])
-        s_others = pd.Series([lower if x < lower else x for x in s_others])
-        if isinstance(keep_zero, bool) and keep_zero:
-            if other_size == zero_idx.size:
-                s_others = 0 * zero_idx.size
-            else:
-                s_others.iloc[zero_idx] = 0
-        if other_size == null_idx.size:
-            s_others = np.nan * null_idx.size
-        else:
-            s_others.iloc[null_idx] = np.nan
-        s_others = s_others.round(precision)
-        if precision == 0 and not s_others.isnull().any():
-            s_others = s_others.astype(int)
-        rtn_list = s_others.to_list()
-        rtn_arr = pa.NumericArray.from_pandas(rtn_list)
-        if rtn_arr.type.equals('double'):
-            try:
-                rtn_arr = pa.array(rtn_arr, pa.int64())
-            except pa.lib.ArrowInvalid:
-                pass
+        if isinstance(upper, (int, float)):
+            rtn_arr = pc.min_element_wise(rtn_arr, pa.scalar(upper, pa.float64()), skip_nulls=False)
+        if isinstance(lower, (int, float)):
+            rtn_arr = pc.max_element_wise(rtn_arr, pa.scalar(lower, pa.float64()), skip_nulls=False)
+        if keep_zero:
+            rtn_arr = pc.if_else(pa.array(zero_mask & ~null_mask), 0.0, rtn_arr)
+        rtn_arr = pc.round(rtn_arr, precision)
+        try:
+            rtn_arr = rtn_arr.cast(pa.int64())
+        except pa.lib.ArrowInvalid:
+            pass
         to_header = to_header if isinstance(to_header, str) else header
         return Commons.table_append(canonical, pa.table([rtn_arr], names=[to_header]))
 
@@ -1511,9 +1479,7 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         if not isinstance(header, str) or header not in canonical.column_names:
             raise ValueError(f"The header '{header}' can't be found in the canonical headers")
         seed = seed if isinstance(seed, int) else self._seed()
-        values = canonical.column(header).to_pandas()
         choice_header = choice_header if isinstance(choice_header, str) and choice_header in canonical.column_names else header
-        others = canonical.column(choice_header).to_pandas()
 
         def _clean(control):
             _unit_type = ['years', 'months', 'weeks', 'days', 'hours', 'minutes', 'seconds',
@@ -1527,6 +1493,16 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                         raise ValueError(f"The key '{k}' in 'offset', is not a recognised unit type for pd.DateOffset")
             return control
 
+        def _to_datetime(column: pa.ChunkedArray) -> pa.Array:
+            # returns a timestamp array, parsing string dates on the Arrow kernels
+            return self._to_timestamp(column, day_first=day_first, year_first=year_first)
+
+        def _to_wall_time(column: pa.Array) -> np.ndarray:
+            # the local wall time as datetime64[us] with NaT as nulls
+            if column.type.tz is not None:
+                column = pc.local_timestamp(column)
+            return column.cast(pa.timestamp('us')).to_numpy(zero_copy_only=False)
+
         seed = self._seed() if seed is None else seed
         ignore_seconds = ignore_seconds if isinstance(ignore_seconds, bool) else False
         ignore_time = ignore_time if isinstance(ignore_time, bool) else False
@@ -1534,83 +1510,73 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         if isinstance(now_delta, str) and now_delta not in ['Y', 'M', 'W', 'D', 'h', 'm', 's']:
             raise ValueError(f"the now_delta offset unit '{now_delta}' is not recognised "
                              f"use of of ['Y', 'M', 'W', 'D', 'h', 'm', 's']")
-        # set minimum date
+        # set minimum and max date
         _min_date = pd.to_datetime(min_date, errors='coerce')
-        if _min_date is None or _min_date is pd.NaT:
-            _min_date = pd.to_datetime(pd.Timestamp.min)
-        # set max date
+        _min_date = None if _min_date is None or _min_date is pd.NaT else _min_date.to_datetime64().astype('datetime64[us]')
         _max_date = pd.to_datetime(max_date, errors='coerce')
-        if _max_date is None or _max_date is pd.NaT:
-            _max_date = pd.to_datetime(pd.Timestamp.max)
-        if _min_date >= _max_date:
+        _max_date = None if _max_date is None or _max_date is pd.NaT else _max_date.to_datetime64().astype('datetime64[us]')
+        if _min_date is not None and _max_date is not None and _min_date >= _max_date:
             raise ValueError(f"the min_date {min_date} must be less than max_date {max_date}")
         # convert values into datetime
-        s_values = pd.Series(pd.to_datetime(values, errors='coerce', dayfirst=day_first, yearfirst=year_first))
-        s_others = pd.Series(pd.to_datetime(others, errors='coerce', dayfirst=day_first, yearfirst=year_first))
-        dt_tz = s_values.dt.tz
+        ts_values = _to_datetime(canonical.column(header))
+        ts_type = ts_values.type
+        s_values = _to_wall_time(ts_values)
+        s_others = s_values if choice_header == header else _to_wall_time(_to_datetime(canonical.column(choice_header)))
         # choose the items to jitter
+        choice_idx = None
         if isinstance(choice, (str, int, float)):
-            size = s_values.size
-            choice = self._extract_value(choice)
-            choice = int(choice * size) if isinstance(choice, float) and 0 <= choice <= 1 else int(choice)
-            choice = choice if 0 <= choice < size else size
-            gen = np.random.default_rng(seed=seed)
-            choice_idx = gen.choice(s_values.index, size=choice, replace=False)
-            choice_idx = [choice_idx] if isinstance(choice_idx, int) else choice_idx
-            s_values = s_values.iloc[choice_idx]
+            choice_idx = self._choice_index(s_values.size, choice=self._extract_value(choice), seed=seed)
+            s_values = s_values[choice_idx] if choice_idx is not None else s_values
         if isinstance(jitter, (str, int)):
             size = s_values.size
             jitter = self._extract_value(jitter)
             jitter_units = self._extract_value(jitter_units)
             units_allowed = ['W', 'D', 'h', 'm', 's', 'milli', 'micro']
             jitter_units = jitter_units if isinstance(jitter_units, str) and jitter_units in units_allowed else 'D'
-            # set jitters to time deltas
+            # set jitters to microseconds
             jitter = pd.Timedelta(value=jitter, unit=jitter_units) if isinstance(jitter, int) else pd.Timedelta(value=0)
             jitter = int(jitter.to_timedelta64().astype(int) / 10 ** 3)
             gen = np.random.default_rng(seed)
-            results = gen.normal(loc=0, scale=jitter, size=size)
-            results = pd.Series(pd.to_timedelta(results, unit='micro'), index=s_values.index)
-            s_values = s_values.add(results)
-        null_idx = s_values[s_values.isna()].index
+            results = np.round(gen.normal(loc=0, scale=jitter, size=size), 0).astype(np.int64)
+            s_values = s_values + results.astype('timedelta64[us]')
         if isinstance(offset, dict) and offset:
-            s_values = s_values.add(pd.DateOffset(**offset))
+            s_values = self._date_offset(s_values, offset)
         # sort max and min
-        if _min_date > pd.to_datetime(pd.Timestamp.min):
-            if _min_date > s_values.min():
-                min_idx = s_values.dropna().where(s_values < _min_date).dropna().index
-                s_values.iloc[min_idx] = _min_date
-            else:
-                raise ValueError(f"The min value {min_date} is greater than the max result value {s_values.max()}")
-        if _max_date < pd.to_datetime(pd.Timestamp.max):
-            if _max_date < s_values.max():
-                max_idx = s_values.dropna().where(s_values > _max_date).dropna().index
-                s_values.iloc[max_idx] = _max_date
-            else:
-                raise ValueError(f"The max value {max_date} is less than the min result value {s_values.min()}")
+        if _min_date is not None:
+            if _min_date > np.nanmax(s_values):
+                raise ValueError(f"The min value {min_date} is greater than the max result value {np.nanmax(s_values)}")
+            s_values = np.where(s_values < _min_date, _min_date, s_values)
+        if _max_date is not None:
+            if _max_date < np.nanmin(s_values):
+                raise ValueError(f"The max value {max_date} is less than the min result value {np.nanmin(s_values)}")
+            s_values = np.where(s_values > _max_date, _max_date, s_values)
         # set the changed values
-        if canonical.num_rows == s_values.size:
+        if choice_idx is None:
             s_others = s_values
         else:
-            s_others.iloc[s_values.index] = s_values
+            s_others = s_others.copy()
+            s_others[choice_idx] = s_values
+        rtn_arr = pa.array(s_others, pa.timestamp('us'), from_pandas=True)
+        if ignore_time:
+            rtn_arr = pc.floor_temporal(rtn_arr, unit='day')
+        elif ignore_seconds:
+            rtn_arr = pc.round_temporal(rtn_arr, unit='minute')
         if now_delta:
-            s_others = s_others.dt.tz_convert(None) if s_others.dt.tz else s_others
-            s_others = (s_others - pd.Timestamp.now()).abs()
-            s_others = (s_others / np.timedelta64(1, now_delta))
-            s_others = s_others.round(0) if null_idx.size > 0 else s_others.astype(int)
+            units = {'Y': 31_556_952_000_000, 'M': 2_629_746_000_000, 'W': 604_800_000_000, 'D': 86_400_000_000,
+                     'h': 3_600_000_000, 'm': 60_000_000, 's': 1_000_000}
+            now = pa.scalar(pd.Timestamp.now().to_datetime64().astype('datetime64[us]'), pa.timestamp('us'))
+            delta = pc.abs(pc.subtract(rtn_arr, now).cast(pa.int64()))
+            delta = pc.divide(delta.cast(pa.float64()), float(units[now_delta]))
+            rtn_arr = pc.round(delta, 0) if delta.null_count > 0 else pc.trunc(delta).cast(pa.int64())
         else:
+            if ts_type.tz is not None:
+                rtn_arr = pc.assume_timezone(rtn_arr, ts_type.tz, ambiguous='earliest', nonexistent='earliest')
+            if pa.types.is_timestamp(ts_type) and ts_type.unit != 'us':
+                rtn_arr = rtn_arr.cast(pa.timestamp(ts_type.unit, ts_type.tz))
             if isinstance(date_format, str):
-                s_others = s_others.dt.strftime(date_format)
-            else:
-                if s_others.dt.tz:
-                    s_others = s_others.dt.tz_convert(dt_tz)
-                else:
-                    s_others = s_others.dt.tz_localize(dt_tz)
-        if ignore_time:
-            s_others = pd.Series(pd.DatetimeIndex(s_others).normalize())
-        elif ignore_seconds:
-            s_others = s_others.dt.round('min')
+                rtn_arr = Commons.column_strftime(rtn_arr, date_format=date_format)
         to_header = to_header if isinstance(to_header, str) else header
-        return Commons.table_append(canonical, pa.table([s_others], names=[to_header]))
+        return Commons.table_append(canonical, pa.table([rtn_arr], names=[to_header]))
 
     def correlate_date_delta(self, canonical: pa.Table, header: str, delta: str, units: str=None, to_header: str=None,
                              seed: int=None, save_intent: bool=None, intent_order: int=None,
@@ -1656,10 +1622,10 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         d = canonical.column(delta).combine_chunks()
         if not pa.types.is_timestamp(t.type):
             raise ValueError(f"The header '{header}' is not a timestamp type")
-        st = t.to_pandas()
-        sd = d.to_pandas()
-        values = st + pd.to_timedelta(sd, unit=units)
-        rtn_value = pa.Array.from_pandas(values)
+        # the delta as a duration in the units of the timestamp
+        factor = self._duration_factor(units) / {'s': 1e6, 'ms': 1e3, 'us': 1, 'ns': 1e-3}[t.type.unit]
+        d = pc.cast(pc.round(pc.multiply(d.cast(pa.float64()), factor)), pa.int64())
+        rtn_value = pc.add(t, d.cast(pa.duration(t.type.unit)))
         to_header = to_header if isinstance(to_header, str) else header
         return Commons.table_append(canonical, pa.table([rtn_value], names=[to_header]))
 
@@ -1675,7 +1641,7 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         :param second_date: the secondary or newer date field
         :param units: (optional) The Timedelta units e.g. 'us', 'ms', 's', 'm', 'h', 'D', 'W', 'M', 'Y'. default is 'D'
         :param to_header: (optional) an optional name to call the column
-        :param precision: the precision of the result
+        :param precision: (optional) the precision of the result. default is 0 returning an integer
         :param seed: (optional) a seed value for the random function: default to None
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the column name that groups intent to create a column
@@ -1706,9 +1672,16 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         _seed = seed if isinstance(seed, int) else self._seed()
         precision = precision if isinstance(precision, int) else 0
         units = units if isinstance(units, str) else 'D'
-        selected = Commons.filter_columns(canonical, headers=[first_date, second_date]).to_pandas()
-        values = (selected[second_date].sub(selected[first_date], axis=0) / np.timedelta64(1, units))
-        rtn_arr = pc.cast(pc.round(pa.Array.from_pandas(values), 0), pa.int64())
+        first, second = [self._to_timestamp(canonical.column(c)) for c in (first_date, second_date)]
+        if (first.type.tz is None) != (second.type.tz is None):
+            raise ValueError(f"The dates '{first_date}' and '{second_date}' must both be timezone aware or naive")
+        # aware dates are compared as instants whatever their timezones
+        tz = 'UTC' if first.type.tz is not None else None
+        first, second = first.cast(pa.timestamp('us', tz)), second.cast(pa.timestamp('us', tz))
+        values = pc.subtract(second, first).cast(pa.int64())
+        values = pc.divide(values.cast(pa.float64()), self._duration_factor(units))
+        rtn_arr = pc.round(values, precision)
+        rtn_arr = pc.cast(rtn_arr, pa.int64()) if precision == 0 else rtn_arr
         to_header = to_header if isinstance(to_header, str) else f"{first_date}-{second_date}"
         return Commons.table_append(canonical, pa.table([rtn_arr], names=[to_header]))
 
@@ -1760,34 +1733,26 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         if isinstance(elements, list):
             names = [f'{header}_' + sub for sub in elements]
             elements = dict(zip(elements, names))
-        p_values = values.to_pandas()
-        p_values = pd.to_datetime(p_values, errors='coerce', dayfirst=day_first, yearfirst=year_first, format=date_format)
-        if 'yr' in elements:
-            canonical = Commons.table_append(canonical, pa.table([p_values.dt.year], names=[elements.get("yr")]))
-        if 'dec' in elements:
-            canonical = Commons.table_append(canonical, pa.table([p_values.dt.year % 10], names=[elements.get("dec")]))
-        if 'mon' in elements:
-            canonical = Commons.table_append(canonical, pa.table([p_values.dt.month], names=[elements.get("mon")]))
-        if 'day' in elements:
-            canonical = Commons.table_append(canonical, pa.table([p_values.dt.day], names=[elements.get("day")]))
-        if 'dow' in elements:
-            canonical = Commons.table_append(canonical, pa.table([p_values.dt.dayofweek], names=[elements.get("dow")]))
-        if 'hr' in elements:
-            canonical = Commons.table_append(canonical, pa.table([p_values.dt.hour], names=[elements.get("hr")]))
-        if 'min' in elements:
-            canonical = Commons.table_append(canonical, pa.table([p_values.dt.minute], names=[elements.get("min")]))
-        if 'woy' in elements:
-            canonical = Commons.table_append(canonical, pa.table([p_values.dt.isocalendar().week], names=[elements.get("woy")]))
-        if 'doy' in elements:
-            canonical = Commons.table_append(canonical, pa.table([p_values.dt.dayofyear], names=[elements.get("doy")]))
+        values = self._to_timestamp(values, day_first=day_first, year_first=year_first, date_format=date_format)
+        if values.type.tz is not None:
+            values = pc.local_timestamp(values)
+        element_map = {'yr': pc.year,
+                       'dec': lambda x: pc.subtract(pc.year(x), pc.multiply(pc.divide(pc.year(x), 10), 10)),
+                       'mon': pc.month, 'day': pc.day, 'dow': pc.day_of_week, 'hr': pc.hour, 'min': pc.minute,
+                       'woy': pc.iso_week, 'doy': pc.day_of_year}
+        builder = Commons.table_builder(canonical)
+        for element, kernel in element_map.items():
+            if element in elements:
+                builder.append(elements.get(element), kernel(values))
         if isinstance(drop_header, bool) and drop_header:
-            canonical = canonical.drop_columns(header)
-        return canonical
+            builder.drop(header)
+        return builder.build()
 
     def correlate_on_pandas(self, canonical: pa.Table, header: str, code_str: str, to_header: str=None, seed: int=None,
                             save_intent: bool=None, intent_order: int=None, intent_level: [int, str]=None,
                             replace_intent: bool=None, remove_duplicates: bool=None) -> pa.Table:
-        """ Allows a Pandas Series method to be run against a Table column. Examples of code_str:
+        """ Allows a Pandas Series style method to be run against a Table column. The code_str is compiled by
+        the Expression language rather than evaluated, see Expression for the supported methods. Examples of code_str:
                 "str.extract('([0-9]+)').astype('float')"
                 "apply(lambda x: x[0] if isinstance(x, str) else None)"
 
@@ -1820,11 +1785,7 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         if not isinstance(header, str) or header not in canonical.column_names:
             raise ValueError(f"The header '{header}' can't be found in the canonical headers")
         seed = seed if isinstance(seed, int) else self._seed()
-        s_values = canonical.column(header).combine_chunks().to_pandas()
-        s_values = eval(f's_values.{code_str}', globals(), locals())
-        if isinstance(s_values, pd.DataFrame):
-            s_values = s_values.iloc[:, 0]
-        rtn_arr = pa.Array.from_pandas(s_values)
+        rtn_arr = Expression.evaluate(Expression.method_chain(code_str), canonical.column(header))
         to_header = to_header if isinstance(to_header, str) else header
         return Commons.table_append(canonical, pa.table([rtn_arr], names=[to_header]))
 
@@ -1883,7 +1844,7 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
             raise ValueError(f"The header '{header}' can't be found in the canonical headers")
         seed = seed if isinstance(seed, int) else self._seed()
         h_col = canonical.column(header).combine_chunks()
-        _mask = self._extract_mask(h_col, condition=condition, mask_null=mask_null)
+        _mask = self._extract_mask(self._decoded_column(canonical, header), condition=condition, mask_null=mask_null)
         # check the value
         if isinstance(value, str) and value.startswith('@'):
             value = canonical.column(value[1:]).combine_chunks()
@@ -1895,6 +1856,88 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         to_header = to_header if isinstance(to_header, str) else header
         return Commons.table_append(canonical, pa.table([pc.if_else(_mask, value, default)], names=[to_header]))
 
+    def correlate_on_rules(self, canonical: pa.Table, rules: list, to_header: str,
+                           default: [int, float, bool, str]=None, seed: int=None, save_intent: bool=None,
+                           intent_order: int=None, intent_level: [int, str]=None, replace_intent: bool=None,
+                           remove_duplicates: bool=None) -> pa.Table:
+        """ Applies a table of rules in a single pass, where each rule is a header, a condition on that header and
+        the value to set when the condition is met. Rules are taken in order with the first rule met taking
+        precedence, and where no rule is met the default is used.
+
+        The rules are a list of triple tuples in the form: [(header, condition, value)] where the condition follows
+        that of correlate_on_condition. An example might be:
+
+                [(header, condition, value)]
+                [('age', [(65, 'greater_equal', None)], 'senior'),
+                 ('age', [(18, 'less', 'or'), ('STUDENT', 'equal', None)], 'concession'),
+                 ('status', [(['INACTIVE', 'PENDING'], 'is_in', None)], '@prior_band')]
+
+        The operator and logic are taken from pyarrow.compute and are:
+
+                operator => match_substring, match_substring_regex, equal, greater, less, greater_equal, less_equal, not_equal, is_in, is_null
+                logic => and, or, xor, and_not
+
+        :param canonical: a pa.Table as the reference table
+        :param rules: a list of tuples of header, condition and value. A value starting @ takes the header values
+        :param to_header: the name of the resulting column
+        :param default: (optional) a default constant if no rule is met. A string starting @ then a header is taken
+        :param seed: (optional) the random seed. defaults to current datetime
+        :param save_intent: (optional) if the intent contract should be saved to the property manager
+        :param intent_level: (optional) the column name that groups intent to create a column
+        :param intent_order: (optional) the order in which each intent should run.
+                    - If None: default's to -1
+                    - if -1: added to a level above any current instance of the intent section, level 0 if not found
+                    - if int: added to the level specified, overwriting any that already exist
+
+        :param replace_intent: (optional) if the intent method exists at the level, or default level
+                    - True - replaces the current intent method with the new
+                    - False - leaves it untouched, disregarding the new intent
+
+        :param remove_duplicates: (optional) removes any duplicate intent in any level that is identical
+        :return: an equal length list of correlated values
+        """
+        # intent persist options
+        self._set_intend_signature(self._intent_builder(method=inspect.currentframe().f_code.co_name, params=locals()),
+                                   intent_level=intent_level, intent_order=intent_order, replace_intent=replace_intent,
+                                   remove_duplicates=remove_duplicates, save_intent=save_intent)
+        # remove intent params
+        canonical = self._get_canonical(canonical)
+        to_header = self._extract_value(to_header)
+        if not isinstance(rules, (list, tuple)) or len(rules) == 0:
+            raise ValueError("The rules must be a list of (header, condition, value) tuples")
+        if isinstance(rules, tuple) and len(rules) == 3 and isinstance(rules[0], str):
+            rules = [rules]
+        rules = [tuple(r) for r in rules]
+        if not all(len(r) == 3 and isinstance(r[0], str) for r in rules):
+            raise ValueError("Each rule must be a tuple of (header, condition, value)")
+        headers = Commons.list_unique([r[0] for r in rules])
+        missing = Commons.list_diff(headers, canonical.column_names, symmetric=False)
+        if len(missing) > 0:
+            raise ValueError(f"The rule headers {missing} can't be found in the canonical headers")
+        # decoded columns evaluated as a single projection of all the rule conditions
+        tbl = pa.table([self._decoded_column(canonical, h) for h in headers], names=headers)
+        projection = {f"rule_{i}": self._condition_expression(r[0], r[1]) for i, r in enumerate(rules)}
+        masks = ds.dataset(tbl).to_table(columns=projection)
+        masks = [pc.fill_null(c.combine_chunks(), False) for c in masks.columns]
+        # resolve the values to a common type
+        values = [r[2] for r in rules] + [default]
+        constants = [v for v in values if not (isinstance(v, str) and v.startswith('@'))]
+        columns = {v[1:] for v in values if isinstance(v, str) and v.startswith('@')}
+        for h in columns:
+            if h not in canonical.column_names:
+                raise ValueError(f"The value header '{h}' can't be found in the canonical headers")
+        c_type = pa.array(constants).type if len(constants) > 0 else pa.null()
+        if pa.types.is_null(c_type):
+            c_type = self._decoded_column(canonical, columns.pop()).type if len(columns) > 0 else pa.string()
+        try:
+            values = [self._decoded_column(canonical, v[1:]).cast(c_type) if isinstance(v, str) and v.startswith('@')
+                      else pa.scalar(v, type=c_type) for v in values]
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:
+            raise ValueError(f"The rule values could not be resolved to a common type: {e}")
+        cond = pc.make_struct(*masks, field_names=list(projection.keys()))
+        result = pc.case_when(cond, *values)
+        return Commons.table_append(canonical, pa.table([result], names=[to_header]))
+
     def correlate_aggregate(self, canonical: pa.Table, headers: [str, list], action: str, to_header: str=None,
                             seed: int=None, save_intent: bool=None, intent_order: int=None,
                             intent_level: [int, str]=None, replace_intent: bool=None,
@@ -1932,14 +1975,23 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         headers = Commons.list_formatter(headers)
         # only allow numeric columns
         num_cols = Commons.filter_headers(canonical, d_types=['is_integer', 'is_floating'])
-        headers = Commons.list_intersect(headers, num_cols)
+        headers = [h for h in headers if h in num_cols]
+        if len(headers) == 0:
+            raise ValueError("The headers must include at least one numeric column in the canonical")
         seed = seed if isinstance(seed, int) else self._seed()
-        arr = canonical.column(headers[0])
-        if len(headers) == 1:
-            arr = eval(f'pc.{action}(arr)', globals(), locals())
+        func = getattr(pc, action, None) if isinstance(action, str) and not action.startswith('_') else None
+        if not callable(func):
+            raise ValueError(f"The action '{action}' is not a pyarrow compute function")
+        columns = [canonical.column(h) for h in headers]
+        if len(columns) == 1:
+            arr = func(columns[0])
+        elif action.endswith('_element_wise'):
+            # variadic kernels aggregate all the columns in one call
+            arr = func(*columns)
         else:
-            for idx in range(1, len(headers)):
-                arr = eval(f'pc.{action}(arr, canonical.column(headers[idx]))', globals(), locals())
+            arr = columns[0]
+            for column in columns[1:]:
+                arr = func(arr, column)
         to_header = to_header if isinstance(to_header, str) else headers[0]
         return Commons.table_append(canonical, pa.table([arr], names=[to_header]))
 
@@ -2231,12 +2283,12 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         """ Takes a remote target dataset and samples columns from that target to the size of the canonical
 
         :param canonical: a pa.Table as the reference table
-        :param other: a direct pa.Table or reference to a connector.
+        :param other: a direct pa.Table or reference to a connector. Connector tables are cached until changed
         :param headers: the headers to be selected from the other table
         :param rename_map: (optional) a direct (list) or named (dict) mapping to the headers names.
         :param multi_map: (optional) multiple columns from a single e.g. {new_name: name} where name is copied new_name
         :param replace: (optional) assuming other is bigger than canonical, selects without replacement when True
-        :param relative_freq: (optional) a weighting pattern of the selected data
+        :param relative_freq: (optional) a weighting pattern over equal bands of the other rows, in row order
         :param seed: (optional) a seed value for the random function: default to None
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the column name that groups intent to create a column
@@ -2258,27 +2310,42 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                                    remove_duplicates=remove_duplicates, save_intent=save_intent)
         # intent action
         canonical = self._get_canonical(canonical)
-        other = self._get_canonical(other)
+        other = self._get_cached_canonical(other)
         headers = Commons.list_formatter(headers)
         replace = replace if isinstance(replace, bool) else True
         seed = self._seed() if seed is None else seed
-        # build the distribution sizes
+        generator = np.random.default_rng(seed)
+        size, num_rows = canonical.num_rows, other.num_rows
+        # draw the row index, with a relative_freq weighting the sample across equal bands of the other rows
         if isinstance(relative_freq, list) and len(relative_freq) > 1:
-            relative_freq = self._freq_dist_size(relative_freq=relative_freq, size=other.num_rows, seed=seed)
+            counts = self._freq_dist_size(relative_freq=relative_freq, size=size, seed=seed)
+            bands = np.array_split(np.arange(num_rows), len(counts))
+            idx = []
+            for band, count in zip(bands, counts):
+                if count > 0 and band.size == 0:
+                    raise ValueError(f"The other table of {num_rows} rows is too small for the relative_freq bands")
+                if not replace and count > band.size:
+                    raise ValueError("Cannot take a larger sample than the relative_freq band when 'replace=False'")
+                idx.append(band[generator.choice(band.size, size=count, replace=replace)] if count > 0 else band[:0])
+            idx = generator.permutation(np.concatenate(idx))
+        elif replace:
+            idx = generator.integers(0, num_rows, size=size)
         else:
-            relative_freq = None
-        other = Commons.filter_columns(other, headers=headers).to_pandas()
-        other = other.sample(n=canonical.num_rows, weights=relative_freq, random_state=seed, ignore_index=True,
-                             replace=replace)
+            if size > num_rows:
+                raise ValueError("Cannot take a larger sample than the other table when 'replace=False'")
+            idx = generator.choice(num_rows, size=size, replace=False)
+        missing = [h for h in headers if h not in other.column_names]
+        if len(missing) > 0:
+            raise ValueError(f"The headers {missing} can't be found in the other headers")
+        other = other.select(headers).take(pa.array(idx))
         if isinstance(rename_map, list) and len(rename_map) == len(headers):
-            other.columns = rename_map
+            other = other.rename_columns(rename_map)
         elif isinstance(rename_map, dict):
-            other.rename(mapper=rename_map, axis='columns', inplace=True)
+            other = other.rename_columns([rename_map.get(h, h) for h in other.column_names])
         if isinstance(multi_map, dict):
             for k, v in multi_map.items():
-                if v in other.columns:
-                    other[k] = other[v]
-        other = pa.Table.from_pandas(other)
+                if v in other.column_names:
+                    other = other.append_column(k, other.column(v))
         return Commons.table_append(canonical, other)
 
     def model_group(self, canonical: pa.Table, group_by: [str, list], headers: [str, list]=None, regex: bool=None,
@@ -2286,7 +2353,7 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                     seed: int=None, include_weighting: bool = False, freq_precision: int=None,
                     remove_weighting_zeros: bool = False, remove_aggregated: bool = False, save_intent: bool=None,
                     intent_level: [int, str]=None, intent_order: int=None, replace_intent: bool=None,
-                    remove_duplicates: bool=None) -> pd.DataFrame:
+                    remove_duplicates: bool=None) -> pa.Table:
         """ returns the full column values directly from another connector data source. in addition the the
         standard groupby aggregators there is also 'list' and 'set' that returns an aggregated list or set.
         These can be using in conjunction with 'list_choice' and 'list_size' allows control of the return values.
@@ -2296,7 +2363,7 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         :param headers: the column headers to apply the aggregation too
         :param group_by: the column headers to group by
         :param regex: if the column headers is q regex
-        :param aggregator: (optional) the aggregator as a function of Pandas DataFrame 'groupby' or 'list' or 'set'
+        :param aggregator: (optional) a pyarrow group aggregator or its Pandas 'groupby' name, or 'list' or 'set'
         :param list_choice: (optional) used in conjunction with list or set aggregator to return a random n choice
         :param list_max: (optional) used in conjunction with list or set aggregator restricts the list to a n size
         :param drop_group_by: (optional) drops the group by headers
@@ -2317,7 +2384,7 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                     - False - leaves it untouched, disregarding the new intent
 
         :param remove_duplicates: (optional) removes any duplicate intent in any level that is identical
-        :return: a pd.DataFrame
+        :return: a pa.Table
         """
         # intent persist options
         self._set_intend_signature(self._intent_builder(method=inspect.currentframe().f_code.co_name, params=locals()),
@@ -2329,48 +2396,71 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         generator = np.random.default_rng(seed=_seed)
         freq_precision = freq_precision if isinstance(freq_precision, int) else 3
         aggregator = aggregator if isinstance(aggregator, str) else 'sum'
-        headers = Commons.filter_headers(canonical, regex=headers) if isinstance(regex, bool) and regex else None
+        headers = Commons.filter_headers(canonical, regex=headers) if isinstance(regex, bool) and regex else headers
         headers = Commons.list_formatter(headers) if isinstance(headers, (list,str)) else canonical.column_names
         group_by = Commons.list_formatter(group_by)
+        headers = [h for h in headers if h not in group_by]
         tbl_sub = Commons.filter_columns(canonical, headers=headers + group_by).drop_null()
-        df_sub = tbl_sub.to_pandas()
-        if aggregator.startswith('set') or aggregator.startswith('list'):
-            df_tmp = df_sub.groupby(group_by)[headers[0]].apply(eval(aggregator)).apply(lambda x: list(x))
-            df_tmp = df_tmp.reset_index()
-            for idx in range(1, len(headers)):
-                result = df_sub.groupby(group_by)[headers[idx]].apply(eval(aggregator)).apply(lambda x: list(x))
-                df_tmp = df_tmp.merge(result, how='left', left_on=group_by, right_index=True)
-            for idx in range(len(headers)):
-                header = headers[idx]
+        # map pandas aggregator names to their arrow hash aggregate
+        agg_map = {'set': 'distinct', 'unique': 'distinct', 'nunique': 'count_distinct', 'std': 'stddev',
+                   'var': 'variance', 'size': 'count'}
+        is_list = aggregator.startswith('set') or aggregator.startswith('list')
+        # the median is exact, taken from the group lists as arrow only offers an approximate median
+        is_median = aggregator == 'median'
+        agg_name = 'distinct' if aggregator.startswith('set') else 'list' if is_list or is_median \
+            else agg_map.get(aggregator, aggregator)
+        try:
+            pc.get_function(f"hash_{agg_name}")
+        except pa.ArrowKeyError:
+            raise ValueError(f"The aggregator '{aggregator}' is not a recognised group aggregator")
+        options = pc.VarianceOptions(ddof=1) if agg_name in ['stddev', 'variance'] else None
+        aggs = [(h, agg_name, options) if options else (h, agg_name) for h in headers]
+        # order dependent aggregators run single threaded so the results are reproducible
+        use_threads = agg_name not in ['list', 'distinct', 'first', 'last', 'first_last']
+        tbl_sub = tbl_sub.group_by(group_by, use_threads=use_threads).aggregate(aggs)
+        tbl_sub = tbl_sub.rename_columns([n[:-len(agg_name) - 1] if n.endswith(f"_{agg_name}") else n
+                                          for n in tbl_sub.column_names])
+        tbl_sub = tbl_sub.select(group_by + headers)
+        keys = pa.table([self._decoded_column(tbl_sub, h) for h in group_by], names=group_by)
+        tbl_sub = tbl_sub.take(pc.sort_indices(keys, sort_keys=[(h, 'ascending') for h in group_by]))
+        if is_median:
+            for header in headers:
+                column = self._list_median(tbl_sub.column(header))
+                tbl_sub = tbl_sub.set_column(tbl_sub.column_names.index(header), header, column)
+        elif is_list:
+            for header in headers:
+                column = tbl_sub.column(header).combine_chunks()
                 if isinstance(list_choice, int):
-                    df_tmp[header] = df_tmp[header].apply(lambda x: generator.choice(x, size=list_choice))
+                    column = self._list_choice(column, size=list_choice, generator=generator)
                 if isinstance(list_max, int):
-                    df_tmp[header] = df_tmp[header].apply(lambda x: x[0] if list_max == 1 else x[:list_max])
-            df_sub = df_tmp
-        else:
-            df_sub = df_sub.groupby(group_by, as_index=False).agg(aggregator)
+                    column = pc.list_element(column, 0) if list_max == 1 else pc.list_slice(column, 0, list_max)
+                tbl_sub = tbl_sub.set_column(tbl_sub.column_names.index(header), header, column)
         if include_weighting:
-            df_sub['sum'] = df_sub.sum(axis=1, numeric_only=True)
-            total = df_sub['sum'].sum()
-            df_sub['weighting'] = df_sub['sum'].\
-                apply(lambda x: round((x / total), freq_precision) if isinstance(x, (int, float)) else 0)
-            df_sub = df_sub.drop(columns='sum')
+            # as with pandas, the numeric and boolean group_by columns are included in the row sum
+            numeric = [h for h in group_by + headers if pa.types.is_integer(tbl_sub.column(h).type)
+                       or pa.types.is_floating(tbl_sub.column(h).type) or pa.types.is_boolean(tbl_sub.column(h).type)]
+            row_sum = pa.repeat(pa.scalar(0, pa.float64()), tbl_sub.num_rows)
+            for h in numeric:
+                row_sum = pc.add(row_sum, pc.fill_null(tbl_sub.column(h).cast(pa.float64()), 0))
+            total = pc.sum(row_sum).as_py()
+            weighting = pc.round(pc.divide(row_sum, total), freq_precision) if total else pc.multiply(row_sum, 0)
+            tbl_sub = tbl_sub.append_column('weighting', weighting)
             if remove_weighting_zeros:
-                df_sub = df_sub[df_sub['weighting'] > 0]
-            df_sub = df_sub.sort_values(by='weighting', ascending=False)
+                tbl_sub = tbl_sub.filter(pc.greater(tbl_sub.column('weighting'), 0))
+            tbl_sub = tbl_sub.sort_by([('weighting', 'descending')])
         if remove_aggregated:
-            df_sub = df_sub.drop(headers, axis=1)
+            tbl_sub = tbl_sub.drop_columns(headers)
         if drop_group_by:
-            df_sub = df_sub.drop(columns=group_by, errors='ignore')
-        return pa.Table.from_pandas(df_sub)
+            tbl_sub = tbl_sub.drop_columns(group_by)
+        return tbl_sub
 
     def model_merge(self, canonical: Any, other: Any, left_on: str=None, right_on: str=None, on: str=None,
                     how: str=None, headers: list=None, suffixes: tuple=None, indicator: bool=None,
-                    validate: str=None,
+                    validate: str=None, key_index: str=None,
                     replace_nulls: bool=None, seed: int=None, save_intent: bool=None,
                     intent_level: [int, str]=None,
                     intent_order: int=None, replace_intent: bool=None,
-                    remove_duplicates: bool=None) -> pd.DataFrame:
+                    remove_duplicates: bool=None) -> pa.Table:
         """ returns the full column values directly from another connector data source.
 
         :param canonical: a direct or generated pd.DataFrame. see context notes below
@@ -2392,6 +2482,9 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                             “one_to_many” or “1:m”: checks if merge keys are unique in left dataset.
                             “many_to_one” or “m:1”: checks if merge keys are unique in right dataset.
                             “many_to_many” or “m:m”: allowed, but does not result in checks.
+        :param key_index: (optional) a connector name to persist a sorted key index of the other dataset. Used
+                    with a single key and a 'left' or 'inner' join, the index is reused across runs while the
+                    other dataset row count is unchanged, avoiding rebuilding the hash table of a large reference.
         :param replace_nulls: (optional) replaces nulls with an appropriate value dependent upon the field type
         :param seed: this is a placeholder, here for compatibility across methods
         :param save_intent: (optional) if the intent contract should be saved to the property manager
@@ -2406,7 +2499,7 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                     - False - leaves it untouched, disregarding the new intent
 
         :param remove_duplicates: (optional) removes any duplicate intent in any level that is identical
-        :return: a pd.DataFrame
+        :return: a pa.Table
 
         The other is a pd.DataFrame, a pd.Series or list, a connector contract str reference or a set of
         parameter instructions on how to generate a pd.Dataframe. the description of each is:
@@ -2434,20 +2527,69 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                                    remove_duplicates=remove_duplicates, save_intent=save_intent)
         # remove intent params
         canonical = self._get_canonical(canonical)
-        other = self._get_canonical(other).slice(0, canonical.num_rows)
+        other = self._get_cached_canonical(other)
         _seed = self._seed() if seed is None else seed
         how = how if isinstance(how, str) and how in ['left', 'right', 'outer', 'inner'] else 'inner'
         indicator = indicator if isinstance(indicator, bool) else False
-        suffixes = suffixes if isinstance(suffixes, tuple) and len(suffixes) == 2 else ('', '_dup')
+        suffixes = tuple(suffixes) if isinstance(suffixes, (tuple, list)) and len(suffixes) == 2 else ('', '_dup')
+        if on is not None:
+            left_on = right_on = Commons.list_formatter(on)
+        else:
+            left_on, right_on = Commons.list_formatter(left_on), Commons.list_formatter(right_on)
+        if len(left_on) == 0 or len(left_on) != len(right_on):
+            raise ValueError("The merge keys must be given as 'on' or as 'left_on' and 'right_on' of equal length")
+        for keys, tbl, name in [(left_on, canonical, 'canonical'), (right_on, other, 'other')]:
+            missing = [k for k in keys if k not in tbl.column_names]
+            if len(missing) > 0:
+                raise ValueError(f"The merge keys {missing} can't be found in the {name} headers")
         # Filter on the columns
-        df = canonical.to_pandas()
-        df_other = other.to_pandas()
-        if isinstance(headers, list):
-            headers.append(right_on if isinstance(right_on, str) else on)
-            other = Commons.filter_columns(other, headers=headers)
-        df_rtn = df.merge(right=df_other, how=how, left_on=left_on, right_on=right_on, on=on, suffixes=suffixes,
-                          indicator=indicator, validate=validate)
-        return pa.Table.from_pandas(df_rtn)
+        if isinstance(headers, (str, list)):
+            headers = Commons.list_formatter(headers)
+            other = other.select([h for h in other.column_names if h in headers or h in right_on])
+        # validate the cardinality
+        if isinstance(validate, str):
+            check = {'one_to_one': 'both', '1:1': 'both', 'one_to_many': 'left', '1:m': 'left',
+                     'many_to_one': 'right', 'm:1': 'right', 'many_to_many': None, 'm:m': None}
+            if validate not in check.keys():
+                raise ValueError(f"The validate '{validate}' is not a valid argument")
+            for side, tbl, keys in [('left', canonical, left_on), ('right', other, right_on)]:
+                if check[validate] in [side, 'both']:
+                    if tbl.select(keys).group_by(keys).aggregate([]).num_rows != tbl.num_rows:
+                        raise ValueError(f"Merge keys are not unique in {side} dataset; not a {validate} merge")
+        # the row positions of the join
+        if isinstance(key_index, str) and len(right_on) == 1 and how in ['left', 'inner']:
+            index = self._get_key_index(key_index, other, right_on[0])
+            left_pos, right_pos = self._key_index_positions(canonical.column(left_on[0]), index, how=how)
+        else:
+            left_pos, right_pos = self._merge_positions(canonical.select(left_on), other.select(right_on), how=how)
+        # build the result taking the columns at the positions
+        shared_keys = [k for k in left_on if on is not None]
+        overlap = [h for h in canonical.column_names if h in other.column_names and h not in shared_keys]
+        names, columns = [], []
+        for h in canonical.column_names:
+            column = canonical.column(h).take(left_pos)
+            if h in shared_keys:
+                right_column = other.column(h).take(right_pos)
+                if pa.types.is_dictionary(column.type) or pa.types.is_dictionary(right_column.type):
+                    column = column.combine_chunks().dictionary_decode() \
+                        if pa.types.is_dictionary(column.type) else column
+                    right_column = right_column.combine_chunks().dictionary_decode() \
+                        if pa.types.is_dictionary(right_column.type) else right_column
+                column = pc.coalesce(column, right_column.cast(column.type))
+            names.append(f"{h}{suffixes[0]}" if h in overlap else h)
+            columns.append(column)
+        for h in other.column_names:
+            if h in shared_keys:
+                continue
+            names.append(f"{h}{suffixes[1]}" if h in overlap else h)
+            columns.append(other.column(h).take(right_pos))
+        if len(names) != len(set(names)):
+            raise ValueError(f"The suffixes {suffixes} result in duplicate column names")
+        if indicator:
+            merge = pc.if_else(pc.is_null(left_pos), 'right_only', pc.if_else(pc.is_null(right_pos), 'left_only', 'both'))
+            names.append('_merge')
+            columns.append(merge.dictionary_encode())
+        return pa.table(columns, names=names)
 
     def model_cat_cast(self, canonical: pa.Table, cat_type: bool=None, cat_threshold: int=None,
                        headers: [str, list]=None,d_types: [str, list]=None, regex: [str, list]=None, drop: bool=None,
@@ -2489,14 +2631,15 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         tm_format = tm_format if isinstance(tm_format, str) else '%Y-%m-%dT%H:%M:%S'
         tm_locale = tm_locale if isinstance(tm_locale, str) else "C"
         cast_names = Commons.filter_headers(canonical, headers=headers, regex=regex, d_types=d_types, drop=drop)
+        builder = Commons.table_builder(canonical)
         for n in cast_names:
-            c = canonical.column(n).combine_chunks()
+            c = canonical.column(n)
             if pc.count(pc.unique(c)).as_py() > cat_threshold:
                 continue
             if pa.types.is_integer(c.type) or pa.types.is_floating(c.type):
                 c = pc.cast(c, pa.string())
             elif pa.types.is_dictionary(c.type):
-                c = c.dictionary_decode()
+                c = c.cast(c.type.value_type)
             elif pa.types.is_timestamp(c.type):
                 c = pc.strftime(c, format=tm_format, locale=tm_locale)
             elif pa.types.is_boolean(c.type):
@@ -2507,8 +2650,8 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                     c = c.dictionary_encode()
             else:
                 continue
-            canonical = Commons.table_append(canonical, pa.table([c], names=[n]))
-        return canonical
+            builder.append(n, c)
+        return builder.build()
 
     def model_num_cast(self, canonical: pa.Table, headers: [str, list]=None,
                        d_types: [str, list]=None, regex: [str, list]=None, drop: bool=None, remove: list=None,
@@ -2549,10 +2692,11 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
         tm_units = tm_units if isinstance(tm_units, str) and tm_units in ['s', 'ms', 'us', 'ns'] else 'ns'
         remove = Commons.list_formatter(remove)
         cast_names = Commons.filter_headers(canonical, headers=headers, regex=regex, d_types=d_types, drop=drop)
+        builder = Commons.table_builder(canonical)
         for n in cast_names:
-            c = canonical.column(n).combine_chunks()
+            c = canonical.column(n)
             if pa.types.is_dictionary(c.type):
-                c = c.dictionary_decode()
+                c = c.cast(c.type.value_type)
             if remove:
                 for item in remove:
                     c = pc.replace_substring(c, item, '')
@@ -2569,8 +2713,8 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                         c = Commons.column_cast(c, pa.int64())
             else:
                 continue
-            canonical = Commons.table_append(canonical, pa.table([c], names=[n]))
-        return canonical
+            builder.append(n, c)
+        return builder.build()
 
     def model_reinstate_nulls(self, canonical: pa.Table, nulls_list=None, headers: [str, list]=None,
                               data_type: [str, list]=None, regex: [str, list]=None, drop: bool=None,
@@ -2608,14 +2752,13 @@ class FeatureEngineerIntent(AbstractFeatureEngineerIntentModel, CommonsIntentMod
                                                                       'NULL']
 
         selected_headers = Commons.filter_headers(canonical, headers=headers, d_types=data_type, regex=regex, drop=drop)
-        rtn_tbl = None
+        builder = Commons.table_builder(canonical)
         for n in selected_headers:
-            c = canonical.column(n).combine_chunks()
+            c = canonical.column(n)
             if pa.types.is_string(c.type):
                 mask = pc.is_in(c, pa.array(nulls_list))
-                c = pc.if_else(mask, None, c)
-                canonical = Commons.table_append(canonical, pa.table([c], names=[n]))
-        return canonical
+                builder.append(n, pc.if_else(mask, None, c))
+        return builder.build()
 
     def model_drop_columns(self, canonical: pa.Table, headers: [str, list]=None, d_types: [str, list]=None,
                            regex: [str, list]=None, drop: bool=None, save_intent: bool=None,
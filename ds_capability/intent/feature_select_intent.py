@@ -1,11 +1,6 @@
 import inspect
-import random
-import re
+import numpy as np
 import pyarrow as pa
-import pyarrow.compute as pc
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
-from sklearn.feature_selection import VarianceThreshold
 
 
 from ds_capability.components.commons import Commons
@@ -52,38 +47,21 @@ class FeatureSelectIntent(AbstractFeatureSelectIntentModel, CommonsIntentModel):
                                    remove_duplicates=remove_duplicates, save_intent=save_intent)
         # Code block for intent
         # auto mapping
-        if isinstance(rename_map, str):
-            if self._pm.has_connector(rename_map):
-                handler = self._pm.get_connector_handler(rename_map)
-                mapper = handler.load_canonical()
-                if mapper.shape[1] == 1:
-                    rename_map = mapper.iloc[:, 0].values.tolist()
-                else:
-                    rename_map = dict(zip(mapper.iloc[:, 0].values, mapper.iloc[:, 1].values))
+        if isinstance(rename_map, str) and self._pm.has_connector(rename_map):
+            mapper = self._pm.get_connector_handler(rename_map).load_canonical()
+            if mapper.num_columns == 1:
+                rename_map = mapper.column(0).cast(pa.string()).to_pylist()
             else:
-                mapper=None
+                rename_map = dict(zip(mapper.column(0).cast(pa.string()).to_pylist(),
+                                      mapper.column(1).cast(pa.string()).to_pylist()))
         # map the headers
         if isinstance(rename_map, dict):
             names = [rename_map.get(item,item) for item in canonical.column_names]
             canonical = canonical.rename_columns(names)
         if isinstance(rename_map, list) and len(rename_map) == canonical.num_columns:
             canonical = canonical.rename_columns(rename_map)
-        # tidy
-        headers = []
-        for s in canonical.column_names:
-            s = re.sub(r"[^\w\s]", '', s)
-            s = re.sub(r"\s+", '_', s)
-            headers.append(s)
-        # convert case
-        if isinstance(case, str):
-            headers = pa.array(headers)
-            if case.lower() == 'lower':
-                headers = pc.ascii_lower(headers)
-            elif case.lower() == 'upper':
-                headers = pc.ascii_upper(headers)
-            elif case.lower() == 'title':
-                headers = pc.ascii_title(headers)
-            headers = headers.to_pylist()
+        # tidy and convert case
+        headers = Commons.clean_headers(canonical.column_names, case=case, replace_spaces=replace_spaces)
         # return table with new headers
         return canonical.rename_columns(headers)
 
@@ -125,14 +103,17 @@ class FeatureSelectIntent(AbstractFeatureSelectIntentModel, CommonsIntentModel):
                                   inc_time=include_timestamp, dt_format=tm_format, units=tm_units, tz=tm_tz)
 
     def auto_drop_noise(self, canonical: pa.Table, variance_threshold: float=None, nulls_threshold: float=None,
-                        save_intent: bool=None, intent_level: [int, str]=None, intent_order: int=None,
-                        replace_intent: bool=None, remove_duplicates: bool=None) -> pa.Table:
-        """ auto removes columns that are at least 0.998 percent np.NaN, a single value, std equal zero or have a
-        predominant value greater than the default 0.998 percent.
+                        predominant_threshold: float=None, save_intent: bool=None, intent_level: [int, str]=None,
+                        intent_order: int=None, replace_intent: bool=None, remove_duplicates: bool=None) -> pa.Table:
+        """ auto removes columns that are mostly null, a single value, nested, have a numeric variance at or below
+        the variance threshold or, if a predominant threshold is given, have a predominant value above it.
+
+        Each column is screened in one pass over its chunks, stopping as soon as it is proven to be kept.
 
         :param canonical: the pa.Table
         :param variance_threshold:  (optional) The threshold limit of variance of the valued. Default 0.01
         :param nulls_threshold:  (optional) The threshold limit of a nulls value. Default 0.95
+        :param predominant_threshold:  (optional) The threshold limit of the share of the most common value
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the level name that groups intent by a reference name
         :param intent_order: (optional) the order in which each intent should run.
@@ -154,35 +135,46 @@ class FeatureSelectIntent(AbstractFeatureSelectIntentModel, CommonsIntentModel):
         # Code block for intent
         nulls_threshold = nulls_threshold if isinstance(nulls_threshold, float) and 0 <= nulls_threshold <= 1 else 0.95
         variance_threshold = variance_threshold if isinstance(variance_threshold, float) and 0 <= variance_threshold <= 1 else 0.01
-        numeric = Commons.filter_columns(canonical, d_types=['is_integer', 'is_floating'])
-        sel = VarianceThreshold(threshold=variance_threshold)
-        sel.fit(numeric)
-        var_dict = dict(zip(numeric.column_names, sel.get_support()))
+        dominance = isinstance(predominant_threshold, float) and 0 <= predominant_threshold <= 1
         # drop knowns
         to_drop = []
         for n in canonical.column_names:
-            if n in var_dict.keys() and var_dict.get(n) == False:
+            c = canonical.column(n)
+            d_type = c.type.value_type if pa.types.is_dictionary(c.type) else c.type
+            if pa.types.is_nested(d_type):
                 to_drop.append(n)
                 continue
-            c = canonical.column(n).combine_chunks()
-            if pa.types.is_dictionary(c.type):
-                c = c.dictionary_decode(c.type)
-            if pa.types.is_nested(c.type) or pa.types.is_list(c.type) or pa.types.is_struct(c.type):
-                to_drop.append(n)
-            elif (pa.types.is_integer(c.type) or pa.types.is_floating(c.type)) and pc.stddev(c).as_py() == 0:
+            screen = self._noise_screen(c, variance_threshold=variance_threshold, dominance=dominance)
+            if pa.types.is_integer(c.type) or pa.types.is_floating(c.type):
+                if screen['variance'] is None or screen['variance'] <= variance_threshold:
+                    to_drop.append(n)
+                    continue
+            if screen['nulls'] > nulls_threshold or screen['constant']:
                 to_drop.append(n)
-            elif c.null_count / canonical.num_rows > nulls_threshold:
-                to_drop.append(n)
-            elif pc.count(pc.unique(c)).as_py() <= 1:
+            elif dominance and screen['dominance'] > predominant_threshold:
                 to_drop.append(n)
         return canonical.drop_columns(to_drop)
 
-    def auto_sample_rows(self, canonical: pa.Table, size: int, save_intent: bool=None, intent_level: [int, str]=None,
+    def auto_sample_rows(self, canonical: [pa.Table, pa.RecordBatchReader], size: [int, float],
+                         stratify_by: str=None, rates: dict=None, weights: str=None, replace: bool=None,
+                         seed: int=None, save_intent: bool=None, intent_level: [int, str]=None,
                          intent_order: int=None, replace_intent: bool=None, remove_duplicates: bool=None) -> pa.Table:
         """ auto samples rows of a canonical returning a randomly selected subset of the canonical based on size.
-
-        :param canonical: the pa.Table
-        :param size: the randomly selected subset size of the canonical
+        Size is a number of rows or a fraction between 0 and 1 of the rows.
+
+        Samples can be stratified by a key column, each stratum sampled at the fraction of size or its own rate,
+        or weighted by a column so rows are drawn in proportion to their weight, within each stratum if stratified.
+        Rows of no, null or negative weight are never drawn. A canonical streamed as a record batch reader is
+        sampled a batch at a time, a fraction row by row and a number of rows by reservoir, so the memory held is
+        that of the sample.
+
+        :param canonical: the pa.Table or a pa.RecordBatchReader of the rows to stream
+        :param size: the randomly selected subset size of the canonical, or fraction of it
+        :param stratify_by: (optional) a column name whose values are the strata to sample in proportion
+        :param rates: (optional) a dict of stratum value and its sampling rate, overriding the fraction of size
+        :param weights: (optional) a numeric column name of row weights to sample in proportion to
+        :param replace: (optional) if rows are sampled with replacement. Default False
+        :param seed: (optional) the random seed
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the level name that groups intent by a reference name
         :param intent_order: (optional) the order in which each intent should run.
@@ -202,10 +194,44 @@ class FeatureSelectIntent(AbstractFeatureSelectIntentModel, CommonsIntentModel):
                                    intent_level=intent_level, intent_order=intent_order, replace_intent=replace_intent,
                                    remove_duplicates=remove_duplicates, save_intent=save_intent)
         # Code block for intent
-        if canonical.num_rows > size > 0:
-            sample = random.sample(range(canonical.num_rows), k=int(size))
-            canonical = canonical.take(sample)
-        return canonical
+        replace = replace if isinstance(replace, bool) else False
+        seed = seed if isinstance(seed, int) else self._seed()
+        generator = np.random.default_rng(seed)
+        fraction = isinstance(size, float) and 0 < size < 1
+        if isinstance(canonical, pa.RecordBatchReader):
+            if fraction:
+                if isinstance(weights, str) or replace:
+                    raise ValueError("A streamed canonical sampled by a fractional size can't be weighted or replaced")
+                sample = []
+                for batch in canonical:
+                    if isinstance(stratify_by, str):
+                        codes, stratum_rates = self._stratum_codes(batch.column(stratify_by), rate=size, rates=rates)
+                        selected = generator.random(batch.num_rows) < stratum_rates[codes]
+                    else:
+                        selected = generator.random(batch.num_rows) < size
+                    sample.append(batch.filter(pa.array(selected)))
+                return pa.Table.from_batches(sample, schema=canonical.schema)
+            if isinstance(stratify_by, str) or replace:
+                raise ValueError("A streamed canonical can only be stratified with a fractional size and can't be "
+                                 "replaced")
+            sample = self._reservoir_sample(canonical, k=int(size), generator=generator, weights=weights)
+            return sample if isinstance(sample, pa.Table) else canonical.schema.empty_table()
+        canonical = self._get_canonical(canonical)
+        num_rows = canonical.num_rows
+        k = int(round(size * num_rows)) if fraction else int(size) if isinstance(size, (int, float)) else 0
+        w = None
+        if isinstance(weights, str):
+            w = canonical.column(weights).cast(pa.float64()).fill_null(0).to_numpy(zero_copy_only=False)
+        if isinstance(stratify_by, str) and num_rows > 0:
+            positions = self._stratified_positions(canonical.column(stratify_by), rate=k / num_rows,
+                                                   generator=generator, rates=rates, weights=w, replace=replace)
+        elif replace and k > 0:
+            positions = self._sample_positions(num_rows, k, generator, weights=w, replace=True)
+        elif num_rows > k > 0 or (w is not None and k > 0):
+            positions = self._sample_positions(num_rows, k, generator, weights=w)
+        else:
+            return canonical
+        return canonical.take(positions)
 
     def auto_drop_columns(self, canonical: pa.Table, headers: [str, list]=None, d_types: [str, list]=None,
                           regex: [str, list]=None, drop: bool=None, save_intent: bool=None,
@@ -274,14 +300,22 @@ class FeatureSelectIntent(AbstractFeatureSelectIntentModel, CommonsIntentModel):
                     to_drop.append(col_2)
         return canonical.drop_columns(to_drop)
 
-    def auto_drop_correlated(self, canonical: pa.Table, threshold: float=None, save_intent: bool=None,
+    def auto_drop_correlated(self, canonical: pa.Table, threshold: float=None, sample_size: int=None,
+                             confidence: float=None, seed: int=None, save_intent: bool=None,
                              intent_level: [int, str]=None, intent_order: int=None, replace_intent: bool=None,
                              remove_duplicates: bool=None) -> pa.Table:
         """ uses 'brute force' techniques to remove highly correlated numeric columns based on the threshold,
-        set by default to 0.95.
+        set by default to 0.95. Of each correlated pair the later column is removed.
+
+        The correlation is computed a block of columns at a time over standardised float32 matrices. Given a
+        sample size, pairs are first screened on a sample of rows, keeping those whose upper confidence bound is
+        above the threshold, and only the columns of those pairs are then correlated over all rows.
 
         :param canonical: the pa.Table
         :param threshold: (optional) threshold correlation between columns. default 0.95
+        :param sample_size: (optional) the number of rows to screen correlated pairs on before the full check
+        :param confidence: (optional) the confidence of the sample screening bound. default 0.99
+        :param seed: (optional) the random seed of the sample
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the level name that groups intent by a reference name
         :param intent_order: (optional) the order in which each intent should run.
@@ -302,17 +336,18 @@ class FeatureSelectIntent(AbstractFeatureSelectIntentModel, CommonsIntentModel):
                                    remove_duplicates=remove_duplicates, save_intent=save_intent)
         # Code block for intent
         threshold = threshold if isinstance(threshold, float) and 0 < threshold < 1 else 0.95
+        confidence = confidence if isinstance(confidence, float) and 0 < confidence < 1 else 0.99
+        seed = seed if isinstance(seed, int) else self._seed()
         # extract numeric columns
         tbl_filter = Commons.filter_columns(canonical, d_types=['is_integer', 'is_floating'])
-        df_filter = tbl_filter.to_pandas()
-        to_drop = set()
-        corr_matrix = df_filter.corr()
-        for i in range(len(corr_matrix.columns)):
-            for j in range(i):
-                if abs(corr_matrix.iloc[i, j]) > threshold:  # we are interested in absolute coeff value
-                    col_name = corr_matrix.columns[i]  # getting the name of column
-                    to_drop.add(col_name)
-        return canonical.drop_columns(to_drop)
+        headers = [h for h in canonical.column_names if h in tbl_filter.column_names]
+        if isinstance(sample_size, int) and 0 < sample_size < canonical.num_rows:
+            sample = np.random.default_rng(seed).choice(canonical.num_rows, size=sample_size, replace=False)
+            pairs = self._correlated_pairs(tbl_filter.take(np.sort(sample)), headers, threshold, confidence=confidence)
+            headers = [headers[i] for i in np.unique(pairs)]
+        pairs = self._correlated_pairs(tbl_filter, headers, threshold)
+        to_drop = {headers[i] for i in pairs[:, 0]}
+        return canonical.drop_columns(list(to_drop))
 
     def auto_aggregate(self, canonical: pa.Table, action: str, headers: [str, list]=None, d_types: [str, list]=None,
                        regex: [str, list]=None, drop: bool=None, to_header: str=None, drop_aggregated: bool=None,
@@ -353,36 +388,35 @@ class FeatureSelectIntent(AbstractFeatureSelectIntentModel, CommonsIntentModel):
         drop_aggregated = drop_aggregated if isinstance(drop_aggregated, bool) else False
         tbl = Commons.filter_columns(canonical, headers=headers, d_types=d_types, regex=regex, drop=drop)
         headers = tbl.column_names
-        df = tbl.to_pandas()
         if action not in ['sum', 'prod', 'count', 'min', 'max', 'mean', 'list', 'list_first', 'list_last']:
             raise ValueError("The only values are 'sum','prod','count','min','max','mean','list','list_first','list_last'")
         # Code block for intent
         precision = precision if isinstance(precision, int) else 3
-        if action.startswith('list'):
-            rtn_values = df.loc[:, headers].values.tolist()
-            rtn_values = [[x for x in y if x is not None] for y in rtn_values]
-            if action.endswith('_first'):
-                rtn_values = [x[0] if len(x) > 0 else None for x in rtn_values]
-            if action.endswith('_last'):
-                rtn_values = [x[-1] if len(x) > 0 else None for x in rtn_values]
-        else:
-            rtn_values = eval(f"df.loc[:, headers].{action}(axis=1)", globals(), locals()).round(precision).to_list()
+        rtn_values = self._row_aggregate(tbl.columns, action=action, precision=precision)
         to_header = to_header if isinstance(to_header, str) else next(self.label_gen)
         if drop_aggregated:
             canonical = canonical.drop_columns(headers)
-        return Commons.table_append(canonical, pa.table([pa.array(rtn_values)], names=[to_header]))
+        return Commons.table_append(canonical, pa.table([rtn_values], names=[to_header]))
 
     def auto_projection(self, canonical: pa.Table, headers: list=None, drop: bool=None, n_components: [int, float]=None,
-                        seed: int=None, save_intent: bool=None, intent_level: [int, str]=None, intent_order: int=None,
+                        solver: str=None, batch_size: int=None, model_connector: str=None, seed: int=None,
+                        save_intent: bool=None, intent_level: [int, str]=None, intent_order: int=None,
                         replace_intent: bool=None, remove_duplicates: bool=None, **kwargs) -> pa.Table:
         """Principal component analysis (PCA) is a linear dimensionality reduction using Singular Value Decomposition
         of the data to project it to a lower dimensional space.
 
+        The solver 'full' fits on the whole standardised matrix, 'randomized' uses a randomized SVD and
+        'incremental' fits an IncrementalPCA a row batch at a time for tables too large to fit in memory. Given a
+        model connector the fitted components are persisted on the first run and later runs only project.
+
         :param canonical: the pa.Table
         :param headers: (optional) a list of headers to select (default) or drop from the dataset
         :param drop: (optional) if True then srop the headers. False by default
         :param n_components: (optional) Number of components to keep.
-        :param seed: (optional) placeholder
+        :param solver: (optional) 'full', 'randomized' or 'incremental'. Default 'full'
+        :param batch_size: (optional) the number of rows in each batch when fitting and projecting. Default 100,000
+        :param model_connector: (optional) a connector name of the fitted components, fitted on the first run
+        :param seed: (optional) the random seed of the randomized solver
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the level name that groups intent by a reference name
         :param intent_order: (optional) the order in which each intent should run.
@@ -396,7 +430,7 @@ class FeatureSelectIntent(AbstractFeatureSelectIntentModel, CommonsIntentModel):
 
         :param remove_duplicates: (optional) removes any duplicate intent in any level that is identical
         :param kwargs: additional parameters to pass the PCA model
-        :return: a pd.DataFrame
+        :return: a pa.Table
         """
         # resolve intent persist options
         self._set_intend_signature(self._intent_builder(method=inspect.currentframe().f_code.co_name, params=locals()),
@@ -404,26 +438,33 @@ class FeatureSelectIntent(AbstractFeatureSelectIntentModel, CommonsIntentModel):
                                    remove_duplicates=remove_duplicates, save_intent=save_intent)
         # Code block for intent
         headers = Commons.list_formatter(headers)
-        sample = Commons.filter_columns(canonical, headers=headers, drop=drop, d_types=['is_integer', 'is_floating'])
-        sample = self.auto_drop_noise(sample, nulls_threshold=0.3)
-        sample = Commons.table_fill_null(sample)
-        if not sample or len(sample) == 0:
-            return canonical
-        n_components = n_components if isinstance(n_components, (int, float)) \
-                                       and 0 < n_components < sample.shape[1]  else sample.shape[1]
-        sample = sample.to_pandas(split_blocks=True)
-        # standardise
-        scaler = StandardScaler()
-        train = scaler.fit_transform(sample)
-        # pca
-        pca = PCA(n_components=n_components, **kwargs)
-        train = pca.fit_transform(train)
-        gen = Commons.label_gen(prefix='pca_')
-        names = []
-        for n in range(train.shape[1]):
-            names.append(next(gen))
-        tbl = pa.Table.from_arrays(train.T, names=names)
-        canonical = canonical.drop_columns(sample.columns)
+        solver = solver if isinstance(solver, str) and solver in ['randomized', 'incremental'] else 'full'
+        seed = seed if isinstance(seed, int) else self._seed()
+        model, handler = None, None
+        if isinstance(model_connector, str):
+            if not self._pm.has_connector(connector_name=model_connector):
+                raise ValueError(f"The model connector name '{model_connector}' is not in the connectors catalog")
+            handler = self._pm.get_connector_handler(model_connector)
+            model = handler.load_canonical() if handler.exists() else None
+        if model is None:
+            sample = Commons.filter_columns(canonical, headers=headers, drop=drop, d_types=['is_integer', 'is_floating'])
+            sample = self.auto_drop_noise(sample, nulls_threshold=0.3)
+            sample = Commons.table_fill_null(sample)
+            if not sample or len(sample) == 0:
+                return canonical
+            n_components = n_components if isinstance(n_components, (int, float)) \
+                                           and 0 < n_components < sample.shape[1]  else sample.shape[1]
+            model = self._fit_projection(sample, sample.column_names, n_components=n_components, solver=solver,
+                                         batch_size=batch_size, seed=seed, **kwargs)
+            if handler is not None:
+                handler.persist_canonical(model)
+        headers = model.column('header').to_pylist()
+        missing = [h for h in headers if h not in canonical.column_names]
+        if missing:
+            raise ValueError(f"The fitted headers {missing} can't be found in the canonical headers")
+        sample = Commons.table_fill_null(canonical.select(headers))
+        tbl = self._projection(sample, model, batch_size=batch_size)
+        canonical = canonical.drop_columns(headers)
         return Commons.table_append(canonical, tbl)
 
     def auto_append_tables(self, canonical: pa.Table, other: pa.Table=None, headers: [str, list]=None,
@@ -472,9 +513,10 @@ class FeatureSelectIntent(AbstractFeatureSelectIntentModel, CommonsIntentModel):
         other = Commons.filter_columns(other, headers=other_headers, d_types=other_data_type, regex=other_regex,
                                        drop=other_drop)
         if canonical.num_rows > other.num_rows:
-            df = other.to_pandas()
-            df = df.sample(n=canonical.num_rows, random_state=seed, ignore_index=True, replace=True)
-            other = pa.Table.from_pandas(df)
+            seed = seed if isinstance(seed, int) else self._seed()
+            positions = self._sample_positions(other.num_rows, canonical.num_rows, np.random.default_rng(seed),
+                                               replace=True)
+            other = other.take(positions)
         else:
             other = other.slice(0, canonical.num_rows)
         # append
@@ -63,8 +63,7 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
             raise ValueError(f"The values in '{header}' can not contain nulls")
         _seed = seed if isinstance(seed, int) else self._seed()
         precision = precision if isinstance(precision, int) else 5
-        npv = canonical.column(header).to_numpy()
-        arr = pa.array(np.round(1 / (1 + np.exp(-npv)), precision))
+        arr = self._activate(canonical.column(header), activation='sigmoid', precision=precision)
         return Commons.table_append(canonical, pa.table([arr], names=[header]))
 
     def activate_tanh(self, canonical: pa.Table, header: str, precision: int=None, seed: int=None,
@@ -113,8 +112,7 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
             raise ValueError(f"The values in '{header}' can not contain nulls")
         _seed = seed if isinstance(seed, int) else self._seed()
         precision = precision if isinstance(precision, int) else 5
-        npv = canonical.column(header).to_numpy()
-        arr = pa.array(np.round((np.exp(npv) - np.exp(-npv)) / (np.exp(npv) + np.exp(-npv)), precision))
+        arr = self._activate(canonical.column(header), activation='tanh', precision=precision)
         return Commons.table_append(canonical, pa.table([arr], names=[header]))
 
     def activate_relu(self, canonical: pa.Table, header: str, precision: int=None, seed: int=None,
@@ -158,10 +156,59 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
             raise ValueError(f"The values in '{header}' can not contain nulls")
         _seed = seed if isinstance(seed, int) else self._seed()
         precision = precision if isinstance(precision, int) else 5
-        npv = canonical.column(header).to_numpy()
-        arr = pa.array(np.round(npv * (npv > 0), precision))
+        arr = self._activate(canonical.column(header), activation='relu', precision=precision)
         return Commons.table_append(canonical, pa.table([arr], names=[header]))
 
+    def activate_headers(self, canonical: pa.Table, activation: str, headers: [str, list]=None,
+                         d_types: [str, list]=None, regex: [str, list]=None, drop: bool=None, precision: int=None,
+                         seed: int=None, save_intent: bool=None, intent_level: [int, str]=None,
+                         intent_order: int=None, replace_intent: bool=None, remove_duplicates: bool=None):
+        """Applies an activation function, 'sigmoid', 'tanh' or 'relu', to every selected numeric column in one
+        step. See activate_sigmoid, activate_tanh and activate_relu for the functions themselves.
+
+        Each column is computed in place on a NumPy copy of its values, keeping its nulls, and the selected
+        columns are replaced in a single rebuild of the table. By default all numeric columns are selected.
+
+        :param canonical: a pa.Table as the reference dataframe
+        :param activation: the activation function, 'sigmoid', 'tanh' or 'relu'
+        :param headers: (optional) a filter of headers to select
+        :param d_types: (optional) a filter on data type, for example ['is_floating']
+        :param regex: (optional) a regular expression to search the headers
+        :param drop: (optional) activates the columns not selected by headers and regex
+        :param precision: (optional) how many decimal places. default to 5
+        :param seed: (optional) the random seed. defaults to current datetime
+        :param save_intent: (optional) if the intent contract should be saved to the property manager
+        :param intent_level: (optional) the intent level that groups intent to create a column
+        :param intent_order: (optional) the order in which each intent should run.
+                    - If None: default's to -1
+                    - if -1: added to a level above any current instance of the intent section, level 0 if not found
+                    - if int: added to the level specified, overwriting any that already exist
+
+        :param replace_intent: (optional) if the intent method exists at the level, or default level
+                    - True - replaces the current intent method with the new
+                    - False - leaves it untouched, disregarding the new intent
+
+        :param remove_duplicates: (optional) removes any duplicate intent in any level that is identical
+        :return: a pa.Table
+        """
+        self._set_intend_signature(self._intent_builder(method=inspect.currentframe().f_code.co_name, params=locals()),
+                                   intent_level=intent_level, intent_order=intent_order, replace_intent=replace_intent,
+                                   remove_duplicates=remove_duplicates, save_intent=save_intent)
+        # intend code block on the canonical
+        canonical = self._get_canonical(canonical)
+        _seed = seed if isinstance(seed, int) else self._seed()
+        precision = precision if isinstance(precision, int) else 5
+        d_types = d_types if isinstance(d_types, (str, list)) else ['is_integer', 'is_floating']
+        # drop reverses the header selection only, the columns activated are always of the d_types
+        selected = Commons.filter_positions(canonical, headers=headers, regex=regex, drop=drop)
+        typed = set(Commons.filter_positions(canonical, d_types=d_types))
+        positions = [i for i in selected if i in typed]
+        columns, schema = canonical.columns, canonical.schema
+        for i in positions:
+            columns[i] = self._activate(columns[i], activation=activation, precision=precision)
+            schema = schema.set(i, schema.field(i).with_type(columns[i].type))
+        return pa.Table.from_arrays(columns, schema=schema)
+
     def encode_date_integer(self, canonical: pa.Table, headers: [str, list]=None, prefix=None, day_first: bool=None,
                             year_first: bool=None, seed: int=None, save_intent: bool=None,
                             intent_level: [int, str]=None, intent_order: int=None, replace_intent: bool=None,
@@ -196,22 +243,21 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         prefix = prefix if isinstance(prefix, str) else ''
         headers = Commons.list_formatter(headers) if isinstance(headers,(str, list)) else canonical.column_names
         _ = self._seed() if seed is None else seed
-        tbl = None
+        builder = Commons.table_builder(canonical)
         for n in headers:
             c = canonical.column(n).combine_chunks()
             if not (pa.types.is_timestamp(c.type) or pa.types.is_time(c.type)):
                 continue
-            column = pa.array(Commons.date2value(c.to_pylist()), pa.int64())
+            # microseconds to the epoch, or to midnight for times, with nulls as zero
+            column = Commons.column_date2value(c).fill_null(0)
             new_header = f"{prefix}{n}"
-            tbl = Commons.table_append(tbl, pa.table([column], names=[new_header]))
-        if not tbl:
-            return canonical
-        return Commons.table_append(canonical, tbl)
+            builder.append(new_header, column)
+        return builder.build()
 
     def encode_category_integer(self, canonical: pa.Table, headers: [str, list]=None, ordinal: bool=None,
-                                label_count: int=None, prefix=None, seed: int=None, save_intent: bool=None,
-                                intent_level: [int, str]=None, intent_order: int=None, replace_intent: bool=None,
-                                remove_duplicates: bool=None):
+                                label_count: int=None, prefix=None, vocabulary: [dict, str]=None, seed: int=None,
+                                save_intent: bool=None, intent_level: [int, str]=None, intent_order: int=None,
+                                replace_intent: bool=None, remove_duplicates: bool=None):
         """ Integer encoding replaces the categories by digits from 1 to n, where n is the number of distinct
         categories of the variable. Integer encoding can be either nominal or ordinal.
 
@@ -226,11 +272,17 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         categorical value is not found in the list it is grouped with other missing values and given the last
         ranking. This is known as rare-label encoding.
 
+        The int32 codes are the positions of the values in the categories of each header, its distinct values in
+        order of appearance or, if ordinal, sorted. A vocabulary can be a dict of header and ordered category list,
+        or a connector name where the fitted categories are persisted the first time and loaded on every run after,
+        so codes are stable across runs. Values not in the vocabulary are null, or the last rank if rare-label.
+
         :param canonical: pyarrow Table
         :param headers: the header(s) to apply encoding too
         :param ordinal: (optional) if the integer encoder is ordinal
         :param label_count: (optional) if the ordinal is rare-label, the number of categories to rank
         :param prefix: (optional) a str to prefix the column
+        :param vocabulary: (optional) a dict of header and categories or a connector name of fitted categories
         :param seed: seed: (optional) a seed value for the random function: default to None
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the intent level that groups intent to create a column
@@ -254,55 +306,51 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         prefix = prefix if isinstance(prefix, str) else ''
         headers = Commons.list_formatter(headers) if isinstance(headers, (str, list)) else canonical.column_names
         _ = self._seed() if seed is None else seed
-        tbl = None
+        ordered = isinstance(label_count, int) or (isinstance(ordinal, bool) and ordinal)
+        # the fitted categories of each header in code order
+        fitted = self._get_vocabulary(canonical, headers, vocabulary, ordered)
+        builder = Commons.table_builder(canonical)
         for header in headers:
-            column = canonical.column(header).combine_chunks()
+            categories = fitted.filter(pc.equal(fitted.column('header'), header)).column('category')
+            column = self._category_codes(canonical.column(header), categories.combine_chunks().cast(pa.string()))
             if isinstance(label_count, int): # rare-label
-                if not pa.types.is_dictionary(column.type):
-                    column = column.dictionary_encode()
-                full_rank = column.dictionary.sort().to_pylist()
-                rank = full_rank[:label_count]
-                missing = full_rank[label_count:]
-                values = list(range(len(rank)))
-                values = values + ([len(rank)] * (len(full_rank) - len(rank)))
-                mapper = dict(zip(full_rank, values))
-                s_column = column.to_pandas()
-                column =  pa.Array.from_pandas(s_column.replace(mapper))
-            elif isinstance(ordinal, bool) and ordinal: # ordinal
-                if not pa.types.is_dictionary(column.type):
-                    column = column.dictionary_encode()
-                rank = column.dictionary.sort().to_pylist()
-                values = list(range(len(rank)))
-                mapper = dict(zip(rank, values))
-                s_column = column.to_pandas()
-                column = pa.Array.from_pandas(s_column.replace(mapper))
-            else: # nominal
-                if not pa.types.is_dictionary(column.type):
-                    column = column.dictionary_encode()
-                column = pa.array(column.indices, pa.int64())
-            if pa.types.is_dictionary(column.type):
-                column = column.dictionary_decode()
+                rare = pc.or_kleene(pc.greater_equal(column, label_count), pc.is_null(column))
+                column = pc.if_else(pc.and_kleene(rare, canonical.column(header).is_valid()), label_count, column)
+                column = column.cast(pa.int32())
             new_header = f"{prefix}{header}"
-            tbl = Commons.table_append(tbl, pa.table([column], names=[new_header]))
-        if not tbl:
-            return canonical
-        return Commons.table_append(canonical, tbl)
+            builder.append(new_header, column)
+        return builder.build()
 
-    def encode_category_one_hot(self, canonical: pa.Table, headers: [str, list]=None, prefix=None, data_type: pa.Table=None,
-                                prefix_sep: str=None, dummy_na: bool = False, drop_first: bool = False, seed: int=None,
-                                save_intent: bool=None, intent_level: [int, str]=None, intent_order: int=None,
-                                replace_intent: bool=None, remove_duplicates: bool=None) -> pa.Table:
+    def encode_category_one_hot(self, canonical: pa.Table, headers: [str, list]=None, prefix=None,
+                                data_type: str=None, prefix_sep: str=None, dummy_na: bool = False,
+                                drop_first: bool = False, vocabulary: [dict, str]=None, as_sparse: bool=None,
+                                to_header: str=None, seed: int=None, save_intent: bool=None,
+                                intent_level: [int, str]=None, intent_order: int=None, replace_intent: bool=None,
+                                remove_duplicates: bool=None) -> pa.Table:
         """ encodes categorical data types, One hot encoding, consists in encoding each categorical variable with
         different boolean variables (also called dummy variables) which take values 0 or 1, indicating if a category
         is present in an observation.
 
+        The categories of each header are its sorted distinct values unless a vocabulary is given. A vocabulary
+        can be a dict of header and category list, or a connector name where the fitted categories are persisted
+        the first time and loaded on every run after, so the dummy columns are stable across batches. Values not
+        in the vocabulary have no indicator set. The dummy columns are named as pandas get_dummies names them, the
+        prefix, prefix_sep and the category as Python prints it, for example 'num_1.0' or 'flag_True'.
+
+        If as_sparse is True the dummies are replaced by a single list column of the indices of the set
+        indicators, numbered across the headers in order, that Commons.column_to_csr hands to scikit-learn.
+
         :param canonical: pyarrow Table
         :param headers: the header(s) to apply encoding too
         :param prefix: str, list of str, or dict of str, String to append Table intent levels, with equal length.
+        :param data_type: (optional) a pyarrow DataType, type alias or numpy dtype name for the new columns, for
+                    example 'int8'. Default to 'bool'
         :param prefix_sep: str separator, default '_'
         :param dummy_na: Add a column to indicate null values, if False nullss are ignored.
         :param drop_first:  Whether to get k-1 dummies out of k categorical levels by removing the first level.
-        :param data_type: Data type for new columns. Only a single dtype is allowed.
+        :param vocabulary: (optional) a dict of header and categories or a connector name of fitted categories
+        :param as_sparse: (optional) if the indicators are returned as a single list of indices column
+        :param to_header: (optional) the name of the sparse column. Default to 'one_hot'
         :param seed: seed: (optional) a seed value for the random function: default to None
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the intent level that groups intent to create a column
@@ -318,6 +366,8 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         :param remove_duplicates: (optional) removes any duplicate intent in any level that is identical
         :return: a pa.Table
         """
+        # a pyarrow type is held in the intent by its alias
+        data_type = str(data_type) if isinstance(data_type, pa.DataType) else data_type
         self._set_intend_signature(self._intent_builder(method=inspect.currentframe().f_code.co_name, params=locals()),
                                    intent_level=intent_level, intent_order=intent_order, replace_intent=replace_intent,
                                    remove_duplicates=remove_duplicates, save_intent=save_intent)
@@ -328,10 +378,53 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         prefix_sep = prefix_sep if isinstance(prefix_sep, str) else "_"
         dummy_na = dummy_na if isinstance(dummy_na, bool) else False
         drop_first = drop_first if isinstance(drop_first, bool) else False
-        d_type = data_type if data_type else pa.int64()
-        dummies = pd.get_dummies(canonical.to_pandas(), columns=headers, prefix=prefix, prefix_sep=prefix_sep,
-                              dummy_na=dummy_na, drop_first=drop_first, dtype=data_type)
-        return pa.Table.from_pandas(dummies)
+        as_sparse = as_sparse if isinstance(as_sparse, bool) else False
+        to_header = to_header if isinstance(to_header, str) else 'one_hot'
+        if isinstance(data_type, str):
+            try:
+                d_type = pa.type_for_alias(data_type)
+            except ValueError:
+                d_type = pa.from_numpy_dtype(np.dtype(data_type))
+        else:
+            d_type = pa.bool_()
+        if isinstance(prefix, str):
+            prefix = dict.fromkeys(headers, prefix)
+        elif isinstance(prefix, list):
+            prefix = dict(zip(headers, prefix))
+        prefix = {h: prefix.get(h, h) if isinstance(prefix, dict) else h for h in headers}
+        # the fitted categories of each header
+        fitted = self._get_vocabulary(canonical, headers, vocabulary)
+        names, columns, sparse = [], [], []
+        offset = 0
+        for header in headers:
+            categories = fitted.filter(pc.equal(fitted.column('header'), header)).column('category')
+            categories = categories.combine_chunks().cast(pa.string())
+            categories = categories.slice(1) if drop_first else categories
+            codes = self._category_codes(canonical.column(header), categories).fill_null(-1).to_numpy()
+            is_null = canonical.column(header).is_null().to_numpy(zero_copy_only=False)
+            if as_sparse:
+                sparse.append(np.where(codes >= 0, codes + offset, -1))
+                offset += len(categories)
+                if dummy_na:
+                    sparse.append(np.where(is_null, offset, -1))
+                    offset += 1
+                continue
+            for code, category in enumerate(self._category_labels(categories, canonical.column(header).type)):
+                names.append(f"{prefix[header]}{prefix_sep}{category}")
+                columns.append(pa.array(codes == code).cast(d_type))
+            if dummy_na:
+                names.append(f"{prefix[header]}{prefix_sep}nan")
+                columns.append(pa.array(is_null).cast(d_type))
+        if as_sparse:
+            indices = np.column_stack(sparse) if sparse else np.empty((canonical.num_rows, 0), dtype=np.int64)
+            is_set = indices >= 0
+            offsets = np.concatenate([[0], np.cumsum(is_set.sum(axis=1))]).astype(np.int32)
+            names, columns = [to_header], [pa.ListArray.from_arrays(offsets, indices[is_set].astype(np.int32))]
+        remaining = canonical.drop_columns(headers)
+        tbl = pa.table(columns, names=names) if columns else pa.table({})
+        if remaining.num_columns == 0:
+            return tbl
+        return Commons.table_append(remaining, tbl) if columns else remaining
 
     def scale_normalize(self, canonical: pa.Table, headers: [str, list]=None, scalar: [tuple, str]=None,
                         prefix: str=None, precision: int=None, seed: int=None, save_intent: bool=None,
@@ -377,7 +470,7 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         headers = Commons.list_formatter(headers) if isinstance(headers, (str, list)) else canonical.column_names
         _seed = seed if isinstance(seed, int) else self._seed()
         scalar = scalar if isinstance(scalar, (tuple, str)) else (0, 1)
-        tbl = None
+        builder = Commons.table_builder(canonical)
         for n in headers:
             c = canonical.column(n).combine_chunks()
             if not (pa.types.is_floating(c.type) or pa.types.is_integer(c.type)):
@@ -401,10 +494,8 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
             if null_idx.size > 0:
                 s_values.iloc[null_idx] = np.nan
             new_header = f"{prefix}{n}"
-            tbl = Commons.table_append(tbl, pa.table([s_values], names=[n]))
-        if not tbl:
-            return canonical
-        return Commons.table_append(canonical, tbl)
+            builder.append(n, s_values)
+        return builder.build()
 
     def scale_standardize(self, canonical: pa.Table, headers: [str, list]=None, prefix: str=None, precision: int=None,
                           seed: int=None, save_intent: bool=None, intent_level: [int, str]=None, intent_order: int=None,
@@ -440,7 +531,7 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         canonical = self._get_canonical(canonical)
         headers = Commons.list_formatter(headers) if isinstance(headers, (str, list)) else canonical.column_names
         _seed = seed if isinstance(seed, int) else self._seed()
-        tbl = None
+        builder = Commons.table_builder(canonical)
         for n in headers:
             c = canonical.column(n).combine_chunks()
             if not (pa.types.is_floating(c.type) or pa.types.is_integer(c.type)):
@@ -454,10 +545,8 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
             if null_idx.size > 0:
                 s_values.iloc[null_idx] = np.nan
             new_header = f"{prefix}{n}"
-            tbl = Commons.table_append(tbl, pa.table([s_values], names=[n]))
-        if not tbl:
-            return canonical
-        return Commons.table_append(canonical, tbl)
+            builder.append(n, s_values)
+        return builder.build()
 
     def scale_transform(self, canonical: pa.Table, transform: str, headers: [str, list]=None, prefix: str=None,
                         precision: int=None, seed: int=None, save_intent: bool=None, intent_level: [int, str]=None,
@@ -516,7 +605,7 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         canonical = self._get_canonical(canonical)
         headers = Commons.list_formatter(headers) if isinstance(headers, (str, list)) else canonical.column_names
         _seed = seed if isinstance(seed, int) else self._seed()
-        tbl = None
+        builder = Commons.table_builder(canonical)
         for n in headers:
             c = canonical.column(n).combine_chunks()
             if not (pa.types.is_floating(c.type) or pa.types.is_integer(c.type)):
@@ -543,10 +632,8 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
             if null_idx.size > 0:
                 s_values.iloc[null_idx] = np.nan
             new_header = f"{prefix}{n}"
-            tbl = Commons.table_append(tbl, pa.table([s_values], names=[n]))
-        if not tbl:
-            return canonical
-        return Commons.table_append(canonical, tbl)
+            builder.append(n, s_values)
+        return builder.build()
 
     def scale_mapping(self, canonical: pa.Table, numerator: str, denominator: str, prefix: str=None,
                       precision: int=None, to_header: str=None, seed: int=None, save_intent: bool=None,
@@ -595,7 +682,8 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         return Commons.table_append(canonical, pa.table([arr], names=[to_header]))
 
     def discrete_intervals(self, canonical: pa.Table, header: str, interval: [int, list]=None, categories: list=None,
-                           to_header: str=None, precision: int=None, duplicates: str=None, seed: int=None,
+                           to_header: str=None, precision: int=None, duplicates: str=None, edge_connector: str=None,
+                           seed: int=None,
                            save_intent: bool=None, intent_level: [int, str]=None, intent_order: int=None,
                            replace_intent: bool=None, remove_duplicates: bool=None):
         """ Converts continuous values into discrete values through interval categorisation based on
@@ -616,6 +704,7 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         :param precision: (optional) The precision of the range and boundary values. by default set to 5.
         :param categories: (optional) a set of labels the same length as the intervals to name the categories
         :param duplicates: (optional) If intervals are not unique, 'raise' ValueError, 'drop' intervals or 'rank' values
+        :param edge_connector: (optional) a connector name of fitted bin edges, fitted on the first run and reused after
         :param seed: (optional) the random seed. defaults to current datetime
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the column name that groups intent to create a column
@@ -641,27 +730,34 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         if not isinstance(header, str) or header not in canonical.column_names:
             raise ValueError(f"The header '{header}' can't be found in the canonical headers")
         interval = interval if isinstance(interval, (int, list)) else 5
-        n = interval if isinstance(interval, int) else len(interval)
-        categories = categories if isinstance(categories, list) else range(1, n+1) if isinstance(interval, int) else range(1, n)
         precision = precision if isinstance(precision, int) else 3
         duplicates = duplicates if isinstance(duplicates, str) and duplicates in ['drop', 'rank'] else 'raise'
         seed = seed if isinstance(seed, int) else self._seed()
         c = canonical.column(header).combine_chunks()
         if not (pa.types.is_floating(c.type) or pa.types.is_integer(c.type)):
             raise ValueError(f"The header '{header}' value type must be numerical, '{c.type}' was passed")
-        s = c.to_pandas()
         if duplicates == 'rank':
-            s = s.rank(method="first")
+            c = pc.rank(c, sort_keys='ascending', null_placement='at_end', tiebreaker='first')
+            c = pc.if_else(canonical.column(header).combine_chunks().is_valid(), c, None)
             duplicates = 'raise'
-        s = pd.cut(s, interval, labels=categories, precision=precision, duplicates=duplicates)
-        c = pa.Array.from_pandas(s)
-        if pa.types.is_dictionary(c.type):
-            c = c.dictionary_decode()
+        values = pa.table([c], names=[header])
+        fit = lambda x: self._fit_edges(values, x, interval)
+        edges = self._get_fitted(edge_connector, [header], fit=fit) if isinstance(edge_connector, str) else fit([header])
+        edges = edges.column('edge').to_numpy()
+        if np.any(np.diff(edges) < 0):
+            raise ValueError(f"The interval edges for '{header}' must increase monotonically")
+        if np.unique(edges).size < edges.size:
+            if duplicates == 'raise':
+                raise ValueError(f"The interval edges for '{header}' are not unique, use duplicates 'drop' or 'rank'")
+            edges = np.unique(edges)
+        categories = categories if isinstance(categories, list) else list(range(1, edges.size))
+        c = Commons.column_bins(c, edges, categories, right=True, include_lowest=isinstance(interval, int))
         to_header = to_header if isinstance(to_header, str) else header
         return Commons.table_append(canonical, pa.table([c], names=[to_header]))
 
     def discrete_quantiles(self, canonical: pa.Table, header: str, interval: [int, list]=None, categories: list=None,
-                           to_header: str=None, precision: int=None, duplicates: str=None, seed: int=None,
+                           to_header: str=None, precision: int=None, duplicates: str=None, edge_connector: str=None,
+                           seed: int=None,
                            save_intent: bool=None, intent_level: [int, str]=None, intent_order: int=None,
                            replace_intent: bool=None, remove_duplicates: bool=None):
         """ Converts continuous values into discrete values through interval categorisation based on
@@ -682,6 +778,7 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         :param precision: (optional) The precision of the range and boundary values. by default set to 5.
         :param categories: (optional)  a set of labels the same length as the intervals to name the categories
         :param duplicates: (optional) If intervals are not unique, 'raise' ValueError, 'drop' intervals or 'rank' values
+        :param edge_connector: (optional) a connector name of fitted bin edges, fitted on the first run and reused after
         :param seed: (optional) the random seed. defaults to current datetime
         :param save_intent: (optional) if the intent contract should be saved to the property manager
         :param intent_level: (optional) the column name that groups intent to create a column
@@ -707,24 +804,26 @@ class FeatureTransformIntent(AbstractFeatureTransformIntentModel, CommonsIntentM
         if not isinstance(header, str) or header not in canonical.column_names:
             raise ValueError(f"The header '{header}' can't be found in the canonical headers")
         interval = interval if isinstance(interval, (int, list)) else 4
-        n = interval if isinstance(interval, int) else len(interval)
-        categories = categories if isinstance(categories, list) else False
         precision = precision if isinstance(precision, int) else 3
         duplicates = duplicates if isinstance(duplicates, str) and duplicates in ['drop', 'rank'] else 'raise'
         seed = seed if isinstance(seed, int) else self._seed()
         c = canonical.column(header).combine_chunks()
         if not (pa.types.is_floating(c.type) or pa.types.is_integer(c.type)):
             raise ValueError(f"The header '{header}' value type must be numerical, '{c.type}' was passed")
-        s = c.to_pandas()
         if duplicates == 'rank':
-            s = s.rank(method="first")
+            c = pc.rank(c, sort_keys='ascending', null_placement='at_end', tiebreaker='first')
+            c = pc.if_else(canonical.column(header).combine_chunks().is_valid(), c, None)
             duplicates = 'raise'
-        s = pd.qcut(s, interval, labels=categories, precision=precision, duplicates=duplicates)
-        if categories is False:
-            s += 1
-        c = pa.Array.from_pandas(s)
-        if pa.types.is_dictionary(c.type):
-            c = c.dictionary_decode()
+        values = pa.table([c], names=[header])
+        fit = lambda x: self._fit_edges(values, x, interval, quantiles=True)
+        edges = self._get_fitted(edge_connector, [header], fit=fit) if isinstance(edge_connector, str) else fit([header])
+        edges = edges.column('edge').to_numpy()
+        if np.unique(edges).size < edges.size:
+            if duplicates == 'raise':
+                raise ValueError(f"The quantile edges for '{header}' are not unique, use duplicates 'drop' or 'rank'")
+            edges = np.unique(edges)
+        categories = categories if isinstance(categories, list) else list(range(1, edges.size))
+        c = Commons.column_bins(c, edges, categories, right=True, include_lowest=True)
         to_header = to_header if isinstance(to_header, str) else header
         return Commons.table_append(canonical, pa.table([c], names=[to_header]))
 
@@ -4,6 +4,7 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 from abc import ABC, abstractmethod
 from ds_core.handlers.abstract_handlers import HandlerFactory
 
@@ -12,6 +13,9 @@ __author__ = 'Darryl Oatridge'
 
 class AbstractSample(ABC):
 
+    # process level cache of the loaded sample tables, keyed on the sample reference name or dataset file and header
+    _TABLE_CACHE = {}
+
     @staticmethod
     def _full_path(filename):
         return abspath(join(dirname(__file__), filename))
@@ -20,40 +24,135 @@ class AbstractSample(ABC):
     def __dir__(self):
         pass
 
+    @staticmethod
+    def build_sample_store(references: [str, list]=None) -> list:
+        """ builds the binary sample store by converting the python literal sample modules into Arrow IPC files.
+        The IPC files are written uncompressed alongside the modules so they can be memory mapped on load. This
+        should be run whenever a sample module is added or changed.
+
+        :param references: (optional) a sample reference name or list of names. Default to all sample modules
+        :return: a list of the file paths built
+        """
+        if isinstance(references, str):
+            references = [references]
+        if not isinstance(references, list):
+            references = [p.stem for p in Path(AbstractSample._full_path('.')).glob('*.py')
+                          if p.stem.startswith(('lookup_', 'map_'))]
+        rtn_list = []
+        for reference in sorted(references):
+            module = HandlerFactory.get_module(module_name=f"ds_capability.sample.{reference}")
+            if reference.startswith("lookup_"):
+                tbl = pa.table([pa.array(module.data)], names=['data'])
+            else:
+                tbl = pa.Table.from_pandas(pd.DataFrame.from_dict(module.data), preserve_index=False)
+            _path = AbstractSample._full_path(f"{reference}.arrow")
+            with pa.OSFile(_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, tbl.schema) as writer:
+                    writer.write_table(tbl)
+            AbstractSample._TABLE_CACHE.pop(reference, None)
+            rtn_list.append(_path)
+        return rtn_list
+
+    @staticmethod
+    def _get_table(reference: str) -> pa.Table:
+        """private method to retrieve the full sample table, memory mapped from the sample store where available"""
+        if reference in AbstractSample._TABLE_CACHE:
+            return AbstractSample._TABLE_CACHE[reference]
+        _path = Path(AbstractSample._full_path(f"{reference}.arrow"))
+        if _path.exists():
+            tbl = pa.ipc.open_file(pa.memory_map(_path.as_posix(), 'r')).read_all()
+        else:
+            # fall back to the python literal module
+            module = HandlerFactory.get_module(module_name=f"ds_capability.sample.{reference}")
+            if reference.startswith("lookup_"):
+                tbl = pa.table([pa.array(module.data)], names=['data'])
+            else:
+                tbl = pa.Table.from_pandas(pd.DataFrame.from_dict(module.data), preserve_index=False)
+        AbstractSample._TABLE_CACHE[reference] = tbl
+        return tbl
+
     @staticmethod
     def _get_constant(reference: str, size: int=None, shuffle: bool=True, seed: int=None) -> [pa.Table, list]:
         """private method to retrieve data constant"""
-        module = HandlerFactory.get_module(module_name=f"ds_capability.sample.{reference}")
+        tbl = AbstractSample._get_table(reference)
+        idx = AbstractSample._sample_index(num_rows=tbl.num_rows, size=size, shuffle=shuffle, seed=seed)
         if reference.startswith("lookup_"):
-            return AbstractSample._select_list(selection=module.data, size=size, seed=seed, shuffle=shuffle)
-        df = pd.DataFrame.from_dict(module.data)
-        idx = df.index.to_list()
-        selection = AbstractSample._select_list(selection=idx, size=size, seed=seed, shuffle=shuffle)
-        return pa.Table.from_pandas(df.iloc[selection].reset_index(drop=True))
+            return tbl.column('data').take(idx).to_pylist()
+        return tbl.take(idx)
 
     @staticmethod
     def _get_dataset(filename: str, size: int=None, shuffle: bool=True, seed: int=None, header: bool=True) -> [pa.Table, pa.Array]:
         """private method to retrieve a dataset"""
-        header = 'infer' if header else None
-        _path = Path(AbstractSample._full_path(filename))
-        df = pd.read_csv(_path, encoding='latin1', header=header)
-        idx = df.index.to_list()
-        df = df.iloc[AbstractSample._select_list(selection=idx, size=size, seed=seed, shuffle=shuffle)]
-        return pa.Table.from_pandas(df)
+        key = (filename, bool(header))
+        if key not in AbstractSample._TABLE_CACHE:
+            _path = Path(AbstractSample._full_path(filename))
+            df = pd.read_csv(_path, encoding='latin1', header='infer' if header else None)
+            AbstractSample._TABLE_CACHE[key] = pa.Table.from_pandas(df, preserve_index=False)
+        tbl = AbstractSample._TABLE_CACHE[key]
+        return tbl.take(AbstractSample._sample_index(num_rows=tbl.num_rows, size=size, shuffle=shuffle, seed=seed))
+
+    @staticmethod
+    def _sample_index(num_rows: int, size: int=None, shuffle: bool=True, seed: int=None,
+                      replace: bool=None) -> np.ndarray:
+        """private method to draw an integer index of 'size' against a base of 'num_rows'. The base data is never
+        replicated, when 'size' exceeds 'num_rows' the index wraps around the base.
+
+        :param num_rows: the number of rows in the base data
+        :param size: (optional) the size of the index. Default to num_rows
+        :param shuffle: (optional) if the index should be randomly drawn. Default is True
+        :param seed: (optional) a seed value for the local generator
+        :param replace: (optional) if a shuffled index is drawn with replacement. Default is True
+        :return: an int64 numpy array
+        """
+        size = size if isinstance(size, int) else num_rows
+        replace = replace if isinstance(replace, bool) else True
+        if num_rows == 0 or size <= 0:
+            return np.zeros(0, dtype=np.int64)
+        if not shuffle:
+            return np.arange(size, dtype=np.int64) % num_rows
+        generator = np.random.default_rng(seed=seed)
+        if replace:
+            return generator.integers(0, num_rows, size=size, dtype=np.int64)
+        # each base row appears at most once per cycle of the base
+        cycles = int(((size - 1) / num_rows) + 1)
+        return np.concatenate([generator.permutation(num_rows) for _ in range(cycles)])[:size].astype(np.int64)
 
     @staticmethod
-    def _select_list(selection: list, size: int=None, shuffle: bool=True, seed: int=None) -> pa.Array:
-        """private method to select from a series
-        :param shuffle:
+    def _weighted_index(weights: np.ndarray, size: int=None, shuffle: bool=True, seed: int=None) -> np.ndarray:
+        """private method to draw an integer index of 'size' where each base row is weighted by an integer count.
+        This is equivalent to repeating each row by its weight without building the repeated list.
+
+        :param weights: an array of non-negative integer weights, one per base row
+        :param size: (optional) the size of the index. Default to the sum of the weights
+        :param shuffle: (optional) if the index should be randomly drawn. Default is True
+        :param seed: (optional) a seed value for the local generator
+        :return: an int64 numpy array
         """
-        size = size if isinstance(size, int) else len(selection)
-        seed = seed if isinstance(seed, int) else int(time.time() * np.random.random())
-        np.random.seed(seed)
-        selection *= int(((size - 1) / len(selection)) + 1)
+        weights = np.asarray(weights, dtype=np.int64)
+        cum_weights = np.cumsum(weights)
+        total = int(cum_weights[-1]) if cum_weights.size > 0 else 0
+        size = size if isinstance(size, int) else total
+        if total == 0 or size <= 0:
+            return np.zeros(0, dtype=np.int64)
         if shuffle:
-            idx = np.random.randint(0, len(selection), size=size)
-            return pd.Series(selection).iloc[idx].values.tolist()[:size]
-        return selection[:size]
+            generator = np.random.default_rng(seed=seed)
+            position = generator.integers(0, total, size=size, dtype=np.int64)
+        else:
+            position = np.arange(size, dtype=np.int64) % total
+        return np.searchsorted(cum_weights, position, side='right').astype(np.int64)
+
+    @staticmethod
+    def _select_list(selection: list, size: int=None, shuffle: bool=True, seed: int=None) -> list:
+        """private method to select from a list without modifying the selection
+
+        :param selection: the list to select from
+        :param size: (optional) the size of the selection. Default to the length of the selection
+        :param shuffle: (optional) if the selection should be randomly drawn. Default is True
+        :param seed: (optional) a seed value
+        :return: a list of size
+        """
+        idx = AbstractSample._sample_index(num_rows=len(selection), size=size, shuffle=shuffle, seed=seed)
+        return pa.array(selection).take(idx).to_pylist()
 
 
 class MappedSample(AbstractSample):
@@ -95,7 +194,7 @@ class MappedSample(AbstractSample):
         df = pd.DataFrame()
         df['name'] = [f"{a} {b} {c}" for (a, b, c) in zip(p_sample['first_name'], p_sample['family_name'], level)]
         df['pcp_tax_id'] = np.linspace(100000000, 900000000, num=df.shape[0], dtype=int, endpoint=False)
-        df['pcp_tax_id'] += np.random.randint(100, 999, size=df.shape[0])
+        df['pcp_tax_id'] += generator.integers(100, 999, size=df.shape[0])
         df = pd.concat([df, a_sample], axis='columns')
         df['address'] = df['address'].str.title()
         df['city'] = df['city'].str.title()
@@ -186,26 +285,29 @@ class MappedSample(AbstractSample):
         :return: the mapping DataFrame
         """
         inc_military = inc_military if isinstance(inc_military, bool) else True
-        sample = AbstractSample._get_constant(reference='map_us_city_zipcodes_rank', shuffle=False).to_pandas()
+        sample = AbstractSample._get_table(reference='map_us_city_zipcodes_rank')
         # trim
         if not inc_military:
-            sample = sample[~sample['military']]
+            sample = sample.filter(pc.invert(sample.column('military')))
         if isinstance(state_filter, list):
-            sample = sample[sample['state_id'].isin(state_filter)]
-        sample.drop(columns=['ranking', 'incorporated', 'density', 'military', 'population', 'lat', 'lng', 'city_ascii',
-                             'timezone'], inplace=True)
+            sample = sample.filter(pc.is_in(sample.column('state_id'), value_set=pa.array(state_filter)))
+        sample = sample.select(['city', 'state_id', 'state_name', 'county_fips', 'county_name', 'zipcodes'])
+        sample = sample.replace_schema_metadata(None)
         # explode
-        sample = sample.explode(column='zipcodes', ignore_index=True)
-        size = size if isinstance(size, int) else sample.shape[0]
-        rtn_idx = sample.index.to_list() * int(((size - 1) / sample.shape[0]) + 1)
-        df_rtn = sample.iloc[rtn_idx]
-        df_rtn = df_rtn.rename(columns={'zipcodes': 'zipcode', 'state_name': 'state', 'county_name': 'county',
-                                        'state_id': 'state_abbr'})
+        zipcodes = sample.column('zipcodes').combine_chunks()
+        sample = sample.drop_columns('zipcodes').take(pc.list_parent_indices(zipcodes))
+        sample = sample.append_column('zipcode', pc.list_flatten(zipcodes))
+        sample = sample.rename_columns(['city', 'state_abbr', 'state', 'county_fips', 'county', 'zipcode'])
+        size = size if isinstance(size, int) else sample.num_rows
         if shuffle:
-            df_rtn = df_rtn.sample(frac=1, random_state=seed).reset_index(drop=True)
+            idx = AbstractSample._sample_index(num_rows=sample.num_rows, size=size, shuffle=True, seed=seed,
+                                               replace=False)
         else:
-            df_rtn.sort_values(by=['state_abbr', 'county'], inplace=True)
-        return pa.Table.from_pandas(df_rtn.iloc[:size])
+            # each row is repeated in place so the sort order is kept
+            order = pc.sort_indices(sample, sort_keys=[('state_abbr', 'ascending'), ('county', 'ascending')])
+            repeat = int(((size - 1) / sample.num_rows) + 1) if sample.num_rows > 0 else 1
+            idx = order.to_numpy()[np.arange(size, dtype=np.int64) // repeat] if sample.num_rows > 0 else []
+        return sample.take(pa.array(idx, pa.int64()))
 
     @staticmethod
     def us_phone_code(size: int=None, shuffle: bool=False, seed: int=None) -> pa.Table:
@@ -258,53 +360,65 @@ class MappedSample(AbstractSample):
         :param size: (optional) the size of the sample. If None then all the names are returned
         :param female_bias: a female bias between 0 and 1 where 0 is zero females and 1 is all females
         :param shuffle: (optional) if not shuffled then returns in family_name alphabetical order
-        :param seed: (optional) a seed value
+        :param seed: (optional) a seed value or a numpy Generator to share across samples
         :return: the mapping DataFrame
         """
-        sample = AbstractSample._get_constant(reference='map_us_forename_mf', shuffle=False)
-        size = size if isinstance(size, int) else sample.shape[0]
-        # generate the random index of the names
         generator = np.random.default_rng(seed=seed)
+        tbl = MappedSample._us_persona_names(size=size, female_bias=female_bias, seed=generator)
+        size = tbl.num_rows
+        first_name = pc.utf8_lower(tbl.column('first_name'))
+        family_name = pc.utf8_lower(tbl.column('family_name'))
+        email = pc.binary_join_element_wise(first_name, family_name, '.')
+        # replace duplicates with the family name and a number, keeping the first occurrence
+        codes = pc.dictionary_encode(email).combine_chunks().indices.to_numpy(zero_copy_only=False)
+        dup_mask = np.ones(size, dtype=bool)
+        dup_mask[np.unique(codes, return_index=True)[1]] = False
+        number = pa.array(generator.integers(low=10, high=10000, size=size)).cast(pa.string())
+        email = pc.if_else(pa.array(dup_mask), pc.binary_join_element_wise(family_name, number, ''), email)
+        domains = Sample.global_mail_domains(shuffle=False)
+        domain = pa.array(domains).take(AbstractSample._sample_index(num_rows=len(domains), size=size, seed=generator))
+        tbl = tbl.append_column('email', pc.binary_join_element_wise(email, domain, '@'))
+        if shuffle:
+            return tbl.take(generator.permutation(size))
+        return tbl.sort_by([('family_name', 'ascending'), ('first_name', 'ascending')])
+
+    @staticmethod
+    def _us_persona_names(size: int=None, female_bias: float=None, seed: int=None) -> pa.Table:
+        """private method to build the persona names from a single index draw against the forename and surname
+        tables. The seed can be a numpy Generator so the draw can be shared with other samples.
+        """
+        generator = np.random.default_rng(seed=seed)
+        sample = AbstractSample._get_table(reference='map_us_forename_mf')
+        size = size if isinstance(size, int) else sample.num_rows
         # set male/female
-        sample = sample.to_pandas()
-        female_idx = sample[sample['Gender'] == 'F'].dropna().index.to_list()
-        male_idx = sample[sample['Gender'] == 'M'].dropna().index.to_list()
+        gender = sample.column('Gender').to_numpy(zero_copy_only=False)
+        female_idx = np.flatnonzero(gender == 'F')
+        male_idx = np.flatnonzero(gender == 'M')
         female_bias = female_bias if isinstance(female_bias, float) and 0 <= female_bias <= 1 else np.round(
-            len(female_idx) / sample.shape[0], 5)
+            len(female_idx) / sample.num_rows, 5)
         female_bias += np.round(generator.uniform(low=-0.001, high=0.001), 4)
-        female_size = int(np.round(female_bias * size, 0))
+        female_size = min(max(int(np.round(female_bias * size, 0)), 0), size)
         male_size = size - female_size
-        female_idx *= int(((female_size - 1) / len(female_idx)) + 1)
-        female_second_idx = female_idx
-        generator.shuffle(female_second_idx)
-        male_idx *= int(((male_size - 1) / len(male_idx)) + 1)
-        male_second_idx = male_idx
-        generator.shuffle(male_second_idx)
-        forename_idx = female_idx[:female_size] + male_idx[:male_size]
-        generator.shuffle(forename_idx)
-        middle_idx = female_second_idx[:female_size] + male_second_idx[:male_size]
-        df_rtn = pd.DataFrame(columns=['first_name', 'middle_name', 'gender'])
-        df_rtn['first_name'] = sample['Name'].iloc[forename_idx].values
-        df_rtn['middle_name'] = sample['Name'].iloc[middle_idx].values
-        df_rtn['gender'] = sample['Gender'].iloc[forename_idx].values
-        df_rtn['middle_name'].iloc[0:int(df_rtn.shape[0] * generator.uniform(low=0.2, high=0.3))] = ''
-        # set the surname
-        df_rtn['family_name'] = Sample.us_surnames(size=size, shuffle=True, seed=seed)
-        # set the email name
-        df_rtn['email'] = pd.Series(
-            [f"{a.lower()}.{b.lower()}" for (a, b) in zip(df_rtn['first_name'], df_rtn['family_name'])])
-        # replace duplicates
-        dup_email = df_rtn[df_rtn['email'].duplicated()].index.to_list()
-        number = generator.integers(low=10, high=10000, size=len(dup_email))
-        df_rtn['email'].iloc[dup_email] = pd.Series(
-            [f"{a.lower()}{b}" for (a, b) in zip(df_rtn['family_name'], number)], dtype='string')
-        domain = Sample.global_mail_domains(size=size, shuffle=True, seed=seed)
-        df_rtn['email'] = pd.Series([f"{a}@{b}" for (a, b) in zip(df_rtn['email'], domain)])
-        if shuffle:
-            df_rtn = df_rtn.sample(frac=1, random_state=seed).reset_index(drop=True)
-        else:
-            df_rtn.sort_values(by=['family_name', 'first_name'], inplace=True)
-        return pa.Table.from_pandas(df_rtn)
+        forename_idx = np.concatenate([
+            generator.choice(female_idx, size=female_size, replace=female_size > len(female_idx)),
+            generator.choice(male_idx, size=male_size, replace=male_size > len(male_idx))])
+        middle_idx = np.concatenate([
+            generator.choice(female_idx, size=female_size, replace=female_size > len(female_idx)),
+            generator.choice(male_idx, size=male_size, replace=male_size > len(male_idx))])
+        # shuffle forename and middle name together so the gender aligns
+        shuffle_idx = generator.permutation(size)
+        forename_idx = forename_idx[shuffle_idx]
+        middle_idx = middle_idx[shuffle_idx]
+        middle_name = sample.column('Name').take(middle_idx)
+        no_middle = np.zeros(size, dtype=bool)
+        no_middle[:int(size * generator.uniform(low=0.2, high=0.3))] = True
+        middle_name = pc.if_else(pa.array(no_middle), '', middle_name)
+        surname_tbl = AbstractSample._get_table(reference='map_us_surname_rank')
+        surname_idx = AbstractSample._weighted_index(weights=Sample._us_surname_weights(size), size=size,
+                                                     shuffle=True, seed=generator)
+        return pa.table([sample.column('Name').take(forename_idx), middle_name,
+                         sample.column('Gender').take(forename_idx), surname_tbl.column('name').take(surname_idx)],
+                        names=['first_name', 'middle_name', 'gender', 'family_name'])
 
 
 class Sample(AbstractSample):
@@ -326,6 +440,17 @@ class Sample(AbstractSample):
         :return: a list of names
         """
 
+        size = size if isinstance(size, int) else 150000
+        tbl = AbstractSample._get_table(reference='map_us_surname_rank')
+        idx = AbstractSample._weighted_index(weights=Sample._us_surname_weights(size), size=size, shuffle=shuffle,
+                                             seed=seed)
+        return tbl.column('name').take(idx).to_pylist()
+
+    @staticmethod
+    def _us_surname_weights(size: int) -> np.ndarray:
+        """private method returning the surname weights where every name is included once with the popular names
+        weighted on top, the weighting reducing as the size increases"""
+
         def divider(_size):
             weight_map = {1000000: 50000, 500000: 100000, 150000: 500000}
             for k, v in weight_map.items():
@@ -333,14 +458,9 @@ class Sample(AbstractSample):
                     return v
             return 2000000
 
-        size = size if isinstance(size, int) else 150000
-        df = AbstractSample._get_constant(reference='map_us_surname_rank', seed=seed, shuffle=False).to_pandas()
-        df['weight'] = [int(round((x / divider(size)), 0)) for x in df['count']]
-        df_clean = df.where(df.weight > 1).dropna()
-        result = [[x] * df_clean.weight.astype(int).iloc[x] for x in df_clean.index]
-        idx = [j for i in result for j in i] + df.index.to_list()
-        idx = AbstractSample._select_list(selection=idx, size=size, shuffle=shuffle, seed=seed)
-        return df['name'].iloc[idx].to_list()
+        tbl = AbstractSample._get_table(reference='map_us_surname_rank')
+        weight = np.round(tbl.column('count').to_numpy() / divider(size), 0).astype(np.int64)
+        return np.where(weight > 1, weight, 0) + 1
 
     @staticmethod
     def us_professions(size: int = None, shuffle: bool=True, seed: int = None) -> list:
@@ -351,13 +471,11 @@ class Sample(AbstractSample):
         :param seed: (optional) a seed value
         :return: a list of names
         """
-        df = AbstractSample._get_constant(reference='map_us_profession_detail_rank', seed=seed, shuffle=False).to_pandas()
-        df.columns = ['occupation', 'total']
-        size = size if isinstance(size, int) else df.shape[0]
-        result = [[x] * df['total'].astype(int).iloc[x] for x in df.index]
-        idx = [j for i in result for j in i]
-        idx = AbstractSample._select_list(selection=idx, size=size, shuffle=shuffle, seed=seed)
-        return df['occupation'].iloc[idx].to_list()
+        tbl = AbstractSample._get_table(reference='map_us_profession_detail_rank')
+        weight = tbl.column(1).to_numpy().astype(np.int64)
+        size = size if isinstance(size, int) else tbl.num_rows
+        idx = AbstractSample._weighted_index(weights=weight, size=size, shuffle=shuffle, seed=seed)
+        return tbl.column(0).take(idx).to_pylist()
 
     @staticmethod
     def uk_street_types(size: int = None, shuffle: bool = True, seed: int = None) -> list:
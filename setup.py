@@ -47,8 +47,8 @@ setup(
     license='BSD',
     include_package_data=True,
     package_data={
-        # If any package contains *.yaml or *.csv files, include them:
-        '': ['*.yaml', '*.csv'],
+        # If any package contains *.yaml, *.csv or *.arrow files, include them:
+        '': ['*.yaml', '*.csv', '*.arrow'],
     },
     python_requires='>=3.8',
     install_requires=[
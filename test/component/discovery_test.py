@@ -4,6 +4,7 @@ from datetime import datetime
 from pathlib import Path
 import shutil
 from pprint import pprint
+import numpy as np
 import pyarrow as pa
 import pyarrow.compute as pc
 import pandas as pd
@@ -142,6 +143,21 @@ class DiscoveryTest(unittest.TestCase):
         result = DataDiscovery.association_theils_u(x, y)
         self.assertLess(result, 0.2)
 
+    def test_discrete_intervals_granularity(self):
+        normal = pa.array(np.random.default_rng(1).normal(10, 6, 200))
+        # the maximum of each column lies on a bin edge
+        on_edge = pa.array([0.0, 1.3, 2.5, 4.9, 5.0])
+        shifted = pa.array([0.3, 2.8, 4.1, 5.3])
+        for column, granularity in [(normal, 2.5), (normal, 0.7), (normal, 1.1), (on_edge, 2.5), (shifted, 2.5),
+                                    (on_edge, 1.25)]:
+            result = DataDiscovery.to_discrete_intervals(column, granularity=granularity)
+            self.assertEqual(0, result.null_count)
+            for value, label in zip(column.to_pylist(), result.to_pylist()):
+                low, high = [float(x) for x in label.split('->')]
+                self.assertTrue(low <= value <= high, f"{value} not in {label} at {granularity}")
+        result = DataDiscovery.to_discrete_intervals(on_edge, granularity=2.5)
+        self.assertEqual(['0.0->2.5', '0.0->2.5', '2.5->5.0', '2.5->5.0', '5.0->7.5'], result.to_pylist())
+
     def test_raise(self):
         startTime = datetime.now()
         with self.assertRaises(KeyError) as context:
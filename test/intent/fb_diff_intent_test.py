@@ -2,11 +2,13 @@ import unittest
 import os
 from pathlib import Path
 import shutil
+import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pyarrow.compute as pc
 from ds_capability import FeatureBuild
 from ds_capability.intent.feature_build_intent import FeatureBuildIntent
+from ds_capability.intent.common_intent import CommonsIntentModel
 from ds_core.properties.property_manager import PropertyManager
 
 # Pandas setup
@@ -264,6 +266,57 @@ class FeatueBuildDiffTest(unittest.TestCase):
         self.assertEqual(result.column_names, ['X', 'Y', 'B_x', 'B_y', 'C_x', 'C_y'])
         # self.assertEqual(result.loc[0].values.tolist(), ['A', 'C', '3', '5', 0, 3])
 
+    def test_model_difference_fingerprint(self):
+        fb = FeatureBuild.from_memory()
+        tools: FeatureBuildIntent = fb.tools
+        df = pa.table(data={"X": list("ABCDEFG"), "B": [1, 2, 3, 4, None, 3, 1], 'C': ['L', 'L', 'M', None, 'J', 'K', 'M']})
+        target = pa.table(data={"X": list("GFEDCBA"), "B": [1, 3, None, 4, 5, 2, 1], 'C': ['M', 'K', 'J', None, 'M', 'P', 'L']})
+        fb.add_connector_persist('target', uri_file='working/data/target.parquet')
+        fb.add_connector_uri('fingerprint', uri='working/data/fingerprint.parquet')
+        fb.save_canonical('target', target)
+        result = tools.build_difference(df, 'target', on_key='X', fingerprint_connector='fingerprint')
+        self.assertEqual([0, 0, 1, 0, 0, 0, 0], result.column('B').to_pylist())
+        self.assertEqual([0, 1, 0, 0, 0, 0, 0], result.column('C').to_pylist())
+        stored = fb.load_canonical('fingerprint')
+        self.assertEqual(['X', 'fingerprint'], stored.column_names)
+        self.assertEqual(list("GFEDCBA"), stored.column('X').to_pylist())
+        # reused while the target is unchanged
+        self.assertEqual(result, tools.build_difference(df, 'target', on_key='X', fingerprint_connector='fingerprint'))
+        # rebuilt once the target changes
+        fb.save_canonical('target', df)
+        result = tools.build_difference(df, 'target', on_key='X', fingerprint_connector='fingerprint', drop_zero_sum=True)
+        self.assertEqual((0, 1), result.shape)
+
+    def test_value_hash(self):
+        tools: FeatureBuildIntent = FeatureBuild.from_memory().tools
+        values = pa.array(['ab', '', None, 'ba', 'ab'])
+        hashed = tools._value_hash(values)
+        self.assertEqual(hashed[0], hashed[4])
+        self.assertEqual(3, len(set(hashed[[0, 1, 3]])))
+        # the hash follows the values not the layout
+        self.assertTrue(np.array_equal(hashed, tools._value_hash(values.dictionary_encode())))
+        self.assertTrue(np.array_equal(hashed[3:], tools._value_hash(pa.array(['ba', 'ab']))))
+        self.assertTrue(np.array_equal(hashed, tools._value_hash(pa.chunked_array([values[:2], values[2:]]))))
+        # the hash does not depend on the chunk size the segments are reduced in
+        words = pa.array(['', 'abcdefgh', 'a', None, 'abc', 'abcdefghijk', '', 'ab'] * 3)
+        control = tools._value_hash(words)
+        chunk_size = CommonsIntentModel._HASH_CHUNK
+        try:
+            for size in [1, 3, 8]:
+                CommonsIntentModel._HASH_CHUNK = size
+                self.assertTrue(np.array_equal(control, tools._value_hash(words)))
+                self.assertTrue(np.array_equal(control[5:], tools._value_hash(words.slice(5))))
+        finally:
+            CommonsIntentModel._HASH_CHUNK = chunk_size
+        nested = pa.array([[1, 2], [2, 1], None, [], [1, 2]])
+        hashed = tools._value_hash(nested)
+        self.assertEqual(hashed[0], hashed[4])
+        self.assertEqual(4, len(set(hashed[:4])))
+        self.assertTrue(np.array_equal(hashed[1:], tools._value_hash(nested.slice(1))))
+        hashed = tools._value_hash(pa.array([{'a': 1, 'b': 'x'}, {'a': 1, 'b': 'y'}, {'a': 1, 'b': 'x'}]))
+        self.assertEqual([True, False], [hashed[0] == hashed[2], hashed[0] == hashed[1]])
+        hashed = tools._value_hash(pa.array([0.0, -0.0, float('nan'), float('nan')]))
+        self.assertEqual([True, True], [hashed[0] == hashed[1], hashed[2] == hashed[3]])
 
     def test_raise(self):
         with self.assertRaises(KeyError) as context:
@@ -1,5 +1,6 @@
 import unittest
 import os
+import datetime
 from pathlib import Path
 import shutil
 import numpy as np
@@ -138,6 +139,40 @@ class SyntheticTest(unittest.TestCase):
         self.assertEqual(result.column('date')[0], pc.min(result.column('date')))
         self.assertEqual(result.column('date')[-1], pc.max(result.column('date')))
 
+    def test_group_analysis_multi_key(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        tbl = tools.get_synthetic_data_types(1000, seed=31)
+        arr = pa.array(np.random.default_rng(31).integers(0, 50, 1000))
+        tbl = Commons.table_append(pa.table([arr], ['User']), tbl)
+        result = tools.get_analysis_group(2000, tbl, group_by=['User', 'cat'], seed=31)
+        self.assertEqual((2000, tbl.num_columns), result.shape)
+        self.assertEqual(tbl.column_names, result.column_names)
+        self.assertEqual(tbl.schema, result.schema)
+        other = tools.get_analysis_group(2000, tbl, group_by=['User', 'cat'], seed=31)
+        self.assertEqual(result.column('num').to_pylist(), other.column('num').to_pylist())
+
+    def test_group_analysis_allocation(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        gen = np.random.default_rng(0)
+        tbl = pa.table([pa.array(np.repeat(np.arange(10), 3)), pa.array(gen.integers(1, 100, 30)),
+                        pa.array(list('abcdefghij') * 3),
+                        pa.array([datetime.time(h % 24) for h in range(30)])],
+                       names=['User', 'num', 'cat', 'time'])
+        result = tools.get_analysis_group(16, tbl, group_by='User', seed=31)
+        self.assertEqual(16, result.num_rows)
+        self.assertEqual(tbl.schema, result.schema)
+        # strings over the category limit are drawn from a shuffle of their group, so no group repeats a value
+        result = tools.get_analysis_group(16, tbl, group_by='User', category_limit=2, offset=1000, seed=31)
+        pairs = result.group_by(['User', 'cat']).aggregate([]).num_rows
+        self.assertEqual(16, pairs)
+        self.assertGreater(pc.min(result.column('num')).as_py(), 900)
+        self.assertEqual(pa.int64(), result.column('num').type)
+        result = tools.get_analysis_group(16, tbl, group_by='User', offset=0.5, seed=31)
+        self.assertEqual(pa.float64(), result.column('num').type)
+        self.assertTrue(all(v % 1 == 0.5 for v in result.column('num').to_pylist()))
+
     def test_direct_other(self):
         fe = FeatureEngineer.from_memory()
         tools: FeatureEngineerIntent = fe.tools
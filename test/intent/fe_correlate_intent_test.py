@@ -78,6 +78,76 @@ class FeatureEngineerCorrelateTest(unittest.TestCase):
         self.assertTrue('cabin_num' in tbl.column_names and 'cabin_cat' in tbl.column_names)
         print(fe.table_report(tbl, head=3).to_string())
 
+    def test_correlate_on_expression(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        tbl = pa.table([pa.array(['C85', 'E46', None, '', 'T'])], names=['cabin'])
+        result = tools.correlate_on_pandas(tbl, header='cabin', code_str="str.extract('([0-9]+)').astype('float')",
+                                           to_header='cabin_num')
+        self.assertEqual([85.0, 46.0, None, None, None], result.column('cabin_num').to_pylist())
+        result = tools.correlate_on_pandas(tbl, header='cabin', to_header='cabin_cat',
+                                           code_str="apply(lambda x: x[0] if isinstance(x, str) and len(x) > 0 else None)")
+        self.assertEqual(['C', 'E', None, None, 'T'], result.column('cabin_cat').to_pylist())
+        result = tools.correlate_number(pa.table([pa.array([1, 2, None])], names=['num']), 'num',
+                                        code_str='@ * 2 + 1', to_header='num')
+        self.assertEqual([3, 5, None], result.column('num').to_pylist())
+        # nulls stay null through the bounds
+        num = pa.table([pa.array([1, 9, None])], names=['num'])
+        for code_str, expected in [('clip(@, 2, 5)', [2, 5, None]), ('min(@, 2)', [1, 2, None]),
+                                   ('max(@, 2)', [2, 9, None])]:
+            result = tools.correlate_number(num, 'num', code_str=code_str, to_header='num')
+            self.assertEqual(expected, result.column('num').to_pylist())
+        result = tools.correlate_on_pandas(num, header='num', code_str="clip(2, 5)", to_header='num')
+        self.assertEqual([2, 5, None], result.column('num').to_pylist())
+        with self.assertRaises(ValueError):
+            tools.correlate_on_pandas(tbl, header='cabin', code_str="__class__.__bases__")
+        with self.assertRaises(ValueError):
+            tools.correlate_number(pa.table([pa.array([1, 2])], names=['num']), 'num', code_str="__import__('os')")
+        # an '@' within a string literal is not the value
+        email = pa.table([pa.array(['ann@mail.com', 'bob', None])], names=['email'])
+        result = tools.correlate_on_pandas(email, header='email', code_str="str.contains('@')", to_header='at')
+        self.assertEqual([True, False, None], result.column('at').to_pylist())
+        result = tools.correlate_on_pandas(email, header='email', code_str="str.extract('([a-z]+)@')", to_header='user')
+        self.assertEqual(['ann', None, None], result.column('user').to_pylist())
+        result = tools.correlate_on_pandas(email, header='email', code_str="str.split('@')", to_header='parts')
+        self.assertEqual([['ann', 'mail.com'], ['bob'], None], result.column('parts').to_pylist())
+        # arrow errors are raised as a ValueError
+        with self.assertRaises(ValueError):
+            tools.correlate_on_pandas(num, header='num', code_str="str.len()", to_header='num')
+
+    def test_correlate_on_rules(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        tbl = pa.table([pa.array([70, 10, 30, None, 45]),
+                        pa.array(['A', 'STUDENT', 'STUDENT', 'B', 'INACTIVE']).dictionary_encode(),
+                        pa.array(['x1', 'x2', 'x3', 'x4', 'x5'])], names=['age', 'status', 'prior'])
+        rules = [('age', [(65, 'greater_equal', None)], 'senior'),
+                 ('age', [(18, 'less', 'or'), (40, 'greater', None)], 'concession'),
+                 ('status', [('STUDENT', 'equal', None)], 'student'),
+                 ('status', [(['INACTIVE', 'PENDING'], 'is_in', None)], '@prior')]
+        result = tools.correlate_on_rules(tbl, rules=rules, default='standard', to_header='band')
+        self.assertEqual(['senior', 'concession', 'student', 'standard', 'concession'],
+                         result.column('band').to_pylist())
+        result = tools.correlate_on_rules(tbl, rules=rules[2:], default='@prior', to_header='band')
+        self.assertEqual(['x1', 'student', 'student', 'x4', 'x5'], result.column('band').to_pylist())
+        # matches correlate_on_condition for a single rule
+        condition = [(18, 'less', 'or'), (40, 'greater', None)]
+        tbl = tbl.filter(pc.is_valid(tbl.column('age')))
+        result = tools.correlate_on_rules(tbl, rules=[('age', condition, 1)], default=0, to_header='flag')
+        other = tools.correlate_on_condition(tbl, header='age', condition=condition, value=1, default=0,
+                                             to_header='flag')
+        self.assertEqual(other.column('flag').to_pylist(), result.column('flag').to_pylist())
+        # the same null logic, with a null condition taking the default
+        tbl = pa.table([pa.array([70, 10, None])], names=['age'])
+        for condition in [[(18, 'less', 'or'), (None, 'is_null', None)], [(5, 'greater', 'and'), (40, 'less', None)],
+                          [(5, 'greater', 'xor'), (40, 'less', None)], [(5, 'greater', 'and_not'), (40, 'less', None)]]:
+            result = tools.correlate_on_rules(tbl, rules=[('age', condition, 1)], default=0, to_header='flag')
+            other = tools.correlate_on_condition(tbl, header='age', condition=condition, value=1, default=0,
+                                                 to_header='flag')
+            self.assertEqual(pc.fill_null(other.column('flag'), 0).to_pylist(), result.column('flag').to_pylist())
+        with self.assertRaises(ValueError):
+            tools.correlate_on_rules(tbl, rules=[('unknown', condition, 1)], to_header='flag')
+
     def test_correlate_on_condition(self):
         fe = FeatureEngineer.from_memory()
         tools: FeatureEngineerIntent = fe.tools
@@ -153,6 +223,14 @@ class FeatureEngineerCorrelateTest(unittest.TestCase):
         tbl = tools.correlate_dates(tbl, header="creationDate", ignore_time=True, offset={'days': 10}, to_header='processDate')
         result = tools.correlate_date_diff(tbl, 'creationDate', 'processDate', to_header='diff')
         self.assertEqual(10, pc.divide(pc.sum(result.column('diff')),tbl.num_rows).as_py())
+        # aware dates are compared as instants and can not be mixed with naive dates
+        aware = pa.array([pd.Timestamp('2023-01-01 12:00', tz='UTC')], pa.timestamp('ns', 'UTC'))
+        tbl = pa.table([aware, aware.cast(pa.timestamp('ns', 'Asia/Tokyo')), pa.array([pd.Timestamp('2023-01-01 23:00')])],
+                       names=['utc', 'tokyo', 'naive'])
+        result = tools.correlate_date_diff(tbl, 'utc', 'tokyo', units='h', to_header='diff')
+        self.assertEqual([0], result.column('diff').to_pylist())
+        with self.assertRaises(ValueError):
+            tools.correlate_date_diff(tbl, 'naive', 'utc', units='h')
 
     def test_correlate_dates_jitter(self):
         fe = FeatureEngineer.from_memory()
@@ -173,6 +251,21 @@ class FeatureEngineerCorrelateTest(unittest.TestCase):
         tbl = tools.correlate_date_diff(tbl, 'creationDate', 'processDate', to_header='diff', precision=0)
         tprint(tbl)
 
+    def test_correlate_number(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        tbl = pa.table([pa.array([1.5, 0, None, 10.25, 3])], names=['num'])
+        result = tools.correlate_number(tbl, 'num', offset=2, lower=2, upper=5, to_header='offset')
+        self.assertEqual([3.5, 2.0, None, 5.0, 5.0], result.column('offset').to_pylist())
+        result = tools.correlate_number(tbl, 'num', code_str='lambda x: x * 2', keep_zero=True, to_header='code')
+        self.assertEqual([3.0, 0.0, None, 20.5, 6.0], result.column('code').to_pylist())
+        result = tools.correlate_number(tbl.filter(pc.is_valid(tbl.column('num'))), 'num', choice=2, offset=100,
+                                        seed=31, to_header='choice')
+        self.assertEqual(2, pc.sum(pc.greater(result.column('choice'), 99)).as_py())
+        result = tools.correlate_number(tbl, 'num', offset=1, precision=0, to_header='int')
+        self.assertEqual([2, 1, None, 11, 4], result.column('int').to_pylist())
+        self.assertTrue(pa.types.is_integer(result.column('int').type))
+
     def test_correlate_dates(self):
         fe = FeatureEngineer.from_memory()
         tools: FeatureEngineerIntent = fe.tools
@@ -183,10 +276,15 @@ class FeatureEngineerCorrelateTest(unittest.TestCase):
         self.assertEqual(['2019/02/01', '2019/02/14', '2019/03/09', '2019/03/09'], result.column('offset').to_pylist())
         result = tools.correlate_dates(tbl, 'dates', offset=-2, date_format='%Y/%m/%d', to_header='offset')
         self.assertEqual(['2019/01/28', '2019/02/10', '2019/03/05', '2019/03/05'], result.column('offset').to_pylist())
+        frac = pa.table([pa.array(pd.to_datetime(['2019/01/30 10:11:12.250']), pa.timestamp('us'))], names=['dates'])
+        result = tools.correlate_dates(frac, 'dates', offset=2, date_format='%Y/%m/%d %H:%M:%S.%f', to_header='offset')
+        self.assertEqual(['2019/02/01 10:11:12.250000'], result.column('offset').to_pylist())
         result = tools.correlate_dates(tbl, 'dates', offset={'years': 1, 'months': 2}, date_format='%Y/%m/%d', to_header='offset')
         self.assertEqual(['2020/03/30', '2020/04/12', '2020/05/07', '2020/05/07'], result.column('offset').to_pylist())
         result = tools.correlate_dates(tbl, 'dates', offset={'years': -1, 'months': 2}, date_format='%Y/%m/%d', to_header='offset')
         self.assertEqual(['2018/03/30', '2018/04/12', '2018/05/07', '2018/05/07'], result.column('offset').to_pylist())
+        result = tools.correlate_dates(tbl, 'dates', offset={'months': 1}, date_format='%Y/%m/%d', to_header='offset')
+        self.assertEqual(['2019/02/28', '2019/03/12', '2019/04/07', '2019/04/07'], result.column('offset').to_pylist())
         # jitter
         result = tools.correlate_dates(tbl, 'dates', jitter=2, jitter_units='D', to_header='jitter', seed=31)
         loss = tools.correlate_date_diff(result, first_date='dates', second_date='jitter', to_header='diff')
@@ -227,6 +325,27 @@ class FeatureEngineerCorrelateTest(unittest.TestCase):
         self.assertCountEqual(['id', 'cat', 'num', 'int', 'bool', 'date', 'string', 'date_hr', 'date_min'], result.column_names)
         result = tools.correlate_date_element(tbl, header='date', elements={'hr':'hours', 'min':'mins'}, drop_header=True)
         self.assertCountEqual(['id', 'cat', 'num', 'int', 'bool', 'string', 'hours', 'mins'], result.column_names)
+        tbl = pa.table([pa.array(['2023-01-02 10:11:12', '31/12/2021', None, '2021-12-31 23:59:00'])], names=['date'])
+        result = tools.correlate_date_element(tbl, header='date', elements=['yr', 'mon', 'dow', 'hr', 'woy', 'doy'])
+        self.assertEqual([2023, 2021, None, 2021], result.column('date_yr').to_pylist())
+        self.assertEqual([1, 12, None, 12], result.column('date_mon').to_pylist())
+        self.assertEqual([0, 4, None, 4], result.column('date_dow').to_pylist())
+        self.assertEqual([10, 0, None, 23], result.column('date_hr').to_pylist())
+        self.assertEqual([1, 52, None, 52], result.column('date_woy').to_pylist())
+        self.assertEqual([2, 365, None, 365], result.column('date_doy').to_pylist())
+        tbl = pa.table([pa.array(['02/01/2023', '31/12/2021'])], names=['date'])
+        result = tools.correlate_date_element(tbl, header='date', elements={'day': 'day', 'mon': 'mon'}, day_first=True)
+        self.assertEqual([2, 31], result.column('day').to_pylist())
+        self.assertEqual([1, 12], result.column('mon').to_pylist())
+        # a like layout in the other order is detected afresh
+        tbl = pa.table([pa.array(['01/12/2023', '12/31/2021'])], names=['date'])
+        result = tools.correlate_date_element(tbl, header='date', elements={'day': 'day', 'mon': 'mon'})
+        self.assertEqual([12, 31], result.column('day').to_pylist())
+        self.assertEqual([1, 12], result.column('mon').to_pylist())
+        tbl = pa.table([pa.array(['13/01/2023', '01/12/2023'])], names=['date'])
+        result = tools.correlate_date_element(tbl, header='date', elements={'day': 'day', 'mon': 'mon'})
+        self.assertEqual([13, 1], result.column('day').to_pylist())
+        self.assertEqual([1, 12], result.column('mon').to_pylist())
 
 
     def test_model_missing(self):
@@ -266,8 +385,13 @@ class FeatureEngineerCorrelateTest(unittest.TestCase):
         t1 = pa.Table.from_pydict({'A': [1, 2], 'B': [1, 3], 'C': [2, 4]})
         result = tools.correlate_aggregate(t1, headers=['A', 'B', 'C'], action='multiply', to_header='agg')
         print(fe.table_report(result).to_string())
+        self.assertEqual([2, 24], result.column('agg').to_pylist())
         result = tools.correlate_aggregate(t1, headers=['A'], action='sqrt', to_header='agg')
         print(fe.table_report(result).to_string())
+        result = tools.correlate_aggregate(t1, headers=['A', 'B', 'C'], action='max_element_wise', to_header='agg')
+        self.assertEqual([2, 4], result.column('agg').to_pylist())
+        with self.assertRaises(ValueError):
+            tools.correlate_aggregate(t1, headers=['A', 'B'], action='not_a_function')
 
 
 
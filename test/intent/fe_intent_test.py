@@ -5,6 +5,7 @@ import shutil
 import ast
 from pprint import pprint
 
+from datetime import datetime
 import pandas as pd
 import pyarrow as pa
 import pyarrow.compute as pc
@@ -12,6 +13,7 @@ import pyarrow.parquet as pq
 from ds_capability.sample.sample_data import MappedSample
 
 from ds_capability import *
+from ds_capability.components.commons import Commons
 from ds_capability.intent.feature_engineer_intent import FeatureEngineerIntent
 from ds_core.properties.property_manager import PropertyManager
 
@@ -145,6 +147,56 @@ class FeatureEngineerTest(unittest.TestCase):
         self.assertEqual(['A', 'B', 'C'], tbl.column_names)
         tbl = tools.get_noise(10, num_columns=3, name_prefix='P_')
         self.assertEqual(['P_A', 'P_B', 'P_C'], tbl.column_names)
+        tbl = tools.get_noise(100, num_columns=300, seed=31)
+        self.assertEqual((100, 300), tbl.shape)
+        self.assertEqual(tbl.column(0).to_pylist(), tools.get_noise(100, num_columns=300, seed=31).column(0).to_pylist())
+
+    def test_get_datetime(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        tbl = tools.get_datetime('2023-01-01', '2023-12-31', size=100, quantity=0.5, seed=31, to_header='dates')
+        self.assertEqual(pa.timestamp('us'), tbl.column('dates').type)
+        self.assertEqual(50, tbl.column('dates').null_count)
+        tbl = tools.get_datetime('2023-01-01', '2023-12-31', size=100, ignore_time=True, to_header='dates')
+        self.assertEqual(0, pc.sum(pc.hour(tbl.column('dates'))).as_py())
+        tbl = tools.get_datetime('2023-01-01', '2023-12-31', size=10, date_format='%Y/%m', to_header='dates')
+        self.assertTrue(all(len(v) == 7 for v in tbl.column('dates').to_pylist()))
+        values = tools.get_datetime('2023-01-01', '2023-12-31', size=10, as_num=True, seed=31)
+        self.assertEqual(values, Commons.date2value(Commons.value2date(values)))
+
+    def test_date_value_columns(self):
+        dates = pa.array([datetime(1970, 1, 2), None, datetime(2023, 1, 2, 10)], pa.timestamp('ms', 'Europe/London'))
+        values = Commons.column_date2value(dates)
+        self.assertEqual(pa.int64(), values.type)
+        self.assertEqual([86400000000, None, 1672653600000000], values.to_pylist())
+        self.assertEqual([86400000000, 0, 1672653600000000], Commons.date2value(dates))
+        self.assertEqual([86400000000, None], Commons.column_date2value(pa.array(['1970-01-02', None])).to_pylist())
+        result = Commons.column_value2date(values, dt_tz='Europe/London')
+        self.assertEqual(pa.timestamp('us', 'Europe/London'), result.type)
+        self.assertEqual(dates.cast(pa.timestamp('us', 'Europe/London')), result)
+        result = Commons.column_value2date(values, dt_tz='Europe/London', date_format='%Y-%m-%d %H:%M')
+        self.assertEqual(['1970-01-02 01:00', None, '2023-01-02 10:00'], result.to_pylist())
+        # %f is the microseconds and %S the whole second, as Python prints them
+        self.assertEqual(['1970-01-01 00:00:01.500000', '1969-12-31 23:59:58.500000'],
+                         Commons.value2date([1500000, -1500000], date_format='%Y-%m-%d %H:%M:%S.%f'))
+        tbl = FeatureEngineer.from_memory().tools.get_datetime('2023-01-01', '2023-01-02', size=10,
+                                                               date_format='%H:%M:%S.%f', seed=31, to_header='dates')
+        self.assertTrue(all(len(v) == 15 and '%' not in v for v in tbl.column('dates').to_pylist()))
+
+    def test_get_dist(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        tbl = tools.get_dist_normal(mean=0, std=1, size=1000, quantity=0.9, to_header='normal')
+        self.assertEqual(100, tbl.column('normal').null_count)
+        tbl = tools.get_dist_binomial(number=0.2, size=1000, to_header='binomial')
+        self.assertEqual(200, pc.sum(tbl.column('binomial')).as_py())
+        tbl = tools.get_dist_bounded_normal(mean=10, std=2, lower=8, upper=12, size=1000, to_header='bounded')
+        self.assertTrue(pc.min(tbl.column('bounded')).as_py() >= 8)
+        self.assertTrue(pc.max(tbl.column('bounded')).as_py() <= 12)
+        tbl = tools.get_distribution(distribution='poisson', lam=3, size=1000, to_header='poisson')
+        self.assertEqual((1000, 1), tbl.shape)
+        with self.assertRaises(ValueError):
+            tools.get_distribution(distribution='not_a_distribution', size=10)
 
     def test_correlate_replace(self):
         fe = FeatureEngineer.from_memory()
@@ -163,6 +215,45 @@ class FeatureEngineerTest(unittest.TestCase):
         i = tools.sample_inspect('us_persona')
         print(i)
 
+    def test_sample_store(self):
+        tbl = MappedSample._get_table('map_us_phone_code')
+        self.assertIs(tbl, MappedSample._get_table('map_us_phone_code'))
+        result = MappedSample.us_phone_code(size=5, seed=31)
+        self.assertEqual(tbl.column_names, result.column_names)
+        self.assertEqual(5, result.num_rows)
+        result = MappedSample._get_constant('lookup_us_street_suffix', size=4, seed=31)
+        self.assertIsInstance(result, list)
+        self.assertEqual(4, len(result))
+        # a dataset is cached by its file and header
+        named = MappedSample._get_dataset('map_us_city_area_code.csv', shuffle=False)
+        unnamed = MappedSample._get_dataset('map_us_city_area_code.csv', shuffle=False, header=False)
+        self.assertEqual(named.num_rows + 1, unnamed.num_rows)
+        self.assertNotEqual(named.column_names, unnamed.column_names)
+
+    def test_get_synthetic_persona_usa(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        tbl = tools.get_synthetic_persona_usa(1000, seed=31)
+        self.assertEqual(1000, tbl.num_rows)
+        self.assertTrue({'first_name', 'family_name', 'gender', 'city', 'state', 'zipcode'}.issubset(tbl.column_names))
+        result = tools.get_synthetic_persona_usa(1000, seed=31)
+        self.assertEqual(tbl.column('family_name').to_pylist(), result.column('family_name').to_pylist())
+        persona = MappedSample.us_persona(size=1000, seed=31)
+        self.assertEqual(1000, pc.count_distinct(persona.column('email')).as_py())
+
+    def test_sample_index(self):
+        selection = ['a', 'b', 'c']
+        result = MappedSample._select_list(selection, size=7, shuffle=False)
+        self.assertEqual(['a', 'b', 'c', 'a', 'b', 'c', 'a'], result)
+        self.assertEqual(['a', 'b', 'c'], selection)
+        self.assertEqual(MappedSample._select_list(selection, size=20, seed=31),
+                         MappedSample._select_list(selection, size=20, seed=31))
+        idx = MappedSample._sample_index(num_rows=10, size=25, seed=31, replace=False)
+        self.assertEqual(25, idx.size)
+        self.assertEqual(list(range(10)), sorted(idx[:10].tolist()))
+        idx = MappedSample._weighted_index(weights=[2, 0, 1], shuffle=False)
+        self.assertEqual([0, 0, 2], idx.tolist())
+
     def test_raise(self):
         with self.assertRaises(KeyError) as context:
             env = os.environ['NoEnvValueTest']
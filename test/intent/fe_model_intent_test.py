@@ -2,11 +2,13 @@ import unittest
 import os
 from pathlib import Path
 import shutil
+import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pyarrow.compute as pc
 from ds_capability import *
 from ds_capability.components.commons import Commons
+from ds_capability.intent.abstract_feature_intent import AbstractFeatureIntentModel
 from ds_capability.intent.feature_engineer_intent import FeatureEngineerIntent
 from ds_core.properties.property_manager import PropertyManager
 from ds_capability.components.visualization import Visualisation as viz
@@ -48,6 +50,7 @@ class FeatureEngineerModelTest(unittest.TestCase):
         except OSError:
             pass
         PropertyManager._remove_all()
+        AbstractFeatureIntentModel._REMOTE_CACHE.clear()
 
     def tearDown(self):
         try:
@@ -134,6 +137,129 @@ class FeatureEngineerModelTest(unittest.TestCase):
         self.assertCountEqual(result.column_names, canonical.column_names + ['key1', 'key2'])
         self.assertTrue(result.column('key1').equals(result.column('key2')))
 
+    def test_model_concat_remote_sample(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        canonical = pa.table([pa.array(range(1000))], names=['id'])
+        other = pa.table([pa.array(range(100)), pa.array([str(x) for x in range(100)])], names=['num', 'label'])
+        result = tools.model_concat_remote(canonical, other, headers=['num', 'label'], seed=31)
+        self.assertEqual(['id', 'num', 'label'], result.column_names)
+        self.assertEqual(result.column('num').cast(pa.string()).to_pylist(), result.column('label').to_pylist())
+        control = tools.model_concat_remote(canonical, other, headers=['num', 'label'], seed=31)
+        self.assertTrue(control.equals(result))
+        # weighted towards the first band of the other rows
+        result = tools.model_concat_remote(canonical, other, headers='num', relative_freq=[9, 1], seed=31)
+        self.assertTrue(850 < pc.sum(pc.less(result.column('num'), 50)).as_py() < 950)
+        result = tools.model_concat_remote(canonical.slice(0, 100), other, headers='num', replace=False, seed=31)
+        self.assertEqual(list(range(100)), sorted(result.column('num').to_pylist()))
+        with self.assertRaises(ValueError):
+            tools.model_concat_remote(canonical, other, headers='num', replace=False)
+
+    def test_model_concat_remote_cache(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        uri = os.path.join(os.environ['HADRON_DEFAULT_PATH'], 'remote.parquet')
+        fe.add_connector_uri('remote', uri=uri)
+        fe.save_canonical('remote', pa.table([pa.array(range(10))], names=['num']))
+        first = tools._get_cached_canonical('remote')
+        self.assertIs(first, tools._get_cached_canonical('remote'))
+        stat = os.stat(uri)
+        os.utime(uri, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+        self.assertIsNot(first, tools._get_cached_canonical('remote'))
+        # an empty change state is not cached
+        os.utime(uri, ns=(0, 0))
+        first = tools._get_cached_canonical('remote')
+        self.assertIsNone(tools._canonical_state('remote'))
+        self.assertIsNot(first, tools._get_cached_canonical('remote'))
+        canonical = pa.table([pa.array(range(5))], names=['id'])
+        result = tools.model_concat_remote(canonical, 'remote', headers='num', seed=31)
+        self.assertEqual(5, result.num_rows)
+        # the cache is bounded
+        for n in range(AbstractFeatureIntentModel._REMOTE_CACHE_LIMIT + 1):
+            fe.add_connector_uri(f'remote_{n}', uri=os.path.join(os.environ['HADRON_DEFAULT_PATH'], f'remote_{n}.parquet'))
+            fe.save_canonical(f'remote_{n}', pa.table([pa.array(range(n + 1))], names=['num']))
+            tools._get_cached_canonical(f'remote_{n}')
+        self.assertLessEqual(len(AbstractFeatureIntentModel._REMOTE_CACHE), AbstractFeatureIntentModel._REMOTE_CACHE_LIMIT)
+
+    def test_model_merge(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        canonical = pa.table([pa.array([1, 2, 2, None, 5]), pa.array(['x', 'y', 'z', 'w', 'v']),
+                              pa.array([1, 1, 1, 1, 1])], names=['key', 'label', 'value'])
+        other = pa.table([pa.array([2, 1, 7, 2]), pa.array([10.0, 20.0, 30.0, 40.0]),
+                          pa.array([9, 9, 9, 9])], names=['key', 'prob', 'value'])
+        for how in ['left', 'right', 'inner']:
+            result = tools.model_merge(canonical, other, on='key', how=how, indicator=True)
+            control = canonical.to_pandas().merge(other.to_pandas(), on='key', how=how, suffixes=('', '_dup'),
+                                                  indicator=True)
+            self.assertEqual(list(control.columns), result.column_names)
+            self.assertCountEqual(control['prob'].fillna(-1).tolist(),
+                                  result.column('prob').fill_null(-1).to_pylist())
+            self.assertEqual(control['_merge'].astype(str).tolist(), result.column('_merge').cast(pa.string()).to_pylist())
+        # other is not truncated to the canonical size
+        result = tools.model_merge(canonical.slice(0, 2), other, on='key', how='left', headers=['prob'])
+        self.assertEqual(['key', 'label', 'value', 'prob'], result.column_names)
+        self.assertEqual([20.0, 10.0, 40.0], result.column('prob').to_pylist())
+        with self.assertRaises(ValueError):
+            tools.model_merge(canonical, other, on='key', validate='1:1')
+
+    def test_model_merge_key_index(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        fe.add_connector_uri('ref_index', uri=os.path.join(os.environ['HADRON_DEFAULT_PATH'], 'ref_index.parquet'))
+        canonical = pa.table([pa.array(['b', 'a', 'q', None, 'b'])], names=['code'])
+        other = pa.table([pa.array(['a', 'b', 'c', 'b']), pa.array([10, 20, 30, 40])], names=['ref', 'value'])
+        for how in ['left', 'inner']:
+            control = tools.model_merge(canonical, other, left_on='code', right_on='ref', how=how)
+            result = tools.model_merge(canonical, other, left_on='code', right_on='ref', how=how, key_index='ref_index')
+            self.assertTrue(control.equals(result))
+        self.assertTrue(os.path.exists(os.path.join(os.environ['HADRON_DEFAULT_PATH'], 'ref_index.parquet')))
+        # string keys are looked up Arrow side against the runs of the sorted keys
+        index = pa.table([pa.array(['a', 'b', 'b', 'c']), pa.array([0, 1, 3, 2])], names=['key', 'position'])
+        left, right = tools._key_index_positions(pa.array(['b', 'q', None, 'c']), index, how='left')
+        self.assertEqual([0, 0, 1, 2, 3], left.to_pylist())
+        self.assertEqual([1, 3, None, None, 2], right.to_pylist())
+        left, right = tools._key_index_positions(pa.array(['c', 'a']), index, how='inner')
+        self.assertEqual([[0, 1], [2, 0]], [left.to_pylist(), right.to_pylist()])
+        # an edit the key sample misses still rebuilds the index
+        keys = np.arange(5000)
+        canonical = pa.table([pa.array([1, 2])], names=['code'])
+        other = pa.table([pa.array(keys), pa.array(keys * 10)], names=['ref', 'value'])
+        _ = tools.model_merge(canonical, other, left_on='code', right_on='ref', key_index='ref_index')
+        keys[[1, 2]] = keys[[2, 1]]
+        other = pa.table([pa.array(keys), pa.array(np.arange(5000) * 10)], names=['ref', 'value'])
+        result = tools.model_merge(canonical, other, left_on='code', right_on='ref', key_index='ref_index')
+        self.assertEqual([20, 10], result.column('value').to_pylist())
+
+    def test_model_group(self):
+        fe = FeatureEngineer.from_memory()
+        tools: FeatureEngineerIntent = fe.tools
+        tbl = pa.table([pa.array(['b', 'a', 'b', 'a', 'c', None]), pa.array([1, 2, 3, 2, 5, 6]),
+                        pa.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])], names=['key', 'int', 'num'])
+        result = tools.model_group(tbl, group_by='key', headers=['int', 'num'])
+        self.assertEqual(['key', 'int', 'num'], result.column_names)
+        self.assertEqual(['a', 'b', 'c'], result.column('key').to_pylist())
+        self.assertEqual([4, 4, 5], result.column('int').to_pylist())
+        result = tools.model_group(tbl, group_by='key', headers='int', aggregator='nunique', include_weighting=True)
+        self.assertEqual([0.5, 0.25, 0.25], result.column('weighting').to_pylist())
+        result = tools.model_group(tbl, group_by='key', headers='int', aggregator='set')
+        self.assertEqual([[2], [1, 3], [5]], result.column('int').to_pylist())
+        result = tools.model_group(tbl, group_by='key', headers='num', aggregator='list', list_max=1)
+        self.assertEqual([2.0, 1.0, 5.0], result.column('num').to_pylist())
+        result = tools.model_group(tbl, group_by='key', headers='int', aggregator='list', list_choice=4, seed=31)
+        self.assertEqual([4, 4, 4], pc.list_value_length(result.column('int')).to_pylist())
+        self.assertEqual([1, 3], sorted(set(result.column('int').to_pylist()[1])))
+        result = tools.model_group(tbl, group_by='key', headers=['int', 'num'], aggregator='median')
+        self.assertEqual([2.0, 2.0, 5.0], result.column('int').to_pylist())
+        self.assertEqual([3.0, 2.0, 5.0], result.column('num').to_pylist())
+        # numeric group_by columns are included in the weighting as with pandas
+        result = tools.model_group(tbl, group_by='int', headers='num', include_weighting=True)
+        df = tbl.to_pandas()[['int', 'num']].groupby('int', as_index=False).agg('sum')
+        weighting = (df.sum(axis=1) / df.sum(axis=1).sum()).round(3).sort_values(ascending=False).to_list()
+        self.assertEqual(weighting, result.column('weighting').to_pylist())
+        with self.assertRaises(ValueError):
+            tools.model_group(tbl, group_by='key', aggregator='not_an_aggregator')
+
 
     def test_raise(self):
         with self.assertRaises(KeyError) as context:
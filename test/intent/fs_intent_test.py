@@ -6,6 +6,7 @@ import ast
 from datetime import datetime
 from pprint import pprint
 
+import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pyarrow.compute as pc
@@ -13,6 +14,7 @@ import pyarrow.parquet as pq
 
 from ds_capability import FeatureEngineer, FeatureSelect
 from ds_capability.components.commons import Commons
+from ds_core.components.core_commons import CoreCommons
 from ds_core.properties.property_manager import PropertyManager
 from ds_capability.intent.feature_select_intent import FeatureSelectIntent
 
@@ -73,6 +75,64 @@ class FeatureEngineererTest(unittest.TestCase):
         result = tools.auto_clean_header(tbl, rename_map=['cid', 'category', 'float', 'integer', 'boolean', 'date', 'str'])
         self.assertEqual(['cid', 'category', 'float', 'integer', 'boolean', 'date', 'str'], result.column_names)
 
+    def test_auto_clean_headers_mapping(self):
+        tbl = pa.table([pa.array([1]), pa.array([2.0]), pa.array(['a'])], names=['Cust ID', 'amount ($)', 'name'])
+        fs = FeatureSelect.from_memory()
+        tools: FeatureSelectIntent = fs.tools
+        result = tools.auto_clean_header(tbl, case='upper', replace_spaces='-')
+        self.assertEqual(['CUST-ID', 'AMOUNT-', 'NAME'], result.column_names)
+        fs.add_connector_uri('mapper', uri='working/data/mapper.parquet')
+        fs.save_canonical('mapper', pa.table([pa.array(['Cust ID', 'name']), pa.array(['cid', 'full name'])],
+                                             names=['from', 'to']))
+        result = tools.auto_clean_header(tbl, rename_map='mapper')
+        self.assertEqual(['cid', 'amount_', 'full_name'], result.column_names)
+
+    def test_filter_headers(self):
+        tbl = pa.table([pa.array([1.0]), pa.array([1]), pa.array(['a']), pa.array(['x']).dictionary_encode()],
+                       names=['num', 'int', 'str', 'cat_amt'])
+        self.assertEqual(['num', 'int'], Commons.filter_headers(tbl, d_types=['is_integer', 'is_floating']))
+        self.assertEqual(['num', 'int', 'str'], Commons.filter_headers(tbl, regex='^((?!_amt).)*$'))
+        self.assertEqual(['int', 'str', 'cat_amt'], Commons.filter_headers(tbl, headers=['num', 'none'], drop=True))
+        self.assertEqual(['str'], Commons.filter_columns(tbl, d_types=[pa.string()]).column_names)
+        self.assertEqual(['cat_amt'], Commons.filter_columns(tbl, d_types='is_dictionary', regex='cat').column_names)
+        # tables carrying schema metadata, as from_pandas and parquet give them
+        tbl = pa.Table.from_pandas(pd.DataFrame({'num': [1.0], 'str': ['a']}))
+        self.assertIsNotNone(tbl.schema.metadata)
+        self.assertEqual(['num'], Commons.filter_headers(tbl, d_types=['is_floating']))
+        self.assertEqual(['str'], Commons.filter_columns(tbl, headers='num', drop=True).column_names)
+
+    def test_column_precision(self):
+        arr = pa.array([1.5, None, 0.125, 12.0, -3.1415, 1e-5, 123456.7])
+        self.assertEqual(CoreCommons.column_precision(arr), Commons.column_precision(arr))
+        self.assertEqual(5, Commons.column_precision(arr))
+        self.assertEqual(0, Commons.column_precision(pa.array([1.0, 2.0, None])))
+        self.assertEqual(0, Commons.column_precision(pa.array([1, 2])))
+        with self.assertRaises(ValueError):
+            Commons.column_precision(pa.array(['a']))
+
+    def test_table_builder(self):
+        tbl = pa.table([pa.chunked_array([[1, 2], [3]]), pa.array(['a', 'b', 'c']), pa.array([0.1, 0.2, 0.3])],
+                       names=['A', 'B', 'C'])
+        result = Commons.table_append(tbl, pa.table([pa.array([4, 5, 6]), pa.array([7, 8, 9])], names=['A', 'D']))
+        self.assertEqual(['B', 'C', 'A', 'D'], result.column_names)
+        self.assertEqual([4, 5, 6], result.column('A').to_pylist())
+        # the staged changes are committed once and untouched columns keep their chunks
+        builder = Commons.table_builder(tbl)
+        builder.set('B', pa.array(['x', 'y', 'z'])).append('C', pa.array([1.0, 2.0, 3.0])).set('E', [1, 1, 1])
+        builder.drop(['none'])
+        result = builder.build()
+        self.assertEqual(['A', 'B', 'C', 'E'], result.column_names)
+        self.assertEqual(2, result.column('A').num_chunks)
+        self.assertEqual(['x', 'y', 'z'], result.column('B').to_pylist())
+        self.assertEqual(['A', 'E'], builder.drop(['B', 'C']).build().column_names)
+        with self.assertRaises(ValueError):
+            builder.set('F', pa.array([1]))
+        # cast passes through columns that keep their type
+        tbl = pa.table([pa.chunked_array([[1, 2], [3]]), pa.chunked_array([['1', '0'], ['1']])], names=['A', 'B'])
+        result = Commons.table_cast(tbl)
+        self.assertEqual(2, result.column('A').num_chunks)
+        self.assertEqual(pa.bool_(), result.column('B').type)
+
 
     def test_auto_drop_noise(self):
         tbl = FeatureEngineer.from_memory().tools.get_synthetic_data_types(1000, extend=True)
@@ -83,6 +143,24 @@ class FeatureEngineererTest(unittest.TestCase):
         self.assertEqual(14, result.num_columns)
         self.assertCountEqual(['one_string', 'nest_list', 'nulls'], Commons.list_diff(tbl.column_names, result.column_names))
 
+    def test_auto_drop_noise_screen(self):
+        gen = np.random.default_rng(0)
+        tbl = pa.table([pa.array(gen.normal(size=1000)), pa.array(gen.normal(scale=0.05, size=1000)),
+                        pa.chunked_array([pa.array([1] * 500), pa.array([2] * 500)]),
+                        pa.chunked_array([pa.array(['a'] * 500), pa.array(['a'] * 500)]),
+                        pa.array(['a'] * 500 + ['b'] * 500).dictionary_encode(),
+                        pa.array([None] * 990 + ['x'] * 5 + ['y'] * 5), pa.array(['a'] * 995 + ['b'] * 5),
+                        pa.array([None] * 1000, pa.float64()), pa.array([[1]] * 1000)],
+                       names=['num', 'small', 'chunked', 'same', 'cat', 'mostly', 'dominant', 'nulls', 'nest'])
+        fs = FeatureSelect.from_memory()
+        tools: FeatureSelectIntent = fs.tools
+        result = tools.auto_drop_noise(tbl)
+        self.assertEqual(['num', 'chunked', 'cat', 'dominant'], result.column_names)
+        result = tools.auto_drop_noise(tbl, predominant_threshold=0.99)
+        self.assertEqual(['num', 'chunked', 'cat'], result.column_names)
+        result = tools.auto_drop_noise(tbl, variance_threshold=0.0)
+        self.assertEqual(['num', 'small', 'chunked', 'cat', 'dominant'], result.column_names)
+
     def test_auto_drop_columns(self):
         tbl = FeatureEngineer.from_memory().tools.get_synthetic_data_types(1000)
         fs = FeatureSelect.from_memory()
@@ -100,6 +178,23 @@ class FeatureEngineererTest(unittest.TestCase):
         self.assertEqual(18, result.num_columns)
         self.assertNotIn('dup_num', result.column_names)
 
+    def test_auto_drop_correlated_sample(self):
+        gen = np.random.default_rng(0)
+        num = gen.normal(size=5000)
+        near = num * 2 + gen.normal(scale=0.1, size=5000)
+        near[::7] = np.nan
+        tbl = pa.table([pa.array(num), pa.array(gen.normal(size=5000)), pa.array(near, from_pandas=True),
+                        pa.array(-num + gen.normal(scale=0.5, size=5000)), pa.array([None] * 5000, pa.float64())],
+                       names=['num', 'other', 'near', 'loose', 'nulls'])
+        fs = FeatureSelect.from_memory()
+        tools: FeatureSelectIntent = fs.tools
+        result = tools.auto_drop_correlated(tbl)
+        self.assertEqual(['num', 'other', 'loose', 'nulls'], result.column_names)
+        result = tools.auto_drop_correlated(tbl, sample_size=200, seed=0)
+        self.assertEqual(['num', 'other', 'loose', 'nulls'], result.column_names)
+        result = tools.auto_drop_correlated(tbl, threshold=0.8)
+        self.assertEqual(['num', 'other', 'nulls'], result.column_names)
+
     def test_aggrigate(self):
         tbl = FeatureEngineer.from_memory().tools.get_synthetic_data_types(5, extend=False)
         fs = FeatureSelect.from_memory()
@@ -110,6 +205,30 @@ class FeatureEngineererTest(unittest.TestCase):
         self.assertEqual([2, 2, 2, 2, 2], result.column('agg').to_pylist())
         self.assertEqual(['num', 'int', 'bool', 'date', 'agg'], result.column_names)
 
+    def test_aggregate_actions(self):
+        fs = FeatureSelect.from_memory()
+        tools: FeatureSelectIntent = fs.tools
+        tbl = pa.table([pa.array([1, None, 3]), pa.array([2.5, None, None]), pa.array([1, 2, None])],
+                       names=['a', 'b', 'c'])
+        df = tbl.to_pandas()
+        for action in ['sum', 'prod', 'min', 'max', 'mean', 'count']:
+            result = tools.auto_aggregate(tbl, action=action, to_header='agg')
+            self.assertEqual(getattr(df, action)(axis=1).round(3).tolist(), result.column('agg').to_pylist())
+        result = tools.auto_aggregate(tbl, action='sum', headers=['a', 'c'], to_header='agg')
+        self.assertEqual([2, 2, 3], result.column('agg').to_pylist())
+        self.assertTrue(pa.types.is_integer(result.column('agg').type))
+        for action, expected in [('min', [1, 2, 3]), ('max', [1, 2, 3]), ('prod', [1, 2, 3])]:
+            result = tools.auto_aggregate(tbl, action=action, headers=['a', 'c'], to_header='agg')
+            self.assertEqual(expected, result.column('agg').to_pylist())
+        # integer totals beyond the float64 mantissa stay exact
+        big = pa.table([pa.array([2 ** 53, 5]), pa.array([1, None])], names=['a', 'b'])
+        result = tools.auto_aggregate(big, action='sum', to_header='agg')
+        self.assertEqual([2 ** 53 + 1, 5], result.column('agg').to_pylist())
+        result = tools.auto_aggregate(tbl, action='list', to_header='agg')
+        self.assertEqual([[1.0, 2.5, 1.0], [2.0], [3.0]], result.column('agg').to_pylist())
+        result = tools.auto_aggregate(tbl, action='list_last', headers=['a', 'c'], to_header='agg')
+        self.assertEqual([1, 2, 3], result.column('agg').to_pylist())
+
     def test_auto_projection(self):
         tbl = FeatureEngineer.from_memory().tools.get_noise(size=1000, num_columns=5)
         fs = FeatureSelect.from_memory()
@@ -119,6 +238,66 @@ class FeatureEngineererTest(unittest.TestCase):
         self.assertEqual(control, result.column_names)
         self.assertEqual((1000, 2), result.shape)
 
+    def test_auto_projection_solvers(self):
+        tbl = FeatureEngineer.from_memory().tools.get_noise(size=1000, num_columns=5)
+        fs = FeatureSelect.from_memory()
+        tools: FeatureSelectIntent = fs.tools
+        control = tools.auto_projection(tbl, n_components=2)
+        result = tools.auto_projection(tbl, n_components=2, solver='randomized', seed=0)
+        self.assertTrue(np.allclose(np.abs(control.column('pca_A').to_numpy()), np.abs(result.column('pca_A').to_numpy())))
+        result = tools.auto_projection(tbl, n_components=2, solver='incremental', batch_size=300)
+        self.assertEqual((1000, 2), result.shape)
+        self.assertEqual(4, result.column('pca_A').num_chunks)
+        # fitted components are reused to only project
+        fs.add_connector_uri('pca', uri='working/data/pca.parquet')
+        _ = tools.auto_projection(tbl, n_components=2, model_connector='pca')
+        result = tools.auto_projection(tbl.slice(0, 10), n_components=4, model_connector='pca')
+        self.assertEqual(['pca_A', 'pca_B'], result.column_names)
+        self.assertTrue(np.allclose(control.column('pca_B').to_numpy()[:10], result.column('pca_B').to_numpy()))
+
+    def test_auto_sample_rows(self):
+        gen = np.random.default_rng(0)
+        tbl = pa.table([pa.array(np.arange(10000)), pa.array(gen.choice(['a', 'b'], 10000, p=[0.8, 0.2])),
+                        pa.array(gen.random(10000))], names=['id', 'grp', 'weight'])
+        fs = FeatureSelect.from_memory()
+        tools: FeatureSelectIntent = fs.tools
+        result = tools.auto_sample_rows(tbl, 100, seed=0)
+        self.assertEqual(100, result.num_rows)
+        self.assertTrue(np.all(np.diff(result.column('id').to_numpy()) > 0))
+        self.assertEqual(tbl.num_rows, tools.auto_sample_rows(tbl, 20000).num_rows)
+        self.assertEqual(20000, tools.auto_sample_rows(tbl, 20000, replace=True).num_rows)
+        # stratified
+        counts = pc.value_counts(tbl.column('grp').combine_chunks()).to_pylist()
+        counts = {c['values']: c['counts'] for c in counts}
+        result = tools.auto_sample_rows(tbl, 0.1, stratify_by='grp', rates={'b': 0.5}, seed=0)
+        result = {c['values']: c['counts'] for c in pc.value_counts(result.column('grp').combine_chunks()).to_pylist()}
+        self.assertEqual({'a': round(counts['a'] * 0.1), 'b': round(counts['b'] * 0.5)}, result)
+        # weighted
+        result = tools.auto_sample_rows(tbl, 1000, weights='weight', seed=0)
+        self.assertGreater(pc.mean(result.column('weight')).as_py(), 0.6)
+        # zero weights are never drawn and weights and replace hold within strata
+        zeros = tbl.set_column(2, 'weight', pa.array(np.where(np.arange(10000) < 50, 1.0, 0.0)))
+        result = tools.auto_sample_rows(zeros, 100, weights='weight', seed=0)
+        self.assertEqual(list(range(50)), result.column('id').to_pylist())
+        with self.assertRaises(ValueError):
+            tools.auto_sample_rows(zeros.set_column(2, 'weight', pa.array(np.zeros(10000))), 10, weights='weight',
+                                   replace=True)
+        result = tools.auto_sample_rows(tbl, 0.1, stratify_by='grp', weights='weight', seed=0)
+        self.assertEqual(1000, result.num_rows)
+        self.assertGreater(pc.mean(result.column('weight')).as_py(), 0.6)
+        result = tools.auto_sample_rows(tbl, 0.5, stratify_by='grp', replace=True, seed=0)
+        self.assertEqual(5000, result.num_rows)
+        self.assertLess(pc.count_distinct(result.column('id')).as_py(), 5000)
+        # reservoir over streamed batches matches the table sample
+        control = tools.auto_sample_rows(tbl, 100, seed=0)
+        reader = pa.RecordBatchReader.from_batches(tbl.schema, tbl.to_batches(max_chunksize=700))
+        result = tools.auto_sample_rows(reader, 100, seed=0)
+        self.assertEqual(control.column('id').to_pylist(), result.column('id').to_pylist())
+        reader = pa.RecordBatchReader.from_batches(tbl.schema, tbl.to_batches(max_chunksize=700))
+        result = tools.auto_sample_rows(reader, 0, seed=0)
+        self.assertEqual(0, result.num_rows)
+        self.assertEqual(tbl.schema, result.schema)
+
     def test_auto_append_tables(self):
         tbl = FeatureEngineer.from_memory().tools.get_noise(size=1000, num_columns=5)
         fs = FeatureSelect.from_memory()
@@ -4,6 +4,7 @@ from pathlib import Path
 import shutil
 import ast
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pyarrow.compute as pc
@@ -61,6 +62,29 @@ class FeatureBuilderTest(unittest.TestCase):
         except OSError:
             pass
 
+    def test_activate_headers(self):
+        tbl = pa.table([pa.array([-1.0, None, 2.0]), pa.array([-3, 4, None]), pa.array(['a', 'b', 'c'])],
+                       names=['num', 'int', 'str'])
+        ft = FeatureTransform.from_memory()
+        tools: FeatureTransformIntent = ft.tools
+        result = tools.activate_headers(tbl, activation='sigmoid')
+        self.assertEqual([0.26894, None, 0.8808], result.column('num').to_pylist())
+        self.assertEqual([0.04743, 0.98201, None], result.column('int').to_pylist())
+        self.assertEqual(['a', 'b', 'c'], result.column('str').to_pylist())
+        result = tools.activate_headers(tbl.slice(1), activation='relu', regex='int')
+        self.assertEqual([4, None], result.column('int').to_pylist())
+        self.assertEqual([None, 2.0], result.column('num').to_pylist())
+        result = tools.activate_headers(tbl, activation='tanh', headers='num', precision=2)
+        self.assertEqual([-0.76, None, 0.96], result.column('num').to_pylist())
+        self.assertEqual(pa.int64(), result.column('int').type)
+        # drop reverses the headers but not the numeric types
+        result = tools.activate_headers(tbl, activation='tanh', headers='int', drop=True, precision=2)
+        self.assertEqual([-0.76, None, 0.96], result.column('num').to_pylist())
+        self.assertEqual([-3, 4, None], result.column('int').to_pylist())
+        self.assertEqual(['a', 'b', 'c'], result.column('str').to_pylist())
+        with self.assertRaises(ValueError):
+            tools.activate_headers(tbl, activation='softmax')
+
     def test_encoder_integer(self):
         tbl = pa.table([pa.array(['C', 'B', 'C', 'B', 'A', 'B', 'A', 'D'], pa.string()),
                         pa.array(['C', 'B', 'C', 'B', 'A', 'B', 'A', 'D'], pa.string()),
@@ -73,6 +97,64 @@ class FeatureBuilderTest(unittest.TestCase):
         self.assertEqual([2, 1, 2, 1, 0, 1, 0, 3], result['cross'].to_pylist())
         result = tools.encode_category_integer(tbl, headers='cross', label_count=2)
         self.assertEqual([2, 1, 2, 1, 0, 1, 0, 2], result['cross'].to_pylist())
+        self.assertEqual(pa.int32(), result['cross'].type)
+        # fitted mapping is stable across runs
+        ft.add_connector_uri('mapping', uri='working/data/mapping.parquet')
+        _ = tools.encode_category_integer(tbl, headers='cross', ordinal=True, vocabulary='mapping')
+        other = pa.table([pa.array(['D', 'A', None, 'E'], pa.string())], names=['cross'])
+        result = tools.encode_category_integer(other, headers='cross', ordinal=True, vocabulary='mapping')
+        self.assertEqual([3, 0, None, None], result['cross'].to_pylist())
+        result = tools.encode_category_integer(other, headers='cross', label_count=2, vocabulary='mapping')
+        self.assertEqual([2, 0, None, 2], result['cross'].to_pylist())
+        result = tools.encode_category_integer(other, headers='cross', vocabulary={'cross': ['E', 'D']})
+        self.assertEqual([1, None, None, 0], result['cross'].to_pylist())
+
+    def test_encoder_date_integer(self):
+        tbl = pa.table([pa.array([datetime(1970, 1, 2), None, datetime(2023, 1, 2, 10)], pa.timestamp('s')),
+                        pa.array([datetime(1970, 1, 1, 1), datetime(2023, 1, 2, 10), None], pa.timestamp('us', 'UTC')),
+                        pa.array(['A', 'B', 'C'], pa.string())], names=['dates', 'utc', 'str'])
+        ft = FeatureTransform.from_memory()
+        tools: FeatureTransformIntent = ft.tools
+        result = tools.encode_date_integer(tbl, prefix='enc_')
+        self.assertEqual(['dates', 'utc', 'str', 'enc_dates', 'enc_utc'], result.column_names)
+        self.assertEqual([86400000000, 0, 1672653600000000], result.column('enc_dates').to_pylist())
+        self.assertEqual([3600000000, 1672653600000000, 0], result.column('enc_utc').to_pylist())
+
+    def test_encoder_one_hot(self):
+        tbl = pa.table([pa.array(['B', 'A', None, 'C', 'A'], pa.string()),
+                        pa.array([3, 1, 2, 3, None], pa.int64()),
+                        pa.array([1.0, 2.0, 3.0, 4.0, 5.0], pa.float64())], names=['cat', 'num', 'value'])
+        ft = FeatureTransform.from_memory()
+        tools: FeatureTransformIntent = ft.tools
+        result = tools.encode_category_one_hot(tbl, headers=['cat', 'num'])
+        self.assertEqual(['value', 'cat_A', 'cat_B', 'cat_C', 'num_1', 'num_2', 'num_3'], result.column_names)
+        self.assertEqual([False, True, False, False, True], result.column('cat_A').to_pylist())
+        result = tools.encode_category_one_hot(tbl, headers='cat', dummy_na=True, drop_first=True, data_type='int8')
+        self.assertEqual(['num', 'value', 'cat_B', 'cat_C', 'cat_nan'], result.column_names)
+        self.assertEqual([0, 0, 1, 0, 0], result.column('cat_nan').to_pylist())
+        self.assertEqual(pa.int8(), result.column('cat_B').type)
+        # sparse
+        result = tools.encode_category_one_hot(tbl, headers=['cat', 'num'], as_sparse=True)
+        self.assertEqual([[1, 5], [0, 3], [4], [2, 5], [0]], result.column('one_hot').to_pylist())
+        matrix = Commons.column_to_csr(result.column('one_hot'), width=6)
+        self.assertEqual((5, 6), matrix.shape)
+        self.assertEqual([0, 1, 0, 0, 0, 1], matrix.toarray()[0].tolist())
+        # fitted vocabulary is stable across batches
+        ft.add_connector_uri('vocab', uri='working/data/vocab.parquet')
+        _ = tools.encode_category_one_hot(tbl, headers='cat', vocabulary='vocab')
+        result = tools.encode_category_one_hot(tbl.slice(0, 2), headers='cat', vocabulary='vocab')
+        self.assertEqual(['num', 'value', 'cat_A', 'cat_B', 'cat_C'], result.column_names)
+        result = tools.encode_category_one_hot(pa.table({'cat': ['D', 'C']}), headers='cat', vocabulary='vocab')
+        self.assertEqual([[False, False, False], [False, False, True]],
+                         [list(r.values()) for r in result.to_pylist()])
+        # labels and types as pandas get_dummies has them
+        flags = pa.table([pa.array([1.0, 2.5, 1.0]), pa.array([True, False, None])], names=['value', 'flag'])
+        result = tools.encode_category_one_hot(flags, headers=['value', 'flag'], data_type=pa.int8())
+        expected = pd.get_dummies(flags.to_pandas(), columns=['value', 'flag'], dtype='int8')
+        self.assertEqual(expected.columns.tolist(), result.column_names)
+        self.assertEqual(pa.int8(), result.column('flag_True').type)
+        result = tools.encode_category_one_hot(flags, headers='value', vocabulary={'value': [1.0, 2.5]})
+        self.assertEqual([True, False, True], result.column('value_1.0').to_pylist())
 
 
     def test_scale_normalize(self):
@@ -165,6 +247,14 @@ class FeatureBuilderTest(unittest.TestCase):
         result = tools.discrete_quantiles(tbl, header='num', to_header='num', duplicates='rank')
         self.assertEqual(100, result.num_rows)
         self.assertCountEqual([1,2,3,4], result.column('num').unique().to_pylist())
+        # fitted edges are stable across runs
+        ft.add_connector_uri('edges', uri='working/data/edges.parquet')
+        other = pa.table([pa.array([0, 1, 2, 3, 4, 5, 6, 7], pa.int64())], names=['num'])
+        _ = tools.discrete_quantiles(other, header='num', edge_connector='edges')
+        other = pa.table([pa.array([-1, 0, 3, 7, None, 9], pa.int64())], names=['num'])
+        result = tools.discrete_quantiles(other, header='num', edge_connector='edges')
+        self.assertEqual([None, 1, 2, 4, None, None], result.column('num').to_pylist())
+        self.assertTrue(pa.types.is_dictionary(result.column('num').type))
 
 
     def test_raise(self):